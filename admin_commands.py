@@ -1,6 +1,14 @@
+import math
 import discord
 from discord.ext import commands
 from data_manager import data_manager
+from loop_monitor import loop_monitor
+from render_cache import render_cache
+from log_channel import log_channel
+import guild_settings
+import metrics
+import sharding
+import tracing
 
 def setup_admin_commands(bot):
     @bot.command(name="pixel")
@@ -36,6 +44,23 @@ def setup_admin_commands(bot):
             inline=True
         )
         
+        # Per-shard gateway latency (only in AutoShardedBot mode)
+        if sharding.ENABLED:
+            shard_lines = [
+                f"{'🟢' if row['connected'] else '🔴'} **Shard {row['shard']}:** "
+                + (f"`{row['latency'] * 1000:.0f} ms`" if math.isfinite(row['latency']) else "`connecting`")
+                + f" • `{row['guilds']:,}` servers"
+                for row in sharding.shard_status(bot)
+            ]
+            shown = shard_lines[:15]
+            if len(shard_lines) > len(shown):
+                shown.append(f"*…and {len(shard_lines) - len(shown)} more*")
+            embed.add_field(
+                name=f"🛰️ **Shards** ({len(shard_lines)} of {sharding.shard_count()})",
+                value="\n".join(shown) or "*none connected yet*",
+                inline=False
+            )
+        
         # Server Statistics
         embed.add_field(
             name="🏠 **Server Statistics**",
@@ -47,6 +72,38 @@ def setup_admin_commands(bot):
             inline=True
         )
         
+        # Event loop health (last 5 minutes of samples, last hour of stalls)
+        lag = loop_monitor.lag_summary()
+        stalls = loop_monitor.recent_stalls()
+        loop_lines = [
+            f"**Loop Lag p50/p99:** `{lag['p50'] * 1000:.1f} / {lag['p99'] * 1000:.1f} ms`",
+            f"**Worst Lag (5m):** `{lag['max'] * 1000:.0f} ms`",
+            f"**Stalls (1h):** `{len(stalls)}`",
+        ]
+        if stalls:
+            worst = max(stalls, key=lambda s: s["seconds"])
+            loop_lines.append(f"**Worst Stall:** `{worst['activity']}` ({worst['seconds'] * 1000:.0f} ms)")
+        embed.add_field(
+            name="⏱️ **Event Loop**",
+            value="\n".join(loop_lines),
+            inline=False
+        )
+        
+        # In-memory caches (since start)
+        render = render_cache.stats()
+        profile_hits = metrics.CACHE_HITS.value(cache="profiles")
+        profile_lookups = profile_hits + metrics.CACHE_MISSES.value(cache="profiles")
+        embed.add_field(
+            name="🧠 **Caches**",
+            value=(
+                f"**Profiles:** `{profile_hits / profile_lookups:.0%}` hit rate\n" if profile_lookups else "**Profiles:** `no lookups yet`\n"
+            ) + (
+                f"**Rendered embeds:** `{render['hit_rate']:.0%}` hit rate "
+                f"({render['hits']:,} hits / {render['misses']:,} misses, {render['entries']:,} cached)"
+            ),
+            inline=False
+        )
+        
         embed.set_footer(text=f"PixelBot v2.0 • Running on {total_guilds} servers")
         embed.set_thumbnail(url=bot.user.avatar.url if bot.user.avatar else None)
         
@@ -57,6 +114,62 @@ def setup_admin_commands(bot):
         if isinstance(error, commands.MissingPermissions):
             await ctx.send("🚫 You need to be a **server admin** to use this command.")
 
+    @bot.command(name="slow_traces")
+    @commands.has_permissions(administrator=True)
+    async def slow_traces(ctx, index: int = None):
+        """List recent slow command traces, or show one trace's spans"""
+        traces = tracing.recent_slow_traces()
+        if not traces:
+            await ctx.send(f"✅ No commands slower than `{tracing.SLOW_MS:.0f} ms` recorded yet.")
+            return
+
+        if index is None:
+            lines = []
+            for i, trace in enumerate(traces[:15], start=1):
+                status = "❌" if trace.error else "✅"
+                lines.append(
+                    f"`{i:>2}` {status} **{trace.name}** — `{trace.duration * 1000:.0f} ms` "
+                    f"<t:{int(trace.started_at)}:R>"
+                )
+            embed = discord.Embed(
+                title="🐢 Slow Command Traces",
+                description="\n".join(lines),
+                color=0x8A2BE2
+            )
+            embed.set_footer(text=f"Threshold {tracing.SLOW_MS:.0f} ms • Use !slow_traces <number> for details")
+            await ctx.send(embed=embed)
+            return
+
+        if not 1 <= index <= len(traces):
+            await ctx.send(f"❌ Pick a trace between 1 and {len(traces)}.")
+            return
+
+        trace = traces[index - 1]
+        depth = {trace.root.span_id: 0}
+        rows = []
+        for s in trace.children():
+            depth[s.span_id] = depth.get(s.parent_id, 0) + 1
+            offset = (s.start - trace.root.start) * 1000
+            rows.append(f"{'  ' * depth[s.span_id]}{s.name[:48]:<48} +{offset:7.1f} {s.duration * 1000:8.1f} ms")
+        body = "\n".join(rows[:40]) or "(no sub-spans)"
+        if len(rows) > 40:
+            body += f"\n… {len(rows) - 40} more spans"
+
+        embed = discord.Embed(
+            title=f"🐢 {trace.name} — {trace.duration * 1000:.0f} ms",
+            description=f"```\n{body[:3900]}\n```",
+            color=0xff0000 if trace.error else 0x8A2BE2
+        )
+        if trace.error:
+            embed.add_field(name="Error", value=trace.error[:1024], inline=False)
+        embed.set_footer(text=f"Trace ID: {trace.trace_id}")
+        await ctx.send(embed=embed)
+
+    @slow_traces.error
+    async def slow_traces_error(ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("🚫 You need **Administrator** permissions to use this command.")
+
     @bot.command(name="blacklist_channel")
     @commands.has_permissions(administrator=True)
     async def blacklist_channel(ctx, channel: discord.TextChannel):
@@ -257,6 +370,79 @@ def setup_admin_commands(bot):
         embed.set_footer(text="Use !unblacklist_channel or !unblacklist_category to remove items")
         await ctx.send(embed=embed)
 
+    @bot.command(name="set_log_channel")
+    @commands.has_permissions(administrator=True)
+    async def set_log_channel(ctx, channel: str = None):
+        """Post a log of proxied messages to a channel (or `off`)"""
+        if channel is None:
+            current = await guild_settings.get(ctx.guild.id, "log_channel")
+            await ctx.send(f"📜 Proxied messages are logged to <#{current}>." if current else
+                           "📜 No log channel is set. Usage: `!set_log_channel #channel` or `!set_log_channel off`")
+            return
+
+        if channel.lower() in ("off", "none", "disable"):
+            if await guild_settings.set_values(ctx.guild.id, log_channel=None):
+                log_channel.forget_guild(ctx.guild.id)
+                await ctx.send("✅ Proxy logging disabled.")
+            else:
+                await ctx.send("❌ Failed to save settings. Please try again.")
+            return
+
+        target = await commands.TextChannelConverter().convert(ctx, channel)
+        perms = target.permissions_for(ctx.guild.me)
+        if not (perms.send_messages and perms.embed_links):
+            await ctx.send(f"❌ I need **Send Messages** and **Embed Links** permissions in {target.mention}.")
+            return
+        if await guild_settings.set_values(ctx.guild.id, log_channel=str(target.id)):
+            embed = discord.Embed(
+                title="✅ Log Channel Set",
+                description=f"Proxied messages in this server will be logged to {target.mention}.\n"
+                            "Entries are posted in batches every few seconds.",
+                color=0x00ff00
+            )
+            await ctx.send(embed=embed)
+        else:
+            await ctx.send("❌ Failed to save settings. Please try again.")
+
+    @bot.command(name="server_proxy")
+    @commands.has_permissions(administrator=True)
+    async def server_proxy(ctx, state: str = None):
+        """Turn proxying on or off for the whole server"""
+        if state is None or state.lower() not in ("on", "off"):
+            enabled = await guild_settings.get(ctx.guild.id, "proxy_enabled")
+            await ctx.send(f"🗣️ Proxying is **{'on' if enabled else 'off'}** in this server. "
+                           "Usage: `!server_proxy on` or `!server_proxy off`")
+            return
+
+        enabled = state.lower() == "on"
+        if await guild_settings.set_values(ctx.guild.id, proxy_enabled=enabled):
+            await ctx.send("✅ Proxying enabled in this server." if enabled else
+                           "🔴 Proxying disabled in this server. Commands keep working.")
+        else:
+            await ctx.send("❌ Failed to save settings. Please try again.")
+
+    @bot.command(name="set_prefix")
+    @commands.has_permissions(administrator=True)
+    async def set_prefix(ctx, prefix: str = None):
+        """Change the command prefix for this server (or `reset` it)"""
+        if prefix is None:
+            current = await guild_settings.get(ctx.guild.id, "prefix") or guild_settings.DEFAULT_PREFIX
+            await ctx.send(f"⌨️ The command prefix here is `{current}`. Usage: `{current}set_prefix <prefix>` or "
+                           f"`{current}set_prefix reset`. Mentioning me always works as a prefix too.")
+            return
+
+        if prefix.lower() == "reset":
+            prefix = guild_settings.DEFAULT_PREFIX
+        if len(prefix) > guild_settings.MAX_PREFIX_LENGTH or prefix.startswith("<"):
+            await ctx.send(f"❌ A prefix can be at most {guild_settings.MAX_PREFIX_LENGTH} characters "
+                           "and can't be a mention or emoji.")
+            return
+
+        if await guild_settings.set_values(ctx.guild.id, prefix=prefix):
+            await ctx.send(f"✅ Command prefix set to `{prefix}` – for example `{prefix}pixelhelp`.")
+        else:
+            await ctx.send("❌ Failed to save settings. Please try again.")
+
     @bot.command(name="admin_commands")
     @commands.has_permissions(administrator=True)
     async def admin_commands(ctx):
@@ -270,7 +456,9 @@ def setup_admin_commands(bot):
         embed.add_field(
             name="📊 **Bot Management**",
             value=(
-                "`!admin_commands` - Show this help menu"
+                "`!admin_commands` - Show this help menu\n"
+                "`!pixel` - Bot status dashboard\n"
+                "`!slow_traces [number]` - Recent slow commands and their timing breakdown"
             ),
             inline=False
         )
@@ -287,6 +475,16 @@ def setup_admin_commands(bot):
             inline=False
         )
         
+        embed.add_field(
+            name="📜 **Proxy Settings**",
+            value=(
+                "`!set_log_channel <channel|off>` - Log proxied messages (author, alter, jump link) to a channel\n"
+                "`!server_proxy <on|off>` - Turn proxying on or off for the whole server\n"
+                "`!set_prefix <prefix|reset>` - Use a different command prefix in this server"
+            ),
+            inline=False
+        )
+        
         embed.set_footer(text="All commands require Administrator permissions")
         await ctx.send(embed=embed)
 
@@ -324,6 +522,23 @@ def setup_admin_commands(bot):
         if isinstance(error, commands.MissingPermissions):
             await ctx.send("🚫 You need **Administrator** permissions to use this command.")
 
+    @set_log_channel.error
+    async def set_log_channel_error(ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("🚫 You need **Administrator** permissions to use this command.")
+        elif isinstance(getattr(error, "original", error), commands.BadArgument):
+            await ctx.send("❌ Please mention a valid text channel. Usage: `!set_log_channel #channel` or `!set_log_channel off`")
+
+    @server_proxy.error
+    async def server_proxy_error(ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("🚫 You need **Administrator** permissions to use this command.")
+
+    @set_prefix.error
+    async def set_prefix_error(ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("🚫 You need **Administrator** permissions to use this command.")
+
     @admin_commands.error
     async def admin_commands_error(ctx, error):
         if isinstance(error, commands.MissingPermissions):
@@ -2,9 +2,158 @@ import discord
 from discord.ext import commands
 from discord.ui import View, Button
 from data_manager import data_manager
+from export_format import now_iso, touch_alter
+from http_client import http_client
+from member_list import SORTS, listing_for, page_count, page_lines
+from profile_links import delete_alters, folders_of, rename_alter
+from render_cache import embed_payload, render_cache, send_payload
+from search_index import index_for, resolve_or_reply
+import aiohttp
 import re
+import shlex
 import datetime
 
+AVATAR_MAX_BYTES = 8 * 1024 * 1024
+_KEEP_FORMATTING = re.compile(r"\\([*_~`])")
+
+
+class MemberListView(View):
+    """``!list`` pages; holds only the ordered names and renders one page per press."""
+
+    def __init__(self, user_id, system_name, names, filters=""):
+        super().__init__(timeout=180)
+        self.user_id = user_id
+        self.system_name = system_name
+        self.names = names
+        self.filters = filters
+        self.current_page = 0
+        self.total_pages = page_count(names)
+
+        if self.total_pages == 1:
+            for child in self.children:
+                if isinstance(child, Button):
+                    child.disabled = True
+
+    def render(self, profile):
+        embed = discord.Embed(
+            title=f"🗂️ System Members for {self.system_name} (Page {self.current_page + 1}/{self.total_pages})",
+            description="\n".join(page_lines(profile, self.names, self.current_page)) or "*No members on this page.*",
+            color=0x8A2BE2
+        )
+        footer = f"User ID: {self.user_id} • Total visible members: {len(self.names)}"
+        embed.set_footer(text=f"{footer} • {self.filters}" if self.filters else footer)
+        return embed
+
+    async def update_message(self, interaction):
+        profile = await data_manager.get_user_profile(self.user_id)
+        await interaction.response.edit_message(embed=self.render(profile), view=self)
+
+    @discord.ui.button(label="⬅️ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        self.current_page = (self.current_page - 1) % self.total_pages
+        await self.update_message(interaction)
+
+    @discord.ui.button(label="➡️ Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        self.current_page = (self.current_page + 1) % self.total_pages
+        await self.update_message(interaction)
+
+def _render_show(user_id, profile, name):
+    """Build the ``!show`` payload (cached by ``render_cache`` until the profile changes)."""
+    alter = profile["alters"][name]
+    displayname = alter.get("displayname", name)
+    aliases = alter.get("aliases", [])
+    alias_list = ", ".join(aliases) if aliases else "None"
+    avatar_url = alter.get("avatar", None)
+    proxy_avatar_url = alter.get("proxy_avatar") or alter.get("proxyavatar", None)
+    banner_url = alter.get("banner", None)
+    embed_color = alter.get("color", 0x8A2BE2)
+    
+    # Handle color format conversion (PluralKit imports may have string colors)
+    if isinstance(embed_color, str):
+        try:
+            # Remove # if present and convert hex string to int
+            embed_color = int(embed_color.replace("#", ""), 16)
+        except (ValueError, AttributeError):
+            embed_color = 0x8A2BE2  # Default color if conversion fails
+
+    use_embed = alter.get("use_embed", True)
+
+    description = alter.get("description", "No description provided") or "No description provided"
+
+    # Enhanced description formatting: escape everything, then let bold/italic/strike/code through
+    description = _KEEP_FORMATTING.sub(r"\1", discord.utils.escape_markdown(description))
+
+    if use_embed:
+        embed = discord.Embed(
+            title=f"🗂️ {displayname}",
+            color=embed_color
+        )
+        embed.add_field(name="👤 Alter Name", value=name, inline=True)
+        embed.add_field(name="✨ Display Name", value=displayname, inline=True)
+        embed.add_field(name="🏷️ Pronouns", value=alter.get("pronouns", "Not set"), inline=True)
+        
+        # System-specific fields
+        if alter.get("role"):
+            embed.add_field(name="🎭 Role", value=alter["role"], inline=True)
+        if alter.get("age"):
+            embed.add_field(name="🎂 Age", value=alter["age"], inline=True)
+        
+        embed.add_field(name="🔄 Proxy", value=alter.get("proxy", "Not set"), inline=True)
+        embed.add_field(name="🏷️ Aliases", value=alias_list, inline=False)
+        folders = folders_of(user_id, profile, name)
+        if folders:
+            embed.add_field(name="📁 Folders", value=", ".join(sorted(folders)), inline=False)
+        embed.add_field(name="📝 Description", value=description, inline=False)
+
+        # Privacy indicators
+        privacy = alter.get("privacy", {})
+        privacy_status = []
+        if not privacy.get("show_in_list", True):
+            privacy_status.append("Hidden from lists")
+        if not privacy.get("allow_proxy", True):
+            privacy_status.append("Proxy disabled")
+        if privacy_status:
+            embed.add_field(name="🔒 Privacy", value=" • ".join(privacy_status), inline=False)
+
+        if avatar_url:
+            embed.set_thumbnail(url=avatar_url)
+
+        if banner_url:
+            embed.set_image(url=banner_url)
+
+        if proxy_avatar_url:
+            embed.set_footer(text=f"Proxy Avatar for {displayname}", icon_url=proxy_avatar_url)
+        else:
+            embed.set_footer(text=f"User ID: {user_id}")
+        
+        if proxy_avatar_url and proxy_avatar_url != avatar_url:
+            embed.add_field(name="🔄 Proxy Avatar", value=f"[View Proxy Avatar]({proxy_avatar_url})", inline=False)
+
+        return embed_payload(embed)
+
+    else:
+        # Non-embed format with enhanced info
+        message = [
+            f"**🗂️ {displayname}**",
+            f"👤 **Alter Name:** {name}",
+            f"🏷️ **Pronouns:** {alter.get('pronouns', 'Not set')}",
+        ]
+        
+        if alter.get("role"):
+            message.append(f"🎭 **Role:** {alter['role']}")
+        if alter.get("age"):
+            message.append(f"🎂 **Age:** {alter['age']}")
+            
+        message.extend([
+            f"🔄 **Proxy:** {alter.get('proxy', 'Not set')}",
+            f"🏷️ **Aliases:** {alias_list}",
+            f"📝 **Description:** {description}"
+        ])
+        
+        return {"content": "\n".join(message)}
+
+
 def setup_alter_commands(bot):
     @bot.command(name="create")
     async def create(ctx, name: str, pronouns: str = "Not set", *, description: str = "No description provided."):
@@ -40,6 +189,7 @@ def setup_alter_commands(bot):
                 "color": 0x8A2BE2,
                 "use_embed": use_embed,
                 "created_at": datetime.datetime.utcnow().isoformat(),
+                "updated_at": now_iso(),
                 "role": None,  # System role (protector, persecutor, caretaker, etc.)
                 "age": None,
                 "birthday": None,
@@ -69,8 +219,8 @@ def setup_alter_commands(bot):
         
         profile = await data_manager.get_user_profile(user_id)
         
-        if name not in profile.get("alters", {}):
-            await ctx.send(f"❌ Alter '{name}' does not exist.")
+        name = await resolve_or_reply(ctx, profile, name)
+        if name is None:
             return
 
         alter = profile["alters"][name]
@@ -104,6 +254,7 @@ def setup_alter_commands(bot):
                     return
 
                 alter[field] = image_url
+                touch_alter(profile, name)
                 await data_manager.save_user_profile(user_id, profile)
                 await ctx.send(f"✅ {field.replace('_', ' ').capitalize()} for alter '{name}' updated successfully!")
                 return
@@ -124,6 +275,7 @@ def setup_alter_commands(bot):
                     return
 
                 alter["color"] = color_int
+                touch_alter(profile, name)
                 await data_manager.save_user_profile(user_id, profile)
                 await ctx.send(f"✅ Color for alter '{name}' updated successfully!")
                 return
@@ -135,6 +287,7 @@ def setup_alter_commands(bot):
                 role_msg = await bot.wait_for("message", timeout=120, check=lambda m: m.author == ctx.author and m.channel == ctx.channel)
                 role_value = role_msg.content.strip()
                 alter["role"] = None if role_value.lower() == "none" else role_value
+                touch_alter(profile, name)
                 await data_manager.save_user_profile(user_id, profile)
                 await ctx.send(f"✅ Role for alter '{name}' updated successfully!")
                 return
@@ -144,6 +297,7 @@ def setup_alter_commands(bot):
                 age_msg = await bot.wait_for("message", timeout=120, check=lambda m: m.author == ctx.author and m.channel == ctx.channel)
                 age_value = age_msg.content.strip()
                 alter["age"] = None if age_value.lower() in ["none", "unknown"] else age_value
+                touch_alter(profile, name)
                 await data_manager.save_user_profile(user_id, profile)
                 await ctx.send(f"✅ Age for alter '{name}' updated successfully!")
                 return
@@ -167,14 +321,38 @@ def setup_alter_commands(bot):
                     await ctx.send("❌ Invalid privacy setting. Use `show`, `hide`, `proxy`, or `noproxy`.")
                     return
                     
+                touch_alter(profile, name)
                 await data_manager.save_user_profile(user_id, profile)
                 await ctx.send(f"✅ Privacy settings for alter '{name}' updated successfully!")
                 return
 
+            if field == "name":
+                await ctx.send(f"💬 Please enter the new name for alter '{name}'.")
+                name_msg = await bot.wait_for("message", timeout=120, check=lambda m: m.author == ctx.author and m.channel == ctx.channel)
+                new_name = name_msg.content.strip()
+
+                profile = await data_manager.get_user_profile(user_id)
+                if name not in profile.get("alters", {}):
+                    await ctx.send(f"❌ Alter '{name}' no longer exists.")
+                    return
+                if not new_name or new_name == name:
+                    await ctx.send("❌ Please enter a different name.")
+                    return
+                if new_name in profile.get("alters", {}):
+                    await ctx.send(f"❌ An alter with the name **{new_name}** already exists.")
+                    return
+
+                if await rename_alter(user_id, profile, name, new_name):
+                    await ctx.send(f"✅ Alter renamed from '{name}' to '{new_name}' successfully! Folders and autoproxy now use the new name.")
+                else:
+                    await ctx.send(f"❌ Failed to rename alter **{name}**. Please try again.")
+                return
+
             await ctx.send(f"💬 Please enter the new value for **{field}**.")
             value_msg = await bot.wait_for("message", timeout=120, check=lambda m: m.author == ctx.author and m.channel == ctx.channel)
             alter[field] = value_msg.content.strip()
 
+            touch_alter(profile, name)
             await data_manager.save_user_profile(user_id, profile)
             await ctx.send(f"✅ Alter '{name}' updated successfully!")
 
@@ -186,107 +364,15 @@ def setup_alter_commands(bot):
         user_id = str(ctx.author.id)
         profile = await data_manager.get_user_profile(user_id)
         
-        if name not in profile.get("alters", {}):
-            await ctx.send(f"❌ Alter '{name}' does not exist.")
+        name = await resolve_or_reply(ctx, profile, name)
+        if name is None:
             return
 
-        alter = profile["alters"][name]
-        displayname = alter.get("displayname", name)
-        aliases = alter.get("aliases", [])
-        alias_list = ", ".join(aliases) if aliases else "None"
-        avatar_url = alter.get("avatar", None)
-        proxy_avatar_url = alter.get("proxy_avatar") or alter.get("proxyavatar", None)
-        banner_url = alter.get("banner", None)
-        embed_color = alter.get("color", 0x8A2BE2)
-        
-        # Handle color format conversion (PluralKit imports may have string colors)
-        if isinstance(embed_color, str):
-            try:
-                # Remove # if present and convert hex string to int
-                embed_color = int(embed_color.replace("#", ""), 16)
-            except (ValueError, AttributeError):
-                embed_color = 0x8A2BE2  # Default color if conversion fails
-
-        use_embed = alter.get("use_embed", True)
-
-        description = alter.get("description", "No description provided") or "No description provided"
-
-        # Enhanced description formatting
-        description = discord.utils.escape_markdown(description)
-        description = re.sub(r"\\\*", "*", description)
-        description = re.sub(r"\\_", "_", description)
-        description = re.sub(r"\\~", "~", description)
-        description = re.sub(r"\\`", "`", description)
-        description = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", r"[\1](\2)", description)
-
-        if use_embed:
-            embed = discord.Embed(
-                title=f"🗂️ {displayname}",
-                color=embed_color
-            )
-            embed.add_field(name="👤 Alter Name", value=name, inline=True)
-            embed.add_field(name="✨ Display Name", value=displayname, inline=True)
-            embed.add_field(name="🏷️ Pronouns", value=alter.get("pronouns", "Not set"), inline=True)
-            
-            # System-specific fields
-            if alter.get("role"):
-                embed.add_field(name="🎭 Role", value=alter["role"], inline=True)
-            if alter.get("age"):
-                embed.add_field(name="🎂 Age", value=alter["age"], inline=True)
-            
-            embed.add_field(name="🔄 Proxy", value=alter.get("proxy", "Not set"), inline=True)
-            embed.add_field(name="🏷️ Aliases", value=alias_list, inline=False)
-            embed.add_field(name="📝 Description", value=description, inline=False)
-
-            # Privacy indicators
-            privacy = alter.get("privacy", {})
-            privacy_status = []
-            if not privacy.get("show_in_list", True):
-                privacy_status.append("Hidden from lists")
-            if not privacy.get("allow_proxy", True):
-                privacy_status.append("Proxy disabled")
-            if privacy_status:
-                embed.add_field(name="🔒 Privacy", value=" • ".join(privacy_status), inline=False)
-
-            if avatar_url:
-                embed.set_thumbnail(url=avatar_url)
-
-            if banner_url:
-                embed.set_image(url=banner_url)
-
-            if proxy_avatar_url:
-                embed.set_footer(text=f"Proxy Avatar for {displayname}", icon_url=proxy_avatar_url)
-            else:
-                embed.set_footer(text=f"User ID: {user_id}")
-            
-            if proxy_avatar_url and proxy_avatar_url != avatar_url:
-                embed.add_field(name="🔄 Proxy Avatar", value=f"[View Proxy Avatar]({proxy_avatar_url})", inline=False)
-
-            await ctx.send(embed=embed)
-
-        else:
-            # Non-embed format with enhanced info
-            message = [
-                f"**🗂️ {displayname}**",
-                f"👤 **Alter Name:** {name}",
-                f"🏷️ **Pronouns:** {alter.get('pronouns', 'Not set')}",
-            ]
-            
-            if alter.get("role"):
-                message.append(f"🎭 **Role:** {alter['role']}")
-            if alter.get("age"):
-                message.append(f"🎂 **Age:** {alter['age']}")
-                
-            message.extend([
-                f"🔄 **Proxy:** {alter.get('proxy', 'Not set')}",
-                f"🏷️ **Aliases:** {alias_list}",
-                f"📝 **Description:** {description}"
-            ])
-            
-            await ctx.send("\n".join(message))
+        payload = render_cache.get("show", user_id, name, lambda: _render_show(user_id, profile, name))
+        await send_payload(ctx, payload)
 
     @bot.command(name="list_profiles", aliases=["list"])
-    async def list_profiles(ctx):
+    async def list_profiles(ctx, *, options: str = ""):
         user_id = str(ctx.author.id)
         profile = await data_manager.get_user_profile(user_id)
         user_profiles = profile.get("alters", {})
@@ -298,85 +384,90 @@ def setup_alter_commands(bot):
             await ctx.send("You don't have any alters set up yet. Use `!create` to add an alter.")
             return
 
-        # Enhanced profile listing with role and privacy info
-        profile_entries = []
-        for name, alter_data in sorted(user_profiles.items(), key=lambda x: x[0].lower()):
-            privacy = alter_data.get("privacy", {})
-            if not privacy.get("show_in_list", True):
-                continue  # Skip hidden alters
-                
-            role_text = f" ({alter_data['role']})" if alter_data.get("role") else ""
-            proxy_text = alter_data.get('proxy', 'No proxy set')
-            profile_entries.append(f"• **{name}**{role_text} — `{proxy_text}`")
+        # Options: sort:<name|created|newest|role>  role:<role>  folder:<folder>
+        sort, role, folder = "name", None, None
+        try:
+            tokens = shlex.split(options)
+        except ValueError:
+            tokens = options.split()
+        for token in tokens:
+            key, sep, value = token.partition(":") if ":" in token else token.partition("=")
+            key = key.lower()
+            if not sep and key in SORTS:
+                key, value = "sort", key
+            if key == "sort" and value.lower() in SORTS:
+                sort = value.lower()
+            elif key == "role" and value:
+                role = value
+            elif key == "folder" and value:
+                folders = profile.get("folders", {})
+                folder = value if value in folders else next((f for f in folders if f.casefold() == value.casefold()), None)
+                if folder is None:
+                    await ctx.send(f"❌ Folder '{value}' does not exist.")
+                    return
+            else:
+                await ctx.send("Usage: `!list [sort:name|created|newest|role] [role:<role>] [folder:<folder>]`")
+                return
+
+        listing = listing_for(user_id, profile)
+        names = listing.names(profile, sort, role, folder)
+
+        if not names:
+            if role or folder:
+                await ctx.send("No visible alters match those filters.")
+            else:
+                await ctx.send("No visible alters found. All alters may be set to private.")
+            return
+
+        filters = [f"sorted by {sort}"] if sort != "name" else []
+        if role:
+            filters.append(f"role: {role}")
+        if folder:
+            filters.append(f"folder: {folder}")
+        view = MemberListView(user_id, system_name, names, " • ".join(filters))
+        await ctx.send(embed=view.render(profile), view=view)
 
-        if not profile_entries:
-            await ctx.send("No visible alters found. All alters may be set to private.")
+    @bot.command(name="find", aliases=["search"])
+    async def find(ctx, *, query: str):
+        user_id = str(ctx.author.id)
+        profile = await data_manager.get_user_profile(user_id)
+        alters = profile.get("alters", {})
+
+        if not alters:
+            await ctx.send("You don't have any alters set up yet. Use `!create` to add an alter.")
             return
 
-        # Pagination
-        chunk_size = 15
-        pages = [profile_entries[i:i + chunk_size] for i in range(0, len(profile_entries), chunk_size)]
-
-        class ProfilePaginator(View):
-            def __init__(self, user_id, system_name, pages):
-                super().__init__(timeout=180)
-                self.user_id = user_id
-                self.system_name = system_name
-                self.pages = pages
-                self.current_page = 0
-                self.total_pages = len(pages)
-
-                if self.total_pages == 1:
-                    self.disable_buttons()
-
-            def disable_buttons(self):
-                for child in self.children:
-                    if isinstance(child, Button):
-                        child.disabled = True
-
-            async def update_message(self, interaction):
-                embed = discord.Embed(
-                    title=f"🗂️ System Members for {self.system_name} (Page {self.current_page + 1}/{self.total_pages})",
-                    description="\n".join(self.pages[self.current_page]),
-                    color=0x8A2BE2
-                )
-                embed.set_footer(text=f"User ID: {self.user_id} • Total visible members: {sum(len(page) for page in self.pages)}")
-                await interaction.response.edit_message(embed=embed, view=self)
-
-            @discord.ui.button(label="⬅️ Previous", style=discord.ButtonStyle.secondary)
-            async def previous_page(self, interaction, button):
-                self.current_page -= 1
-                if self.current_page < 0:
-                    self.current_page = self.total_pages - 1
-                await self.update_message(interaction)
-
-            @discord.ui.button(label="➡️ Next", style=discord.ButtonStyle.secondary)
-            async def next_page(self, interaction, button):
-                self.current_page += 1
-                if self.current_page >= self.total_pages:
-                    self.current_page = 0
-                await self.update_message(interaction)
+        results = index_for(user_id, profile).search(query, limit=15)
+        if not results:
+            await ctx.send(f"🔍 No alters match **{query}**.")
+            return
+
+        lines = []
+        for name, _score in results:
+            alter = alters[name]
+            displayname = alter.get("displayname") or name
+            shown = f"**{name}**" if displayname == name else f"**{name}** ({displayname})"
+            role_text = f" — {alter['role']}" if alter.get("role") else ""
+            lines.append(f"• {shown}{role_text}")
 
         embed = discord.Embed(
-            title=f"🗂️ System Members for {system_name} (Page 1/{len(pages)})",
-            description="\n".join(pages[0]),
+            title=f"🔍 Alters matching \"{query[:100]}\"",
+            description="\n".join(lines),
             color=0x8A2BE2
         )
-        embed.set_footer(text=f"User ID: {user_id} • Total visible members: {len(profile_entries)}")
-
-        await ctx.send(embed=embed, view=ProfilePaginator(user_id, system_name, pages))
+        embed.set_footer(text=f"Showing {len(results)} best matches • Use !show <name> for details")
+        await ctx.send(embed=embed)
 
     @bot.command()
     async def delete(ctx, name: str):
         user_id = str(ctx.author.id)
         profile = await data_manager.get_user_profile(user_id)
         
-        if name not in profile.get("alters", {}):
-            await ctx.send(f"❌ Alter '{name}' does not exist.")
+        name = await resolve_or_reply(ctx, profile, name, strict=True)  # never delete a guess
+        if name is None:
             return
             
-        del profile["alters"][name]
-        await data_manager.save_user_profile(user_id, profile)
+        await delete_alters(user_id, profile, [name])
         await ctx.send(f"✅ Alter '{name}' has been deleted successfully.")
 
     @bot.command()
@@ -384,11 +475,12 @@ def setup_alter_commands(bot):
         user_id = str(ctx.author.id)
         profile = await data_manager.get_user_profile(user_id)
         
-        if name not in profile.get("alters", {}):
-            await ctx.send(f"❌ Alter '{name}' does not exist.")
+        name = await resolve_or_reply(ctx, profile, name)
+        if name is None:
             return
             
         profile["alters"][name].setdefault("aliases", []).append(alias)
+        touch_alter(profile, name)
         await data_manager.save_user_profile(user_id, profile)
         await ctx.send(f"✅ Alias '{alias}' added to alter '{name}' successfully!")
 
@@ -397,8 +489,8 @@ def setup_alter_commands(bot):
         user_id = str(ctx.author.id)
         profile = await data_manager.get_user_profile(user_id)
         
-        if name not in profile.get("alters", {}):
-            await ctx.send(f"❌ Alter '{name}' does not exist.")
+        name = await resolve_or_reply(ctx, profile, name)
+        if name is None:
             return
 
         alter = profile["alters"][name]
@@ -411,6 +503,7 @@ def setup_alter_commands(bot):
         aliases.remove(alias)
         alter["aliases"] = aliases
 
+        touch_alter(profile, name)
         await data_manager.save_user_profile(user_id, profile)
         await ctx.send(f"✅ Alias '{alias}' removed from alter '{name}'.")
 
@@ -419,13 +512,14 @@ def setup_alter_commands(bot):
         user_id = str(ctx.author.id)
         profile = await data_manager.get_user_profile(user_id)
         
-        if name not in profile.get("alters", {}):
-            await ctx.send(f"❌ Alter '{name}' does not exist.")
+        name = await resolve_or_reply(ctx, profile, name)
+        if name is None:
             return
 
         alter = profile["alters"][name]
         alter["proxy"] = proxy
 
+        touch_alter(profile, name)
         await data_manager.save_user_profile(user_id, profile)
         await ctx.send(f"✅ Proxy for alter '{name}' set to: `{proxy}`")
 
@@ -434,8 +528,8 @@ def setup_alter_commands(bot):
         user_id = str(ctx.author.id)
         profile = await data_manager.get_user_profile(user_id)
         
-        if name not in profile.get("alters", {}):
-            await ctx.send(f"❌ Alter '{name}' does not exist.")
+        name = await resolve_or_reply(ctx, profile, name)
+        if name is None:
             return
 
         alter = profile["alters"][name]
@@ -453,15 +547,11 @@ def setup_alter_commands(bot):
             # ALWAYS try to set proxy avatar - NO EXCEPTIONS
             if proxy_avatar:
                 try:
-                    import aiohttp
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(proxy_avatar) as response:
-                            if response.status == 200:
-                                avatar_bytes = await response.read()
-                                await webhook.edit(avatar=avatar_bytes)
-                                print(f"✅ Successfully set proxy avatar for {displayname}")
-                            else:
-                                print(f"⚠️ Failed to fetch avatar for {displayname}: HTTP {response.status}")
+                    avatar_bytes = await http_client.fetch_bytes(proxy_avatar, op="avatar", max_bytes=AVATAR_MAX_BYTES)
+                    await webhook.edit(avatar=bytes(avatar_bytes))
+                    print(f"✅ Successfully set proxy avatar for {displayname}")
+                except aiohttp.ClientResponseError as e:
+                    print(f"⚠️ Failed to fetch avatar for {displayname}: HTTP {e.status}")
                 except Exception as e:
                     print(f"⚠️ Error setting avatar for {displayname}: {e}")
                     # Continue anyway - don't let avatar errors stop the proxy
@@ -488,8 +578,8 @@ def setup_alter_commands(bot):
         user_id = str(ctx.author.id)
         profile = await data_manager.get_user_profile(user_id)
         
-        if name not in profile.get("alters", {}):
-            await ctx.send(f"❌ Alter '{name}' does not exist.")
+        name = await resolve_or_reply(ctx, profile, name)
+        if name is None:
             return
 
         await ctx.send(f"📂 Please send the new **proxy avatar** for {name} as an **attachment** or a **direct image URL**.")
@@ -508,6 +598,7 @@ def setup_alter_commands(bot):
             alter = profile["alters"][name]
             alter["proxy_avatar"] = image_url
 
+            touch_alter(profile, name)
             await data_manager.save_user_profile(user_id, profile)
             await ctx.send(f"✅ Proxy avatar for alter '{name}' updated successfully!")
 
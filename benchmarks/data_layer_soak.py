@@ -0,0 +1,256 @@
+"""
+benchmarks/data_layer_soak.py – load / soak benchmark for MongoDataManager
+==========================================================================
+
+Drives ``get_user_profile``, ``save_user_profile``, ``create_alter``, ``get_blacklist``
+and ``save_blacklist`` from many concurrent workers for a soak period and reports
+throughput, tail latencies, MongoDB connection‑pool usage and cache memory.
+
+Runs against a local mongod when ``--mongodb-uri`` (or ``BENCH_MONGODB_URI``) is
+given – it writes to the ``--database`` (default ``pixel_bench``), never to the bot's
+own database – and against the in‑memory stand‑in otherwise.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.data_layer_soak --duration 30
+    python -m benchmarks.data_layer_soak --mongodb-uri mongodb://localhost:27017 \\
+        --users 2000 --alters 200 --concurrency 64 --mix get=60,save=25,create=5,get_blacklist=8,save_blacklist=2
+    python -m benchmarks.data_layer_soak --evict 0.2   # 20 % of reads miss the cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any
+
+from pymongo import monitoring
+
+from benchmarks.fakes import install_memory_backend
+from benchmarks.proxy_throughput import build_profile
+
+OPS = ("get", "save", "create", "get_blacklist", "save_blacklist")
+RESERVOIR = 200_000
+
+# ───────────────────────── pool monitoring ─────────────────────── #
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Counts connections created / checked out across every pool the client opens."""
+
+    def __init__(self):
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkout_failures = 0
+
+    def connection_created(self, event): self.created += 1
+    def connection_closed(self, event): self.closed += 1
+    def connection_check_out_failed(self, event): self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    # unused hooks required by the interface
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+# ───────────────────────── helpers ─────────────────────────────── #
+
+def deep_sizeof(obj: Any, seen: set[int] | None = None) -> int:
+    """Approximate retained size of a nested dict/list structure."""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def parse_mix(text: str) -> tuple[list[str], list[float]]:
+    names, weights = [], []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPS:
+            raise SystemExit(f"unknown op {name!r}; choose from {', '.join(OPS)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+def pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class Recorder:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.counts: dict[str, int] = defaultdict(int)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.window: dict[str, list[float]] = defaultdict(list)
+
+    def record(self, op: str, seconds: float, ok: bool) -> None:
+        self.counts[op] += 1
+        if not ok:
+            self.errors[op] += 1
+        self.window[op].append(seconds)
+        bucket = self.samples[op]
+        if len(bucket) < RESERVOIR:
+            bucket.append(seconds)
+        else:  # reservoir sampling keeps long soaks bounded
+            j = self.rng.randrange(self.counts[op])
+            if j < RESERVOIR:
+                bucket[j] = seconds
+
+    def drain_window(self) -> dict[str, list[float]]:
+        window, self.window = self.window, defaultdict(list)
+        return window
+
+# ───────────────────────── workload ────────────────────────────── #
+
+async def worker(dm, rec: Recorder, names: list[str], weights: list[float], args, deadline: float, seq) -> None:
+    rng = random.Random(rec.rng.random())
+    while time.perf_counter() < deadline:
+        op = rng.choices(names, weights)[0]
+        uid = str(rng.randrange(args.users) + 1)
+        gid = str(rng.randrange(args.guilds) + 1)
+        t0 = time.perf_counter()
+        ok = True
+        try:
+            if op == "get":
+                if args.evict and rng.random() < args.evict:
+                    dm._cache["profiles"].pop(uid, None)
+                await dm.get_user_profile(uid)
+            elif op == "save":
+                profile = await dm.get_user_profile(uid)
+                alters = profile.get("alters") or {}
+                if alters:
+                    name = rng.choice(list(alters))
+                    alters[name]["description"] = f"edited {time.time()}"
+                ok = await dm.save_user_profile(uid, profile)
+            elif op == "create":
+                ok = await dm.create_alter(uid, f"Soak {next(seq)}", {"pronouns": "they/them"})
+            elif op == "get_blacklist":
+                await dm.get_blacklist("channel", gid)
+            elif op == "save_blacklist":
+                data = dict(await dm.get_blacklist("channel", gid))
+                data[str(rng.randrange(10_000))] = True
+                ok = await dm.save_blacklist("channel", gid, data)
+        except Exception:
+            ok = False
+        rec.record(op, time.perf_counter() - t0, bool(ok))
+
+
+async def reporter(dm, rec: Recorder, pool: PoolStats | None, interval: float, deadline: float) -> None:
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(interval)
+        window = rec.drain_window()
+        total = sum(len(v) for v in window.values())
+        all_lat = [x for v in window.values() for x in v]
+        cache_mib = deep_sizeof(dm._cache) / 2**20
+        pool_text = f" pool out={pool.checked_out}/{pool.max_checked_out} max" if pool else ""
+        print(f"[{time.perf_counter() - started:6.1f}s] {total / interval:8.0f} ops/s  "
+              f"p99 {pct(all_lat, 0.99) * 1000:7.2f} ms  cache {cache_mib:7.1f} MiB{pool_text}", flush=True)
+
+# ───────────────────────── entrypoint ──────────────────────────── #
+
+async def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mongodb-uri", default=os.getenv("BENCH_MONGODB_URI"))
+    parser.add_argument("--database", default="pixel_bench")
+    parser.add_argument("--mix", default="get=70,save=15,create=5,get_blacklist=8,save_blacklist=2")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--alters", type=int, default=50, help="alters per seeded profile")
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="soak period in seconds")
+    parser.add_argument("--report-every", type=float, default=5.0)
+    parser.add_argument("--evict", type=float, default=0.0, help="fraction of reads forced to miss the cache")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="stand-in only: simulated RTT")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from data_manager import MongoDataManager
+    dm = MongoDataManager()
+    pool: PoolStats | None = None
+
+    if args.mongodb_uri:
+        pool = PoolStats()
+        monitoring.register(pool)  # must happen before the client is created
+        os.environ["MONGODB_URI"] = args.mongodb_uri
+        os.environ["MONGODB_DATABASE"] = args.database
+        await dm.initialize()
+        if dm.client is None:
+            print(f"❌ could not connect to {args.mongodb_uri}")
+            return 1
+        await dm.profiles_collection.delete_many({})
+        await dm.blacklists_collection.delete_many({})
+        dm._cache["profiles"].clear()
+        backend = f"mongod {args.mongodb_uri} / {args.database}"
+    else:
+        await install_memory_backend(dm, latency=args.db_latency_ms / 1000)
+        backend = f"in-memory stand-in (rtt {args.db_latency_ms:g} ms)"
+
+    print(f"Seeding {args.users} profiles × {args.alters} alters on {backend} …", flush=True)
+    for uid in range(1, args.users + 1):
+        await dm.save_user_profile(str(uid), build_profile(str(uid), args.alters, "patterns", "1"))
+    gc.collect()
+
+    names, weights = parse_mix(args.mix)
+    rec = Recorder(random.Random(args.seed))
+    seq = iter(range(10**12))
+    deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    await asyncio.gather(
+        reporter(dm, rec, pool, args.report_every, deadline),
+        *(worker(dm, rec, names, weights, args, deadline, seq) for _ in range(args.concurrency)),
+    )
+    elapsed = time.perf_counter() - started
+
+    print()
+    header = f"{'op':<15} {'count':>8} {'ops/s':>9} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print("─" * len(header))
+    for op in names:
+        s = rec.samples[op]
+        print(f"{op:<15} {rec.counts[op]:>8} {rec.counts[op] / elapsed:>9.0f} {rec.errors[op]:>5} "
+              f"{pct(s, .5) * 1000:>8.2f} {pct(s, .95) * 1000:>8.2f} {pct(s, .99) * 1000:>8.2f} "
+              f"{(max(s) if s else 0) * 1000:>8.2f}")
+    total = sum(rec.counts.values())
+    print(f"\nTotal {total} ops in {elapsed:.1f}s → {total / elapsed:.0f} ops/s with {args.concurrency} workers")
+    print(f"Cache: {deep_sizeof(dm._cache) / 2**20:.1f} MiB for {len(dm._cache['profiles'])} cached profiles")
+    if pool:
+        print(f"Pool: {pool.created} connections created, {pool.max_checked_out} max checked out, "
+              f"{pool.checkout_failures} checkout failures")
+
+    await dm.close_connection()
+    return 0
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.WARNING)
+    sys.exit(asyncio.run(main()))
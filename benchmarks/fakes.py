@@ -0,0 +1,385 @@
+"""
+benchmarks/fakes.py – lightweight stand‑ins for Discord and MongoDB
+===================================================================
+
+Just enough of ``discord.Message`` / channel / webhook and of a Motor collection
+for the bot's own code paths to run unmodified, with no network involved.
+
+* ``MemoryCollection`` BSON‑encodes on write and decodes on read, so the CPU cost of
+  a real round trip is still paid; ``latency`` adds a simulated network delay.
+* ``await install_memory_backend(data_manager)`` points a ``MongoDataManager`` at the
+  stand‑ins, exercising its "connected" paths (ping, find_one, replace_one, …).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+from typing import Any
+
+import bson
+
+_ids = itertools.count(1_000_000_000_000_000)
+
+# ───────────────────────── MongoDB stand‑in ────────────────────── #
+
+def _matches(meta: dict[str, Any], query: dict[str, Any]) -> bool:
+    return all(meta.get(k) == v for k, v in query.items())
+
+
+def _meta(doc: dict[str, Any]) -> dict[str, Any]:
+    """Top‑level scalar fields – everything the bot ever queries on."""
+    return {k: v for k, v in doc.items() if not isinstance(v, (dict, list))}
+
+
+def _set_path(doc: dict[str, Any], path: str, value: Any) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = value
+
+
+def _unset_path(doc: dict[str, Any], path: str) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(leaf, None)
+
+
+class _Result:
+    def __init__(self, matched: int = 0, modified: int = 0, upserted_id: Any = None, deleted: int = 0):
+        self.matched_count = matched
+        self.modified_count = modified
+        self.upserted_id = upserted_id
+        self.deleted_count = deleted
+        self.acknowledged = True
+
+
+class _Cursor:
+    def __init__(self, docs: list[dict[str, Any]]):
+        self._docs = docs
+
+    def sort(self, key, direction: int = 1):
+        if isinstance(key, list):  # [(field, direction)] – only the first key is honoured
+            key, direction = key[0]
+        self._docs.sort(key=lambda d: (d.get(key) is None, d.get(key)), reverse=direction < 0)
+        return self
+
+    def limit(self, n: int):
+        self._docs = self._docs[:n] if n else self._docs
+        return self
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for doc in self._docs:
+            yield doc
+
+    async def to_list(self, length: int | None = None):
+        return self._docs[:length] if length else list(self._docs)
+
+
+class MemoryCollection:
+    """In‑memory subset of ``AsyncIOMotorCollection`` used by data_manager.
+
+    Single‑field unique indexes (from ``create_index(..., unique=True)``) give O(1)
+    lookups like a real mongod; other queries scan the scalar fields only.
+    """
+
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self._docs: dict[int, tuple[dict[str, Any], bytes]] = {}
+        self._unique: dict[str, dict[Any, int]] = {}
+        self._next_id = 0
+
+    async def _delay(self) -> None:
+        await asyncio.sleep(self.latency)
+
+    def _locate(self, query: dict[str, Any]) -> list[int]:
+        if len(query) == 1:
+            (field, value), = query.items()
+            if field in self._unique:
+                hit = self._unique[field].get(value)
+                return [hit] if hit is not None else []
+        return [i for i, (meta, _) in self._docs.items() if _matches(meta, query)]
+
+    def _store(self, doc_id: int | None, doc: dict[str, Any]) -> int:
+        if doc_id is None:
+            doc_id = self._next_id = self._next_id + 1
+        else:
+            self._unindex(doc_id)
+        meta = _meta(doc)
+        self._docs[doc_id] = (meta, bson.encode(doc))
+        for field, index in self._unique.items():
+            if field in meta:
+                index[meta[field]] = doc_id
+        return doc_id
+
+    def _unindex(self, doc_id: int) -> None:
+        meta, _ = self._docs[doc_id]
+        for field, index in self._unique.items():
+            if field in meta:
+                index.pop(meta[field], None)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    async def create_index(self, keys, unique: bool = False, **kwargs) -> str:
+        if unique and isinstance(keys, str):
+            self._unique.setdefault(keys, {})
+        return str(keys)
+
+    async def find_one(self, query: dict[str, Any], projection: dict[str, Any] | None = None, sort=None):
+        await self._delay()
+        if sort:
+            for doc in self.find(query).sort(sort).limit(1)._docs:
+                return doc
+            return None
+        for doc_id in self._locate(query)[:1]:
+            return bson.decode(self._docs[doc_id][1])
+        return None
+
+    async def insert_one(self, doc: dict[str, Any]):
+        await self._delay()
+        return _Result(upserted_id=self._store(None, doc))
+
+    def find(self, query: dict[str, Any] | None = None, projection: dict[str, Any] | None = None):
+        return _Cursor([bson.decode(self._docs[i][1]) for i in self._locate(query or {})])
+
+    async def replace_one(self, query: dict[str, Any], doc: dict[str, Any], upsert: bool = False):
+        await self._delay()
+        hits = self._locate(query)
+        if hits:
+            self._store(hits[0], doc)
+            return _Result(1, 1)
+        if upsert:
+            return _Result(upserted_id=self._store(None, {**query, **doc}))
+        return _Result()
+
+    async def update_one(self, query: dict[str, Any], update: dict[str, Any], upsert: bool = False):
+        await self._delay()
+        hits = self._locate(query)
+        if hits:
+            doc_id, existing = hits[0], bson.decode(self._docs[hits[0]][1])
+        elif upsert:
+            doc_id, existing = None, dict(query)
+            for path, value in update.get("$setOnInsert", {}).items():
+                _set_path(existing, path, value)
+        else:
+            return _Result()
+        for path, value in update.get("$set", {}).items():
+            _set_path(existing, path, value)
+        for path in update.get("$unset", {}):
+            _unset_path(existing, path)
+        for path, value in update.get("$push", {}).items():
+            *parents, leaf = path.split(".")
+            target = existing
+            for part in parents:
+                target = target.setdefault(part, {})
+            items = target.setdefault(leaf, [])
+            if isinstance(value, dict) and "$each" in value:
+                items.extend(value["$each"])
+                if "$slice" in value:
+                    target[leaf] = items[value["$slice"]:] if value["$slice"] < 0 else items[:value["$slice"]]
+            else:
+                items.append(value)
+        for path, value in update.get("$inc", {}).items():
+            *parents, leaf = path.split(".")
+            target = existing
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[leaf] = target.get(leaf, 0) + value
+        new_id = self._store(doc_id, existing)
+        return _Result(1, 1) if doc_id is not None else _Result(upserted_id=new_id)
+
+    async def delete_one(self, query: dict[str, Any]):
+        await self._delay()
+        for doc_id in self._locate(query)[:1]:
+            self._unindex(doc_id)
+            del self._docs[doc_id]
+            return _Result(deleted=1)
+        return _Result()
+
+
+class _MemoryAdmin:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def command(self, name: str, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return {"ok": 1.0}
+
+
+class MemoryClient:
+    def __init__(self, latency: float = 0.0):
+        self.admin = _MemoryAdmin(latency)
+        self.latency = latency
+        self._dbs: dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> "MemoryDatabase":
+        return self._dbs.setdefault(name, MemoryDatabase(self.latency))
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryDatabase:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self._collections: dict[str, MemoryCollection] = {}
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._collections.setdefault(name, MemoryCollection(name, self.latency))
+
+    __getitem__ = __getattr__
+
+
+async def install_memory_backend(manager, latency: float = 0.0) -> MemoryClient:
+    """Connect a MongoDataManager to the in‑memory stand‑in instead of a mongod."""
+    client = MemoryClient(latency)
+    manager.mongodb_uri = "memory://"
+    manager.database_name = "pixel_bench"
+    manager.client = client
+    manager.db = client[manager.database_name]
+    manager.profiles_collection = manager.db.user_profiles
+    manager.blacklists_collection = manager.db.blacklists
+    manager.system_settings_collection = manager.db.system_settings
+    manager.switches_collection = manager.db.front_switches
+    manager.proxy_messages_collection = manager.db.proxy_messages
+    await manager._create_indexes()
+    manager._cache_warm = True
+    return client
+
+# ───────────────────────── Discord stand‑ins ───────────────────── #
+
+class FakeUser:
+    def __init__(self, user_id: int, bot: bool = False):
+        self.id = user_id
+        self.bot = bot
+        self.name = self.display_name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+
+
+class FakeCategory:
+    def __init__(self, category_id: int):
+        self.id = category_id
+
+
+class FakeWebhookMessage:
+    def __init__(self, channel: "FakeChannel", content: str | None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+
+
+class FakeWebhook:
+    def __init__(self, channel: "FakeChannel", name: str):
+        self.id = next(_ids)
+        self.token = "token"
+        self.name = name
+        self.channel = channel
+        self.channel_id = channel.id
+        self.sent = 0
+
+    async def send(self, content: str | None = None, wait: bool = False, **kwargs):
+        self.sent += 1
+        return FakeWebhookMessage(self.channel, content) if wait else None
+
+    async def edit_message(self, message_id: int, **kwargs):
+        return FakeWebhookMessage(self.channel, kwargs.get("content"))
+
+    async def delete_message(self, message_id: int, **kwargs):
+        return None
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild: FakeGuild | None, category: FakeCategory | None = None):
+        self.id = channel_id
+        self.guild = guild
+        self.category = category
+        self.name = f"channel{channel_id}"
+        self._webhooks: list[FakeWebhook] = []
+        self.sent: list[str] = []
+
+    async def webhooks(self) -> list[FakeWebhook]:
+        return list(self._webhooks)
+
+    async def create_webhook(self, name: str, **kwargs) -> FakeWebhook:
+        wh = FakeWebhook(self, name)
+        self._webhooks.append(wh)
+        return wh
+
+    async def send(self, content: str | None = None, **kwargs):
+        self.sent.append(content or "")
+        return FakeWebhookMessage(self, content)
+
+
+class FakeMessage:
+    def __init__(self, content: str, author: FakeUser, channel: FakeChannel, attachments: list | None = None):
+        self.id = next(_ids)
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.attachments = attachments or []
+        self.mentions: list = []
+        self.reference = None
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id if channel.guild else '@me'}/{channel.id}/{self.id}"
+
+    async def delete(self) -> None:
+        return None
+
+
+class FakeBot:
+    """Collects ``@bot.event`` / ``@bot.listen`` handlers and counts command dispatches."""
+
+    def __init__(self, command_prefix: Any = "!"):
+        self.command_prefix = command_prefix  # a string or a (bot, message) callable, as in discord.py
+        self.events: dict[str, Any] = {}
+        self.listeners: dict[str, list[Any]] = {}
+        self.commands_processed = 0
+        self.user = FakeUser(1, bot=True)
+        self.all_commands: dict[str, Any] = {}
+        self.guilds: list[FakeGuild] = []
+
+    def event(self, coro):
+        self.events[coro.__name__] = coro
+        return coro
+
+    def listen(self, name: str | None = None):
+        def decorator(coro):
+            self.listeners.setdefault(name or coro.__name__, []).append(coro)
+            return coro
+        return decorator
+
+    def command(self, *args, **kwargs):
+        def decorator(coro):
+            self.all_commands[kwargs.get("name") or coro.__name__] = coro
+            return coro
+        return decorator
+
+    def get_channel(self, channel_id: int):
+        return None
+
+    async def get_prefix(self, message):
+        prefix = self.command_prefix
+        if callable(prefix):
+            prefix = prefix(self, message)
+            if asyncio.iscoroutine(prefix):
+                prefix = await prefix
+        return prefix
+
+    async def process_commands(self, message) -> None:
+        self.commands_processed += 1
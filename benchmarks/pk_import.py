@@ -0,0 +1,137 @@
+"""
+benchmarks/pk_import.py – PluralKit import benchmark on synthetic exports
+=========================================================================
+
+Builds a PluralKit‑shaped export of the requested size and times
+``import_parsers.parse_pluralkit`` on it, next to the previous nested‑scan
+group resolution (groups × group size × members) for comparison. Both must
+produce identical folders.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.pk_import
+    python -m benchmarks.pk_import --members 500,2000,5000 --groups 50 --group-size 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any
+
+from import_parsers import parse_pluralkit
+
+# ───────────────────────── synthetic data ──────────────────────── #
+
+def _pk_id(i: int) -> str:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    for _ in range(5):
+        i, r = divmod(i, 26)
+        out += letters[r]
+    return out
+
+
+def synthetic_export(n_members: int, n_groups: int, group_size: int, n_switches: int, rng: random.Random) -> dict[str, Any]:
+    members = [{
+        "id": _pk_id(i),
+        "uuid": f"00000000-0000-4000-8000-{i:012d}",
+        "name": f"Member {i}",
+        "display_name": f"Member {i} 🌙",
+        "pronouns": "they/them",
+        "description": "Synthetic PluralKit member " * 6,
+        "color": "8a2be2",
+        "avatar_url": f"https://cdn.example/pk/{i}.png",
+        "proxy_tags": [{"prefix": f"m{i}:", "suffix": None}],
+        "visibility": "public",
+        "created": "2021-01-01T00:00:00Z",
+    } for i in range(n_members)]
+    uuids = [m["uuid"] for m in members]
+    groups = [{
+        "id": _pk_id(10**6 + g),
+        "name": f"Group {g}",
+        "description": "Synthetic group",
+        "color": "ff00ff",
+        "members": rng.sample(uuids, min(group_size, n_members)),
+    } for g in range(n_groups)]
+    switches = [{"timestamp": "2022-01-01T00:00:00Z", "members": [_pk_id(rng.randrange(max(1, n_members)))]}
+                for _ in range(n_switches)]
+    return {
+        "version": 2,
+        "id": "abcde",
+        "name": "Benchmark System",
+        "description": "Synthetic export",
+        "members": members,
+        "groups": groups,
+        "switches": switches,
+    }
+
+# ───────────────────────── previous algorithm ──────────────────── #
+
+def legacy_folders(pk: dict[str, Any]) -> dict[str, list[str]]:
+    """Group resolution as it used to be done: a scan of every member per group entry."""
+    folders: dict[str, list[str]] = {}
+    for group in pk.get("groups", []):
+        alters: list[str] = []
+        for uuid in group.get("members", []):
+            for m in pk.get("members", []):
+                m_uid = m.get("uuid") or m.get("id")
+                if m_uid == uuid:
+                    n = m.get("name")
+                    if n and n not in alters:
+                        alters.append(n)
+        folders[group["name"]] = alters
+    return folders
+
+# ───────────────────────── entrypoint ──────────────────────────── #
+
+def _best_of(repeat: int, fn) -> tuple[float, Any]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--members", default="100,500,2000", help="comma separated system sizes")
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--group-size", type=int, default=100)
+    parser.add_argument("--switches", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="don't time the old nested scan")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    header = f"{'members':>7} {'groups':>6} {'KiB':>8} {'parse ms':>9} {'legacy groups ms':>17} {'speedup':>8}"
+    print(header)
+    print("─" * len(header))
+    status = 0
+    for n_members in (int(x) for x in args.members.split(",")):
+        pk = synthetic_export(n_members, args.groups, args.group_size, args.switches, rng)
+        raw = json.dumps(pk).encode()
+
+        parse_s, parsed = _best_of(args.repeat, lambda: parse_pluralkit(raw, set(), set()))
+        legacy_text, speedup = "-", "-"
+        if not args.skip_legacy:
+            legacy_s, legacy = _best_of(args.repeat, lambda: legacy_folders(pk))
+            legacy_text = f"{legacy_s * 1000:.1f}"
+            speedup = f"{legacy_s / parse_s:.0f}×"
+            current = {name: f["alters"] for name, f in parsed["folders"].items()}
+            if current != legacy:
+                print(f"❌ folder membership differs from the legacy resolution at {n_members} members")
+                status = 1
+
+        print(f"{n_members:>7} {args.groups:>6} {len(raw) / 1024:>8.0f} {parse_s * 1000:>9.1f} "
+              f"{legacy_text:>17} {speedup:>8}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
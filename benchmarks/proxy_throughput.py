@@ -0,0 +1,282 @@
+"""
+benchmarks/proxy_throughput.py – offline proxy pipeline benchmark
+=================================================================
+
+Replays synthetic (or recorded) message traces through the real ``on_message``
+handler from ``proxy_handler`` using fake Discord objects and the in‑memory
+MongoDB stand‑in, then reports throughput, latency percentiles and allocations.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.proxy_throughput
+    python -m benchmarks.proxy_throughput --alters 1,100,5000 --messages 5000
+    python -m benchmarks.proxy_throughput --trace messages.jsonl
+    python -m benchmarks.proxy_throughput --save baseline.json
+    python -m benchmarks.proxy_throughput --compare baseline.json   # exit 1 on regression
+    python -m benchmarks.proxy_throughput --rate-limits   # replay with the real token buckets
+
+Scenarios per system size
+-------------------------
+* ``patterns`` – alters use a mix of ``[n:...]``, ``n> text`` and bare ``n|`` proxies;
+  60 % of messages hit a proxy, 30 % are plain chat, 10 % are commands (routed
+  straight to command dispatch, never through proxy matching).
+* ``front``    – server autoproxy in front mode, plain chat is proxied.
+* ``latch``    – global latch mode, explicit proxies re‑latch the target.
+
+A recorded trace is JSON lines with ``user``, ``guild``, ``channel`` and ``content``;
+each distinct user gets a synthetic system of the requested size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from benchmarks.fakes import FakeBot, FakeCategory, FakeChannel, FakeGuild, FakeMessage, FakeUser, install_memory_backend
+
+# ───────────────────────── synthetic data ──────────────────────── #
+
+def proxy_for(i: int) -> str:
+    style = i % 3
+    if style == 0:
+        return f"[{i}:...]"
+    if style == 1:
+        return f"{i}> text"
+    return f"{i}|"
+
+
+def proxied_text(i: int, body: str) -> str:
+    style = i % 3
+    if style == 0:
+        return f"[{i}:{body}]"
+    if style == 1:
+        return f"{i}> {body}"
+    return f"{i}|{body}"
+
+
+def build_profile(user_id: str, n_alters: int, scenario: str, guild_id: str) -> dict[str, Any]:
+    alters = {}
+    for i in range(n_alters):
+        alters[f"Alter {i}"] = {
+            "displayname": f"Alter {i}",
+            "pronouns": "they/them",
+            "description": "Synthetic benchmark alter " * 4,
+            "avatar": f"https://cdn.example/avatars/{i}.png",
+            "proxy_avatar": None,
+            "banner": None,
+            "proxy": proxy_for(i),
+            "aliases": [],
+            "color": 0x8A2BE2,
+            "use_embed": True,
+            "created_at": None,
+            "role": None,
+            "age": None,
+            "birthday": None,
+            "front_time": 0,
+            "last_front": None,
+            "privacy": {"show_in_list": True, "allow_proxy": True},
+        }
+    profile: dict[str, Any] = {
+        "user_id": user_id,
+        "system": {"name": f"System {user_id}", "tag": "| bench"},
+        "alters": alters,
+        "folders": {},
+    }
+    if scenario == "front":
+        profile["autoproxy"] = {guild_id: {"mode": "front", "alter": "Alter 0", "last_proxied": None}}
+    elif scenario == "latch":
+        profile["autoproxy"] = {"global": {"mode": "latch", "alter": None, "last_proxied": "Alter 0"}}
+    return profile
+
+
+def synthetic_trace(n_messages: int, n_users: int, n_alters: int, rng: random.Random) -> list[dict[str, Any]]:
+    trace = []
+    for _ in range(n_messages):
+        roll = rng.random()
+        if roll < 0.6:
+            content = proxied_text(rng.randrange(n_alters), "hello there, this is a proxied message")
+        elif roll < 0.9:
+            content = "just some ordinary chat that matches nothing"
+        else:
+            content = "!pixelhelp"
+        trace.append({
+            "user": str(rng.randrange(n_users) + 1),
+            "guild": "1",
+            "channel": str(rng.randrange(4) + 10),
+            "content": content,
+        })
+    return trace
+
+
+def load_trace(path: str) -> list[dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# ───────────────────────── runner ──────────────────────────────── #
+
+async def _fresh_handler(profiles: dict[str, dict[str, Any]]):
+    """Reset the shared data_manager onto a fresh in‑memory backend and re‑register on_message."""
+    from data_manager import data_manager
+    from guild_settings import command_prefix
+    from proxy_handler import setup_proxy_handler
+
+    data_manager._cache["profiles"].clear()
+    data_manager._cache["blacklists"].clear()
+    await install_memory_backend(data_manager)
+    for uid, profile in profiles.items():
+        await data_manager.save_user_profile(uid, profile)
+
+    bot = FakeBot(command_prefix)
+
+    @bot.command(name="pixelhelp")
+    async def pixelhelp(ctx):  # commands are only counted, never run
+        pass
+
+    setup_proxy_handler(bot)
+    return bot, bot.events["on_message"]
+
+
+def _materialise(trace: list[dict[str, Any]]) -> list[FakeMessage]:
+    guilds: dict[str, FakeGuild] = {}
+    channels: dict[str, FakeChannel] = {}
+    users: dict[str, FakeUser] = {}
+    category = FakeCategory(99)
+    messages = []
+    for rec in trace:
+        guild = guilds.setdefault(rec["guild"], FakeGuild(int(rec["guild"])))
+        channel = channels.setdefault(rec["channel"], FakeChannel(int(rec["channel"]), guild, category))
+        user = users.setdefault(rec["user"], FakeUser(int(rec["user"])))
+        messages.append(FakeMessage(rec["content"], user, channel))
+    return messages
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run_scenario(scenario: str, n_alters: int, trace: list[dict[str, Any]], alloc_sample: int) -> dict[str, Any]:
+    users = {rec["user"] for rec in trace}
+    gid = trace[0]["guild"] if trace else "1"
+    profiles = {uid: build_profile(uid, n_alters, scenario, gid) for uid in users}
+    bot, on_message = await _fresh_handler(profiles)
+    messages = _materialise(trace)
+
+    # warm up webhook creation and caches
+    for msg in messages[:20]:
+        await on_message(msg)
+
+    latencies = []
+    started = time.perf_counter()
+    for msg in messages:
+        t0 = time.perf_counter()
+        await on_message(msg)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    # allocation pass on a sample – tracemalloc distorts timings, so keep it separate
+    tracemalloc.start()
+    peaks = []
+    for msg in messages[:alloc_sample]:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        await on_message(msg)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - base)
+    tracemalloc.stop()
+
+    return {
+        "scenario": scenario,
+        "alters": n_alters,
+        "messages": len(messages),
+        "msgs_per_sec": len(messages) / elapsed if elapsed else 0.0,
+        "p50_ms": _pct(latencies, 0.50) * 1000,
+        "p99_ms": _pct(latencies, 0.99) * 1000,
+        "alloc_peak_kib": (statistics.mean(peaks) / 1024) if peaks else 0.0,
+        "commands": bot.commands_processed,
+    }
+
+# ───────────────────────── reporting ───────────────────────────── #
+
+def print_table(results: list[dict[str, Any]]) -> None:
+    header = f"{'scenario':<10} {'alters':>6} {'msgs':>6} {'msg/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'KiB/msg':>8}"
+    print(header)
+    print("─" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<10} {r['alters']:>6} {r['messages']:>6} {r['msgs_per_sec']:>10.0f} "
+              f"{r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['alloc_peak_kib']:>8.1f}")
+
+
+def compare(results: list[dict[str, Any]], baseline_path: str, tolerance: float) -> int:
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["alters"]): r for r in json.load(f)}
+    regressions = []
+    for r in results:
+        base = baseline.get((r["scenario"], r["alters"]))
+        if not base:
+            continue
+        if r["msgs_per_sec"] < base["msgs_per_sec"] * (1 - tolerance):
+            regressions.append(f"{r['scenario']}/{r['alters']}: {base['msgs_per_sec']:.0f} → {r['msgs_per_sec']:.0f} msg/s")
+        if r["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{r['scenario']}/{r['alters']}: p99 {base['p99_ms']:.3f} → {r['p99_ms']:.3f} ms")
+    for line in regressions:
+        print(f"❌ regression {line}")
+    if not regressions:
+        print(f"✅ no regressions beyond {tolerance:.0%} against {baseline_path}")
+    return 1 if regressions else 0
+
+# ───────────────────────── entrypoint ──────────────────────────── #
+
+async def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--alters", default="1,10,100,1000,5000", help="comma separated system sizes")
+    parser.add_argument("--scenarios", default="patterns,front,latch")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--trace", help="JSON lines trace to replay instead of synthetic traffic")
+    parser.add_argument("--alloc-sample", type=int, default=200, help="messages measured under tracemalloc")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true", help="keep the handler's debug output")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="keep the configured proxy rate limits (by default they are lifted)")
+    args = parser.parse_args(argv)
+
+    if not args.rate_limits:
+        import rate_limit
+        for limiter in (rate_limit.PROXY_USER, rate_limit.PROXY_GUILD, rate_limit.WEBHOOK_GLOBAL):
+            limiter.rate = limiter.burst = float("inf")
+
+    rng = random.Random(args.seed)
+    results = []
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    with quiet:
+        for n_alters in (int(x) for x in args.alters.split(",")):
+            trace = load_trace(args.trace) if args.trace else synthetic_trace(args.messages, args.users, n_alters, rng)
+            for scenario in args.scenarios.split(","):
+                results.append(await run_scenario(scenario, n_alters, trace, args.alloc_sample))
+
+    print_table(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        return compare(results, args.compare, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.WARNING)  # keep the report readable
+    sys.exit(asyncio.run(main()))
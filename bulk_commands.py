@@ -0,0 +1,322 @@
+"""
+bulk_commands.py – create or edit many alters from one table
+============================================================
+
+Key points
+----------
+* **One table, one write** – ``!bulk_create`` / ``!bulk_edit`` take a CSV attachment
+  (or a table pasted after the command: CSV, tab‑separated or a Markdown ``| a | b |``
+  table) with a ``name`` column plus one column per field. Every row is validated
+  first; only if all rows are valid are the changes applied, as a single targeted
+  ``data_manager.update_user_profile`` call (one MongoDB update, one cache version bump).
+* **Per‑row report** – the reply lists what each row did (or why it was rejected);
+  long reports are attached as a text file. Add ``dry`` to preview without saving.
+* **Cells** – an empty cell leaves the field unchanged (or at its default when
+  creating); ``none`` clears optional fields. ``!bulk_edit`` matches names in any
+  case or by alias; display names and prefixes only produce a suggestion, since an
+  edit overwrites fields.
+
+Example::
+
+    !bulk_edit
+    name,proxy,color
+    Ash,ash:text,#ff8800
+    Bee,bee:text,
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+from typing import Any, Callable
+
+import discord
+from discord.ext import commands
+
+from data_manager import data_manager
+from export_format import expand_alter, now_iso
+from http_client import ResponseTooLarge, http_client
+from rate_limit import throttled
+from search_index import resolve
+
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "1000"))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(512 * 1024)))
+_REPORT_CHARS = 1800
+
+_HEX_COLOR = re.compile(r"#?([0-9a-fA-F]{6})")
+_CLEAR = {"none", "null", "-"}
+_TRUE = {"yes", "y", "true", "1", "on"}
+_FALSE = {"no", "n", "false", "0", "off"}
+
+
+class BulkError(ValueError):
+    """A cell, row or table that can't be applied; the message is shown to the user."""
+
+# ───────────────────────── cell validators ─────────────────────── #
+
+def _text(value: str) -> str:
+    return value
+
+
+def _optional_text(value: str) -> str | None:
+    return None if value.casefold() in _CLEAR else value
+
+
+def _url(value: str) -> str | None:
+    if value.casefold() in _CLEAR:
+        return None
+    if not value.startswith(("http://", "https://")):
+        raise BulkError("must be an http(s) link")
+    return value
+
+
+def _color(value: str) -> int:
+    match = _HEX_COLOR.fullmatch(value)
+    if not match:
+        raise BulkError("must be a hex code like #8A2BE2")
+    return int(match.group(1), 16)
+
+
+def _flag(value: str) -> bool:
+    folded = value.casefold()
+    if folded in _TRUE:
+        return True
+    if folded in _FALSE:
+        return False
+    raise BulkError("must be yes or no")
+
+
+def _aliases(value: str) -> list[str]:
+    return [] if value.casefold() in _CLEAR else [a.strip() for a in value.split(";") if a.strip()]
+
+# column → (stored path under the alter, validator)
+_COLUMNS: dict[str, tuple[tuple[str, ...], Callable[[str], Any]]] = {
+    "displayname":  (("displayname",), _text),
+    "pronouns":     (("pronouns",), _text),
+    "description":  (("description",), _text),
+    "proxy":        (("proxy",), _optional_text),
+    "color":        (("color",), _color),
+    "avatar":       (("avatar",), _url),
+    "proxy_avatar": (("proxy_avatar",), _url),
+    "banner":       (("banner",), _url),
+    "role":         (("role",), _optional_text),
+    "age":          (("age",), _optional_text),
+    "birthday":     (("birthday",), _optional_text),
+    "aliases":      (("aliases",), _aliases),
+    "use_embed":    (("use_embed",), _flag),
+    "show_in_list": (("privacy", "show_in_list"), _flag),
+    "allow_proxy":  (("privacy", "allow_proxy"), _flag),
+}
+_COLUMN_ALIASES = {"display_name": "displayname", "proxyavatar": "proxy_avatar", "colour": "color",
+                   "embed": "use_embed", "alias": "aliases"}
+
+# ───────────────────────── table parsing ───────────────────────── #
+
+def parse_table(text: str) -> tuple[list[str], list[tuple[int, dict[str, str]]]]:
+    """Parse CSV / TSV / Markdown table text into (columns, [(line number, row), …])."""
+    text = text.strip().strip("`")
+    if text.startswith("csv\n"):  # ```csv fenced block
+        text = text[4:]
+    lines = [line for line in text.splitlines() if line.strip()]
+    if lines and lines[0].lstrip().startswith("|"):
+        lines = [line.strip().strip("|") for line in lines
+                 if not re.fullmatch(r"\|?[\s:\-|]+\|?", line.strip())]
+        delimiter = "|"
+    else:
+        try:
+            delimiter = csv.Sniffer().sniff(lines[0] if lines else "", delimiters=",\t;|").delimiter
+        except csv.Error:
+            delimiter = ","
+    reader = csv.reader(lines, delimiter=delimiter, skipinitialspace=True)
+
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise BulkError("the table is empty") from None
+    columns = [_COLUMN_ALIASES.get(c.strip().casefold(), c.strip().casefold()) for c in header]
+    if "name" not in columns:
+        raise BulkError("the first row must be a header with a `name` column")
+    unknown = [c for c in columns if c != "name" and c not in _COLUMNS]
+    if unknown:
+        raise BulkError(f"unknown column(s): {', '.join(unknown)} – "
+                        f"use name, {', '.join(_COLUMNS)}")
+    if len(set(columns)) != len(columns):
+        raise BulkError("a column appears more than once")
+
+    rows = []
+    for line_no, cells in enumerate(reader, start=2):
+        if len(cells) > len(columns):
+            raise BulkError(f"line {line_no} has more cells than the header")
+        rows.append((line_no, {c: v.strip() for c, v in zip(columns, cells)}))
+        if len(rows) > BULK_MAX_ROWS:
+            raise BulkError(f"at most {BULK_MAX_ROWS} rows can be applied at once")
+    if not rows:
+        raise BulkError("the table has a header but no rows")
+    return columns, rows
+
+# ───────────────────────── planning ────────────────────────────── #
+
+class BulkPlan:
+    def __init__(self):
+        self.sets: dict[tuple, Any] = {}
+        self.unsets: list[tuple] = []
+        self.results: list[str] = []
+        self.errors: list[str] = []
+        self.applied = 0
+
+
+def _row_values(line_no: int, row: dict[str, str], plan: BulkPlan) -> dict[tuple[str, ...], Any] | None:
+    values: dict[tuple[str, ...], Any] = {}
+    for column, cell in row.items():
+        if column == "name" or cell == "":
+            continue
+        path, validate = _COLUMNS[column]
+        try:
+            values[path] = validate(cell)
+        except BulkError as e:
+            plan.errors.append(f"❌ Line {line_no} `{row['name']}` – **{column}** {e}")
+            return None
+    return values
+
+
+def plan_bulk(user_id: str, profile: dict[str, Any], rows: list[tuple[int, dict[str, str]]], *, create: bool) -> BulkPlan:
+    plan = BulkPlan()
+    alters = profile.get("alters") or {}
+    tombstones = profile.get("deleted_alters") or {}
+    stamp = now_iso()
+    seen: dict[str, int] = {}
+
+    for line_no, row in rows:
+        query = row.get("name", "")
+        if not query:
+            plan.errors.append(f"❌ Line {line_no} – missing name")
+            continue
+        if create:
+            name = query
+            if name in alters:
+                plan.errors.append(f"❌ Line {line_no} `{name}` – an alter with this name already exists")
+                continue
+        else:
+            name, suggestions = resolve(user_id, profile, query, strict=True)
+            if name is None:
+                hint = f" (did you mean {', '.join(suggestions[:3])}?)" if suggestions else ""
+                plan.errors.append(f"❌ Line {line_no} `{query}` – no such alter{hint}")
+                continue
+        if name in seen:
+            plan.errors.append(f"❌ Line {line_no} `{name}` – already on line {seen[name]}")
+            continue
+        seen[name] = line_no
+
+        values = _row_values(line_no, row, plan)
+        if values is None:
+            continue
+
+        if create:
+            alter = expand_alter(name, {"created_at": stamp, "updated_at": stamp})
+            for path, value in values.items():
+                target = alter
+                for key in path[:-1]:
+                    target = target.setdefault(key, {})
+                target[path[-1]] = value
+            plan.sets[("alters", name)] = alter
+            if name in tombstones:
+                plan.unsets.append(("deleted_alters", name))
+            plan.results.append(f"✅ Line {line_no} **{name}** – created")
+            plan.applied += 1
+            continue
+
+        current = alters[name]
+        changed = []
+        for path, value in values.items():
+            old = current
+            for key in path:
+                old = old.get(key) if isinstance(old, dict) else None
+            if old != value:
+                plan.sets[("alters", name, *path)] = value
+                changed.append(path[-1])
+        if changed:
+            plan.sets[("alters", name, "updated_at")] = stamp
+            plan.results.append(f"✏️ Line {line_no} **{name}** – {', '.join(changed)}")
+            plan.applied += 1
+        else:
+            plan.results.append(f"➖ Line {line_no} **{name}** – no changes")
+    return plan
+
+# ───────────────────────── commands ────────────────────────────── #
+
+async def _read_table(ctx: commands.Context, table: str) -> str:
+    if ctx.message.attachments:
+        attachment = ctx.message.attachments[0]
+        if attachment.size and attachment.size > BULK_MAX_BYTES:
+            raise BulkError(f"the file is larger than {BULK_MAX_BYTES // 1024} KiB")
+        try:
+            raw = await http_client.fetch_bytes(attachment.url, op="bulk", max_bytes=BULK_MAX_BYTES)
+        except ResponseTooLarge:
+            raise BulkError(f"the file is larger than {BULK_MAX_BYTES // 1024} KiB") from None
+        try:
+            return bytes(raw).decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise BulkError("the file must be UTF-8 text (CSV)") from None
+    if not table.strip():
+        raise BulkError("attach a CSV file or paste a table after the command")
+    return table
+
+
+async def _send_report(ctx: commands.Context, headline: str, lines: list[str]) -> None:
+    body = "\n".join(lines)
+    if len(headline) + len(body) < _REPORT_CHARS:
+        await ctx.send(f"{headline}\n{body}" if body else headline)
+        return
+    shown, size = [], len(headline)
+    for line in lines:
+        if size + len(line) > _REPORT_CHARS:
+            break
+        shown.append(line)
+        size += len(line) + 1
+    report = discord.File(io.BytesIO(body.encode("utf-8")), filename="bulk-report.txt")
+    await ctx.send(f"{headline}\n" + "\n".join(shown) + f"\n… full report for all {len(lines)} rows attached.", file=report)
+
+
+def setup_bulk_commands(bot):
+    async def run_bulk(ctx: commands.Context, table: str, *, create: bool) -> None:
+        user_id = str(ctx.author.id)
+        words = table.split(maxsplit=1)
+        dry_run = bool(words) and words[0].casefold() == "dry"
+        if dry_run:
+            table = words[1] if len(words) > 1 else ""
+
+        try:
+            columns, rows = parse_table(await _read_table(ctx, table))
+        except BulkError as e:
+            await ctx.send(f"❌ {str(e)[:1].upper()}{str(e)[1:]}.")
+            return
+
+        profile = await data_manager.get_user_profile(user_id)
+        plan = plan_bulk(user_id, profile, rows, create=create)
+        verb = "create" if create else "update"
+
+        if plan.errors:
+            await _send_report(ctx, f"❌ **Nothing was changed** – {len(plan.errors)} of {len(rows)} row(s) "
+                                    f"need fixing first:", plan.errors)
+            return
+        if dry_run:
+            await _send_report(ctx, f"🔎 **Dry run – nothing was changed.** This would {verb} "
+                                    f"{plan.applied} of {len(rows)} alter(s):", plan.results)
+            return
+        if plan.applied and not await data_manager.update_user_profile(user_id, plan.sets, plan.unsets):
+            await ctx.send("❌ Failed to save the changes. Please try again.")
+            return
+        done = "Created" if create else "Updated"
+        await _send_report(ctx, f"✅ **{done} {plan.applied} of {len(rows)} alter(s).**", plan.results)
+
+    @bot.command(name="bulk_create")
+    @throttled()
+    async def bulk_create(ctx, *, table: str = ""):
+        await run_bulk(ctx, table, create=True)
+
+    @bot.command(name="bulk_edit")
+    @throttled()
+    async def bulk_edit(ctx, *, table: str = ""):
+        await run_bulk(ctx, table, create=False)
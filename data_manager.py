@@ -1,14 +1,44 @@
 import os
+import time
 import asyncio
+import datetime
+import itertools
+from collections import OrderedDict, deque
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from typing import Dict, Any, Optional
 import logging
 
+import metrics
+import sharding
+from export_format import now_iso
+from tracing import traced
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Front switches: day buckets in MongoDB, plus the latest few per user in memory
+SWITCHES_PER_BUCKET = int(os.getenv("SWITCHES_PER_BUCKET", "500"))
+RECENT_SWITCHES = 50
+
+# Guild settings documents kept in memory per shard (least recently used are dropped)
+GUILD_SETTINGS_CACHE = int(os.getenv("GUILD_SETTINGS_CACHE", "5000"))
+# Channel / category blacklists kept in memory per shard, keyed by (type, guild id)
+BLACKLIST_CACHE = int(os.getenv("BLACKLIST_CACHE", "10000"))
+
+# Proxied messages: who sent what, kept in MongoDB until the TTL index expires them
+PROXY_LOG_TTL_DAYS = int(os.getenv("PROXY_LOG_TTL_DAYS", "30"))
+RECENT_PROXY_MESSAGES = int(os.getenv("RECENT_PROXY_MESSAGES", "2000"))
+
+# Circuit breaker: after this many consecutive failures, skip MongoDB for a cooldown
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_SECONDS = 30.0
+
+def _safe_path(path: tuple) -> bool:
+    """True if every key can appear in a MongoDB dotted field path."""
+    return all(isinstance(k, str) and k and "." not in k and not k.startswith("$") for k in path)
+
 class MongoDataManager:
     def __init__(self):
         self.client = None
@@ -16,23 +46,78 @@ class MongoDataManager:
         self.profiles_collection = None
         self.blacklists_collection = None
         self.system_settings_collection = None
+        self.switches_collection = None
+        self.proxy_messages_collection = None
         self.mongodb_uri = None
         self.database_name = None
         self._connection_lock = asyncio.Lock()
+        self._cache_warm = False
+        self._consecutive_failures = 0
+        self._circuit_open_until = 0.0
         self._cache = {
             'profiles': {},
-            'blacklists': {'category': {}, 'channel': {}},
-            'system_settings': {}
+            'blacklists': sharding.ShardedLRU("blacklists", BLACKLIST_CACHE),
+            'system_settings': sharding.ShardedLRU("guild_settings", GUILD_SETTINGS_CACHE),
+            'switches': {},
+            # message_id -> record ring buffer, and (user_id, channel_id) -> newest message_id
+            'proxy_messages': OrderedDict(),
+            'last_proxy': {}
         }
+        # Per-user profile version, bumped on every save/reload so derived data
+        # (search indexes, rendered views) knows when to rebuild
+        self._versions: Dict[str, int] = {}
+        self._version_counter = itertools.count(1)
     
+    # Circuit breaker
+    @property
+    def circuit_state(self) -> str:
+        """'disabled' (no MONGODB_URI), 'closed', 'open' or 'half_open'"""
+        if not self.mongodb_uri:
+            return "disabled"
+        if self._consecutive_failures < CIRCUIT_FAILURE_THRESHOLD:
+            return "closed"
+        if time.monotonic() < self._circuit_open_until:
+            return "open"
+        return "half_open"
+
+    @property
+    def cache_warm(self) -> bool:
+        return self._cache_warm
+
+    def profile_version(self, user_id: str) -> int:
+        """Changes whenever the cached profile for ``user_id`` is saved or replaced"""
+        return self._versions.get(str(user_id), 0)
+
+    def _bump_version(self, user_id: str):
+        self._versions[user_id] = next(self._version_counter)
+
+    def _record_db_success(self):
+        if self._consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+            logger.info("MongoDB circuit closed")
+        self._consecutive_failures = 0
+
+    def _record_db_failure(self):
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+            if self._consecutive_failures == CIRCUIT_FAILURE_THRESHOLD:
+                logger.warning(f"MongoDB circuit opened for {CIRCUIT_RESET_SECONDS:.0f}s")
+            self._circuit_open_until = time.monotonic() + CIRCUIT_RESET_SECONDS
+
     async def _ensure_connection(self):
         """Ensure MongoDB connection is alive, reconnect if needed"""
+        if not self.mongodb_uri:
+            return False  # local mode, nothing to connect to
+        if self.circuit_state == "open":
+            return False  # fail fast instead of waiting on timeouts every call
+
         async with self._connection_lock:
             try:
                 # Check if we have a client and it's still connected
                 if self.client is not None:
                     # Test the connection with a quick ping
-                    await asyncio.wait_for(self.client.admin.command('ping'), timeout=5.0)
+                    with metrics.timed(metrics.MONGO_LATENCY, op="ping"):
+                        await asyncio.wait_for(self.client.admin.command('ping'), timeout=5.0)
+                    self._record_db_success()
                     return True  # Connection is good
             except (ConnectionFailure, ServerSelectionTimeoutError, asyncio.TimeoutError, Exception) as e:
                 logger.warning(f"MongoDB connection test failed: {e}. Attempting to reconnect...")
@@ -54,6 +139,8 @@ class MongoDataManager:
                 self.profiles_collection = None
                 self.blacklists_collection = None
                 self.system_settings_collection = None
+                self.switches_collection = None
+                self.proxy_messages_collection = None
             
             if not self.mongodb_uri:
                 logger.warning("MONGODB_URI not set. Running in local mode with in-memory storage only.")
@@ -69,14 +156,22 @@ class MongoDataManager:
             self.profiles_collection = self.db.user_profiles
             self.blacklists_collection = self.db.blacklists
             self.system_settings_collection = self.db.system_settings
+            self.switches_collection = self.db.front_switches
+            self.proxy_messages_collection = self.db.proxy_messages
             
             # Create indexes for better performance
             await self._create_indexes()
             
             logger.info(f"MongoDB reconnection successful to database: {self.database_name}")
+            self._record_db_success()
+
+            # Startup may have fallen back to memory; warm the cache now
+            if not self._cache_warm:
+                await self._load_cache()
             
         except Exception as e:
             logger.error(f"Failed to reconnect to MongoDB: {e}")
+            self._record_db_failure()
             self.client = None
         
     async def initialize(self):
@@ -86,13 +181,13 @@ class MongoDataManager:
         
         if not self.mongodb_uri:
             logger.warning("MONGODB_URI not set. Running in local mode with in-memory storage only.")
+            self._cache_warm = True
             return
         
         await self._reconnect()
         
         if self.client:
-            # Load initial data into cache
-            await self._load_cache()
+            # _reconnect has loaded the cache
             logger.info(f"MongoDB connection established successfully to database: {self.database_name}")
         else:
             logger.warning("Falling back to in-memory storage")
@@ -105,38 +200,51 @@ class MongoDataManager:
             await self.blacklists_collection.create_index([("type", 1), ("guild_id", 1)])
         if self.system_settings_collection is not None:
             await self.system_settings_collection.create_index("guild_id", unique=True)
+        if self.switches_collection is not None:
+            await self.switches_collection.create_index([("user_id", 1), ("day", -1)], unique=True)
+        if self.proxy_messages_collection is not None:
+            await self.proxy_messages_collection.create_index("message_id", unique=True)
+            await self.proxy_messages_collection.create_index([("user_id", 1), ("channel_id", 1), ("sent_at", -1)])
+            await self.proxy_messages_collection.create_index("sent_at", expireAfterSeconds=PROXY_LOG_TTL_DAYS * 86400)
             
     async def _load_cache(self):
         """Load frequently accessed data into cache"""
         try:
             # Load user profiles
             if self.profiles_collection is not None:
-                async for profile in self.profiles_collection.find():
-                    user_id = profile.get('user_id')
-                    if user_id:
-                        self._cache['profiles'][user_id] = profile
+                with metrics.timed(metrics.MONGO_LATENCY, op="load_profiles"):
+                    async for profile in self.profiles_collection.find():
+                        user_id = profile.get('user_id')
+                        if user_id:
+                            # Never clobber edits made while we were running from memory
+                            profile.pop('_id', None)
+                            self._cache['profiles'].setdefault(user_id, profile)
                         
-            # Load blacklists
+            # Load blacklists (only for guilds on this process's shards)
             if self.blacklists_collection is not None:
                 async for blacklist in self.blacklists_collection.find():
                     blacklist_type = blacklist.get('type')
                     guild_id = blacklist.get('guild_id')
-                    if blacklist_type and guild_id:
-                        if blacklist_type not in self._cache['blacklists']:
-                            self._cache['blacklists'][blacklist_type] = {}
-                        self._cache['blacklists'][blacklist_type][guild_id] = blacklist.get('data', {})
+                    key = (blacklist_type, guild_id)
+                    if blacklist_type and guild_id and sharding.owns(guild_id) and key not in self._cache['blacklists']:
+                        self._cache['blacklists'].put(key, guild_id, blacklist.get('data', {}))
+
+            self._cache_warm = True
                         
         except Exception as e:
             logger.error(f"Error loading cache: {e}")
     
     # User Profile Management
+    @traced("data_manager.get_user_profile")
     async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
         """Get user profile with system and alters data"""
         user_id = str(user_id)
         
         # Check cache first
         if user_id in self._cache['profiles']:
+            metrics.CACHE_HITS.inc(cache="profiles")
             return self._cache['profiles'][user_id]
+        metrics.CACHE_MISSES.inc(cache="profiles")
             
         # Default profile structure optimized for DID/OSDD systems
         default_profile = {
@@ -168,19 +276,25 @@ class MongoDataManager:
         # Try to get from database if connection is available
         if await self._ensure_connection() and self.profiles_collection is not None:
             try:
-                profile = await self.profiles_collection.find_one({"user_id": user_id})
+                with metrics.timed(metrics.MONGO_LATENCY, op="find_one"):
+                    profile = await self.profiles_collection.find_one({"user_id": user_id})
                 if profile:
                     # Remove MongoDB _id field
                     profile.pop('_id', None)
                     self._cache['profiles'][user_id] = profile
+                    self._bump_version(user_id)
                     return profile
             except Exception as e:
+                metrics.MONGO_ERRORS.inc(op="find_one")
+                self._record_db_failure()
                 logger.error(f"Error fetching profile for {user_id}: {e}")
         
         # Cache and return default profile
         self._cache['profiles'][user_id] = default_profile
+        self._bump_version(user_id)
         return default_profile
     
+    @traced("data_manager.save_user_profile")
     async def save_user_profile(self, user_id: str, profile: Dict[str, Any]) -> bool:
         """Save user profile to database"""
         user_id = str(user_id)
@@ -189,20 +303,77 @@ class MongoDataManager:
         try:
             # Update cache
             self._cache['profiles'][user_id] = profile
+            self._bump_version(user_id)
             
             # Try to save to database if connection is available
             if await self._ensure_connection() and self.profiles_collection is not None:
-                await self.profiles_collection.replace_one(
-                    {"user_id": user_id},
-                    profile,
-                    upsert=True
-                )
+                with metrics.timed(metrics.MONGO_LATENCY, op="replace_profile"):
+                    await self.profiles_collection.replace_one(
+                        {"user_id": user_id},
+                        profile,
+                        upsert=True
+                    )
             return True
         except Exception as e:
+            metrics.MONGO_ERRORS.inc(op="replace_profile")
+            self._record_db_failure()
             logger.error(f"Error saving profile for {user_id}: {e}")
             return False
     
+    @traced("data_manager.update_user_profile")
+    async def update_user_profile(self, user_id: str, sets: Dict[tuple, Any], unsets: list = ()) -> bool:
+        """Apply targeted changes to a cached profile and persist them with $set/$unset.
+
+        Paths are tuples of keys, e.g. ``("alters", "Ash", "pronouns")``. If any key
+        can't be used in a MongoDB dotted path (contains "." or starts with "$"), the
+        whole profile is saved instead.
+        """
+        user_id = str(user_id)
+        profile = await self.get_user_profile(user_id)
+
+        for path, value in sets.items():
+            target = profile
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+        for path in unsets:
+            target = profile
+            for key in path[:-1]:
+                target = target.get(key)
+                if not isinstance(target, dict):
+                    break
+            else:
+                target.pop(path[-1], None)
+
+        if not sets and not unsets:
+            return True
+        self._bump_version(user_id)
+        if not all(_safe_path(p) for p in (*sets, *unsets)):
+            return await self.save_user_profile(user_id, profile)
+
+        try:
+            if await self._ensure_connection() and self.profiles_collection is not None:
+                touched = {p[0] for p in (*sets, *unsets)}
+                update = {}
+                if sets:
+                    update["$set"] = {".".join(p): v for p, v in sets.items()}
+                if unsets:
+                    update["$unset"] = {".".join(p): "" for p in unsets}
+                # a profile that was never stored gets the rest of its cached fields on insert
+                on_insert = {k: v for k, v in profile.items() if k not in touched and k not in ("_id", "user_id")}
+                if on_insert:
+                    update["$setOnInsert"] = on_insert
+                with metrics.timed(metrics.MONGO_LATENCY, op="update_profile"):
+                    await self.profiles_collection.update_one({"user_id": user_id}, update, upsert=True)
+            return True
+        except Exception as e:
+            metrics.MONGO_ERRORS.inc(op="update_profile")
+            self._record_db_failure()
+            logger.error(f"Error updating profile for {user_id}: {e}")
+            return False
+
     # Alter Management (DID/OSDD specific)
+    @traced("data_manager.create_alter")
     async def create_alter(self, user_id: str, alter_name: str, alter_data: Dict[str, Any]) -> bool:
         """Create a new alter for a system"""
         profile = await self.get_user_profile(user_id)
@@ -223,6 +394,7 @@ class MongoDataManager:
             "color": 0x8A2BE2,
             "use_embed": True,
             "created_at": None,
+            "updated_at": now_iso(),
             "role": None,  # System role (protector, persecutor, etc.)
             "age": None,
             "birthday": None,
@@ -237,38 +409,289 @@ class MongoDataManager:
         # Merge with provided data
         default_alter.update(alter_data)
         profile["alters"][alter_name] = default_alter
+        (profile.get("deleted_alters") or {}).pop(alter_name, None)
         
         return await self.save_user_profile(user_id, profile)
     
     # Blacklist Management
+    @traced("data_manager.get_blacklist")
     async def get_blacklist(self, blacklist_type: str, guild_id: str = None) -> Dict[str, Any]:
-        """Get blacklist data (channel or category)"""
-        if blacklist_type in self._cache['blacklists']:
-            if guild_id:
-                return self._cache['blacklists'][blacklist_type].get(guild_id, {})
-            return self._cache['blacklists'][blacklist_type]
-        return {}
+        """Get blacklist data (channel or category), loaded from MongoDB on a cache miss
+
+        Without ``guild_id``, every cached guild's blacklist of that type.
+        """
+        cache = self._cache['blacklists']
+        if not guild_id:
+            return {gid: data for (kind, gid), data in cache.items() if kind == blacklist_type}
+        guild_id = str(guild_id)
+        data = cache.get((blacklist_type, guild_id), guild_id)
+        if data is not None:
+            metrics.CACHE_HITS.inc(cache="blacklists")
+            return data
+        metrics.CACHE_MISSES.inc(cache="blacklists")
+
+        data = {}
+        if await self._ensure_connection() and self.blacklists_collection is not None:
+            try:
+                with metrics.timed(metrics.MONGO_LATENCY, op="find_blacklist"):
+                    doc = await self.blacklists_collection.find_one({"type": blacklist_type, "guild_id": guild_id})
+                data = (doc or {}).get("data") or {}
+            except Exception as e:
+                metrics.MONGO_ERRORS.inc(op="find_blacklist")
+                self._record_db_failure()
+                logger.error(f"Error loading {blacklist_type} blacklist for guild {guild_id}: {e}")
+                return data  # don't cache a failed read
+        elif self.mongodb_uri:
+            return data  # database configured but unreachable: not cached
+        cache.put((blacklist_type, guild_id), guild_id, data)
+        return data
     
+    @traced("data_manager.save_blacklist")
     async def save_blacklist(self, blacklist_type: str, guild_id: str, data: Dict[str, Any]) -> bool:
-        """Save blacklist data"""
+        """Save blacklist data (cached once stored; in local mode the cache is the only copy)"""
+        guild_id = str(guild_id)
+        cache = self._cache['blacklists']
+        if not self.mongodb_uri:
+            cache.put((blacklist_type, guild_id), guild_id, data, pinned=True)
+            return True
+        if not (await self._ensure_connection() and self.blacklists_collection is not None):
+            logger.warning(f"Not saving {blacklist_type} blacklist for guild {guild_id}: database unavailable")
+            cache.pop((blacklist_type, guild_id), guild_id)  # callers edit the cached dict in place
+            return False
         try:
-            # Update cache
-            if blacklist_type not in self._cache['blacklists']:
-                self._cache['blacklists'][blacklist_type] = {}
-            self._cache['blacklists'][blacklist_type][guild_id] = data
-            
-            # Try to save to database if connection is available
-            if await self._ensure_connection() and self.blacklists_collection is not None:
+            with metrics.timed(metrics.MONGO_LATENCY, op="replace_blacklist"):
                 await self.blacklists_collection.replace_one(
                     {"type": blacklist_type, "guild_id": guild_id},
                     {"type": blacklist_type, "guild_id": guild_id, "data": data},
                     upsert=True
                 )
+            cache.put((blacklist_type, guild_id), guild_id, data)
             return True
         except Exception as e:
+            cache.pop((blacklist_type, guild_id), guild_id)
+            metrics.MONGO_ERRORS.inc(op="replace_blacklist")
+            self._record_db_failure()
             logger.error(f"Error saving {blacklist_type} blacklist for guild {guild_id}: {e}")
             return False
     
+    # Per-guild settings (system_settings collection, one document per guild)
+    @traced("data_manager.get_guild_settings")
+    async def get_guild_settings(self, guild_id: str) -> Dict[str, Any]:
+        """Settings for a guild, loaded from MongoDB on first use ({} if none saved)"""
+        guild_id = str(guild_id)
+        cache = self._cache['system_settings']
+        settings = cache.get(guild_id, guild_id)
+        if settings is not None:
+            metrics.CACHE_HITS.inc(cache="guild_settings")
+            return settings
+        metrics.CACHE_MISSES.inc(cache="guild_settings")
+
+        settings = {}
+        if await self._ensure_connection() and self.system_settings_collection is not None:
+            try:
+                with metrics.timed(metrics.MONGO_LATENCY, op="find_guild_settings"):
+                    doc = await self.system_settings_collection.find_one({"guild_id": guild_id}, {"_id": 0})
+                settings = (doc or {}).get("settings") or {}
+            except Exception as e:
+                metrics.MONGO_ERRORS.inc(op="find_guild_settings")
+                self._record_db_failure()
+                logger.error(f"Error loading settings for guild {guild_id}: {e}")
+                return settings  # don't cache a failed read
+        elif self.mongodb_uri:
+            return settings  # database configured but unreachable: defaults for now, not cached
+        cache.put(guild_id, guild_id, settings)
+        return settings
+
+    @traced("data_manager.update_guild_settings")
+    async def update_guild_settings(self, guild_id: str, sets: Dict[str, Any]) -> bool:
+        """Set individual guild settings (``None`` removes one) with a single targeted update"""
+        guild_id = str(guild_id)
+        update: Dict[str, Any] = {}
+        set_fields = {f"settings.{k}": v for k, v in sets.items() if v is not None}
+        unset_fields = {f"settings.{k}": "" for k, v in sets.items() if v is None}
+        if set_fields:
+            update["$set"] = set_fields
+        if unset_fields:
+            update["$unset"] = unset_fields
+        if not update:
+            return True
+
+        settings = await self.get_guild_settings(guild_id)
+        connected = await self._ensure_connection() and self.system_settings_collection is not None
+        if self.mongodb_uri and not connected:
+            logger.warning(f"Not saving settings for guild {guild_id}: database unavailable")
+            return False  # don't let a change made on top of defaults stand in for the stored settings
+        for key, value in sets.items():
+            if value is None:
+                settings.pop(key, None)
+            else:
+                settings[key] = value
+        if not self.mongodb_uri:
+            # local mode: the cache is the only copy, so it must never be evicted
+            self._cache['system_settings'].put(guild_id, guild_id, settings, pinned=True)
+            return True
+
+        try:
+            with metrics.timed(metrics.MONGO_LATENCY, op="update_guild_settings"):
+                await self.system_settings_collection.update_one({"guild_id": guild_id}, update, upsert=True)
+            return True
+        except Exception as e:
+            self._cache['system_settings'].pop(guild_id, guild_id)  # reload the stored settings next time
+            metrics.MONGO_ERRORS.inc(op="update_guild_settings")
+            self._record_db_failure()
+            logger.error(f"Error saving settings for guild {guild_id}: {e}")
+            return False
+
+    # Front switch history (one document per user per UTC day)
+    @traced("data_manager.record_switch")
+    async def record_switch(self, user_id: str, switch: Dict[str, Any]) -> bool:
+        """Append a switch (``{"at": iso, "alters": [...]}``) to the user's bucket for that day"""
+        user_id = str(user_id)
+        recent = self._cache['switches'].setdefault(user_id, deque(maxlen=RECENT_SWITCHES))
+        recent.appendleft(switch)
+
+        try:
+            if await self._ensure_connection() and self.switches_collection is not None:
+                with metrics.timed(metrics.MONGO_LATENCY, op="record_switch"):
+                    await self.switches_collection.update_one(
+                        {"user_id": user_id, "day": switch["at"][:10]},
+                        {
+                            "$push": {"switches": {"$each": [switch], "$slice": -SWITCHES_PER_BUCKET}},
+                            "$inc": {"count": 1},
+                        },
+                        upsert=True
+                    )
+            return True
+        except Exception as e:
+            metrics.MONGO_ERRORS.inc(op="record_switch")
+            self._record_db_failure()
+            logger.error(f"Error recording switch for {user_id}: {e}")
+            return False
+
+    @traced("data_manager.get_switches")
+    async def get_switches(self, user_id: str, limit: int = 10) -> list:
+        """Most recent switches first, reading only as many day buckets as needed"""
+        user_id = str(user_id)
+        recent = self._cache['switches'].get(user_id)
+        if recent is not None and len(recent) >= limit:
+            metrics.CACHE_HITS.inc(cache="switches")
+            return list(recent)[:limit]
+        metrics.CACHE_MISSES.inc(cache="switches")
+
+        if await self._ensure_connection() and self.switches_collection is not None:
+            try:
+                switches = []
+                with metrics.timed(metrics.MONGO_LATENCY, op="find_switches"):
+                    cursor = self.switches_collection.find(
+                        {"user_id": user_id}, {"_id": 0, "switches": 1}
+                    ).sort("day", -1)
+                    async for bucket in cursor:
+                        switches.extend(reversed(bucket.get("switches", [])))
+                        if len(switches) >= limit:
+                            break
+                self._cache['switches'][user_id] = deque(switches[:RECENT_SWITCHES], maxlen=RECENT_SWITCHES)
+                return switches[:limit]
+            except Exception as e:
+                metrics.MONGO_ERRORS.inc(op="find_switches")
+                self._record_db_failure()
+                logger.error(f"Error fetching switches for {user_id}: {e}")
+        return list(recent or [])[:limit]
+
+    # Proxied message log (webhook message -> author / alter)
+    def _remember_proxy_message(self, record: Dict[str, Any]):
+        recent = self._cache['proxy_messages']
+        recent[record["message_id"]] = record
+        self._cache['last_proxy'][(record["user_id"], record["channel_id"])] = record["message_id"]
+        while len(recent) > RECENT_PROXY_MESSAGES:
+            _, old = recent.popitem(last=False)
+            key = (old["user_id"], old["channel_id"])
+            if self._cache['last_proxy'].get(key) == old["message_id"]:
+                del self._cache['last_proxy'][key]
+
+    @traced("data_manager.log_proxy_message")
+    async def log_proxy_message(self, message_id: str, channel_id: str, guild_id: Optional[str],
+                                user_id: str, alter: str, original_id: Optional[str] = None) -> bool:
+        """Record who sent a proxied (webhook) message; expires after PROXY_LOG_TTL_DAYS"""
+        record = {
+            "message_id": str(message_id),
+            "channel_id": str(channel_id),
+            "guild_id": str(guild_id) if guild_id else None,
+            "user_id": str(user_id),
+            "alter": alter,
+            "original_id": str(original_id) if original_id else None,
+            "sent_at": datetime.datetime.utcnow(),
+        }
+        self._remember_proxy_message(record)
+
+        try:
+            if await self._ensure_connection() and self.proxy_messages_collection is not None:
+                with metrics.timed(metrics.MONGO_LATENCY, op="log_proxy_message"):
+                    await self.proxy_messages_collection.insert_one(dict(record))
+            return True
+        except Exception as e:
+            metrics.MONGO_ERRORS.inc(op="log_proxy_message")
+            self._record_db_failure()
+            logger.error(f"Error logging proxied message {message_id}: {e}")
+            return False
+
+    async def _find_proxy_message(self, query: Dict[str, Any], op: str, **kwargs) -> Optional[Dict[str, Any]]:
+        metrics.CACHE_MISSES.inc(cache="proxy_log")
+        if not await self._ensure_connection() or self.proxy_messages_collection is None:
+            return None
+        try:
+            with metrics.timed(metrics.MONGO_LATENCY, op=op):
+                record = await self.proxy_messages_collection.find_one(query, {"_id": 0}, **kwargs)
+            if record:
+                self._remember_proxy_message(record)
+            return record
+        except Exception as e:
+            metrics.MONGO_ERRORS.inc(op=op)
+            self._record_db_failure()
+            logger.error(f"Error looking up proxied message {query}: {e}")
+            return None
+
+    @traced("data_manager.get_proxy_message")
+    async def get_proxy_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """The log record for a proxied message, or None if it isn't one (or has expired)"""
+        message_id = str(message_id)
+        record = self._cache['proxy_messages'].get(message_id)
+        if record is not None:
+            metrics.CACHE_HITS.inc(cache="proxy_log")
+            return record
+        return await self._find_proxy_message({"message_id": message_id}, "find_proxy_message")
+
+    @traced("data_manager.get_last_proxy_message")
+    async def get_last_proxy_message(self, user_id: str, channel_id: str) -> Optional[Dict[str, Any]]:
+        """The user's most recent proxied message in a channel"""
+        user_id, channel_id = str(user_id), str(channel_id)
+        message_id = self._cache['last_proxy'].get((user_id, channel_id))
+        if message_id is not None:
+            metrics.CACHE_HITS.inc(cache="proxy_log")
+            return self._cache['proxy_messages'][message_id]
+        return await self._find_proxy_message(
+            {"user_id": user_id, "channel_id": channel_id}, "find_last_proxy_message", sort=[("sent_at", -1)]
+        )
+
+    async def forget_proxy_message(self, message_id: str) -> bool:
+        """Drop the record of a proxied message that has been deleted"""
+        message_id = str(message_id)
+        record = self._cache['proxy_messages'].pop(message_id, None)
+        if record is not None:
+            key = (record["user_id"], record["channel_id"])
+            if self._cache['last_proxy'].get(key) == message_id:
+                del self._cache['last_proxy'][key]  # the next lookup falls back to MongoDB
+
+        try:
+            if await self._ensure_connection() and self.proxy_messages_collection is not None:
+                with metrics.timed(metrics.MONGO_LATENCY, op="delete_proxy_message"):
+                    await self.proxy_messages_collection.delete_one({"message_id": message_id})
+            return True
+        except Exception as e:
+            metrics.MONGO_ERRORS.inc(op="delete_proxy_message")
+            self._record_db_failure()
+            logger.error(f"Error deleting proxied message {message_id}: {e}")
+            return False
+
     async def close_connection(self):
         """Close MongoDB connection"""
         async with self._connection_lock:
@@ -284,6 +707,8 @@ class MongoDataManager:
                     self.profiles_collection = None
                     self.blacklists_collection = None
                     self.system_settings_collection = None
+                    self.switches_collection = None
+                    self.proxy_messages_collection = None
     
     async def is_connected(self) -> bool:
         """Check if MongoDB is currently connected"""
@@ -291,8 +716,10 @@ class MongoDataManager:
             if self.client is None:
                 return False
             await asyncio.wait_for(self.client.admin.command('ping'), timeout=2.0)
+            self._record_db_success()
             return True
         except Exception:
+            self._record_db_failure()
             return False
 
 # Initialize the data manager
@@ -325,7 +752,7 @@ def save_profiles(profiles):
 
 def load_category_blacklist():
     """Load category blacklist (backwards compatibility)"""
-    return data_manager._cache['blacklists'].get('category', {})
+    return {gid: data for (kind, gid), data in data_manager._cache['blacklists'].items() if kind == 'category'}
 
 def save_category_blacklist(blacklist):
     """Save category blacklist (backwards compatibility)"""
@@ -334,7 +761,7 @@ def save_category_blacklist(blacklist):
 
 def load_blacklist():
     """Load channel blacklist (backwards compatibility)"""
-    return data_manager._cache['blacklists'].get('channel', {})
+    return {gid: data for (kind, gid), data in data_manager._cache['blacklists'].items() if kind == 'channel'}
 
 def save_blacklist(blacklist):
     """Save channel blacklist (backwards compatibility)"""
@@ -0,0 +1,131 @@
+"""
+export_format.py – versioned Pixel export schema (v2) and change tracking
+=========================================================================
+
+Key points
+----------
+* **Versioned envelope** – ``{"format": "pixel-export", "version": 2, "exported_at",
+  "since", "system", "folders", "alters", ...}``. Files without ``format`` are v1
+  (a raw profile dump) and still import.
+* **Compact** – alter fields equal to their defaults are left out and restored on
+  import; internal fields (``_id``, tombstones) never leave the bot.
+* **Deltas** – every alter edit stamps ``updated_at`` (``touch_alter``) and deletions
+  leave a tombstone (``tombstone_alter``), so ``build_export(profile, since=...)``
+  can emit only alters changed after ``since`` plus the names deleted since then.
+* **Pure** – no Discord / MongoDB imports; safe to use from the job process pool.
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import Any
+
+FORMAT_NAME = "pixel-export"
+SCHEMA_VERSION = 2
+TOMBSTONE_DAYS = 180
+
+ALTER_DEFAULTS: dict[str, Any] = {
+    "pronouns": "Not set",
+    "avatar": None,
+    "proxy_avatar": None,
+    "banner": None,
+    "proxy": None,
+    "aliases": [],
+    "color": 0x8A2BE2,
+    "use_embed": True,
+    "role": None,
+    "age": None,
+    "birthday": None,
+    "front_time": 0,
+    "last_front": None,
+    "privacy": {"show_in_list": True, "allow_proxy": True},
+}
+
+_INTERNAL_KEYS = ("_id", "user_id", "deleted_alters")
+
+# ───────────────────────── timestamps ──────────────────────────── #
+
+def now_iso() -> str:
+    """UTC timestamp in the same (naive ISO) form as ``created_at``."""
+    return datetime.datetime.utcnow().isoformat()
+
+
+def parse_when(value: str) -> datetime.datetime:
+    """Parse an ISO date/datetime (naive = UTC) to a naive UTC datetime; ValueError if invalid."""
+    when = datetime.datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if when.tzinfo is not None:
+        when = when.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return when
+
+
+def _changed_after(stamp: Any, since: datetime.datetime) -> bool:
+    if not isinstance(stamp, str):
+        return True  # never stamped (older data) – include it to be safe
+    try:
+        return parse_when(stamp) > since
+    except ValueError:
+        return True
+
+
+def touch_alter(profile: dict[str, Any], name: str) -> None:
+    """Mark an alter as modified now (call before saving an edit)."""
+    alter = (profile.get("alters") or {}).get(name)
+    if isinstance(alter, dict):
+        alter["updated_at"] = now_iso()
+    (profile.get("deleted_alters") or {}).pop(name, None)
+
+
+def tombstone_alter(profile: dict[str, Any], *names: str) -> None:
+    """Record that alters were deleted, so delta exports can carry the deletion."""
+    tombstones = profile.setdefault("deleted_alters", {})
+    stamp = now_iso()
+    for name in names:
+        tombstones[name] = stamp
+    for old in expired_tombstones(profile):
+        del tombstones[old]
+
+
+def expired_tombstones(profile: dict[str, Any]) -> list[str]:
+    """Tombstones older than ``TOMBSTONE_DAYS`` (safe to forget)."""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=TOMBSTONE_DAYS)
+    return [n for n, ts in (profile.get("deleted_alters") or {}).items() if not _changed_after(ts, cutoff)]
+
+# ───────────────────────── encode / decode ─────────────────────── #
+
+def compact_alter(alter: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in alter.items() if k not in ALTER_DEFAULTS or ALTER_DEFAULTS[k] != v}
+
+
+def expand_alter(name: str, alter: dict[str, Any]) -> dict[str, Any]:
+    full = {"displayname": name, "description": "No description provided", **_copy_defaults()}
+    full.update(alter)
+    return full
+
+
+def _copy_defaults() -> dict[str, Any]:
+    return {k: (dict(v) if isinstance(v, dict) else list(v) if isinstance(v, list) else v)
+            for k, v in ALTER_DEFAULTS.items()}
+
+
+def build_export(profile: dict[str, Any], since: datetime.datetime | None = None) -> dict[str, Any]:
+    """Turn a stored profile into a v2 export document (a delta when ``since`` is set)."""
+    alters = profile.get("alters") or {}
+    if since is not None:
+        alters = {n: a for n, a in alters.items() if _changed_after(a.get("updated_at"), since)}
+
+    doc: dict[str, Any] = {
+        "format": FORMAT_NAME,
+        "version": SCHEMA_VERSION,
+        "exported_at": now_iso(),
+        "since": since.isoformat() if since is not None else None,
+    }
+    for key, value in profile.items():
+        if key not in _INTERNAL_KEYS and key != "alters":
+            doc[key] = value
+    doc["alters"] = {name: compact_alter(alter) for name, alter in alters.items()}
+    if since is not None:
+        doc["deleted_alters"] = sorted(
+            n for n, ts in (profile.get("deleted_alters") or {}).items()
+            if _changed_after(ts, since) and n not in (profile.get("alters") or {})
+        )
+    return doc
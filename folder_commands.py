@@ -1,6 +1,9 @@
 import discord
 from discord.ext import commands
 from data_manager import data_manager
+from profile_links import folder_changed, in_folder
+from render_cache import embed_payload, render_cache, send_payload
+from search_index import resolve_or_reply
 
 async def ensure_folders_exist(user_id):
     profile = await data_manager.get_user_profile(user_id)
@@ -9,6 +12,34 @@ async def ensure_folders_exist(user_id):
         await data_manager.save_user_profile(user_id, profile)
     return profile
 
+def _render_folder(user_id, profile, folder_name):
+    """Build the ``!folder`` payload (cached by ``render_cache`` until the profile changes)."""
+    folder = profile["folders"][folder_name]
+    folder_alters = folder.get("alters", [])
+
+    if not folder_alters:
+        embed = discord.Embed(
+            title=f"📁 {folder['name']}",
+            description=f"**Description:** {folder.get('description', 'No description provided.')}\n\n*This folder is empty.*",
+            color=folder.get("color", 0x8A2BE2)
+        )
+    else:
+        alter_list = []
+        for alter_name in folder_alters:
+            if alter_name in profile.get("alters", {}):
+                alter_data = profile["alters"][alter_name]
+                proxy_text = alter_data.get('proxy', 'No proxy set')
+                alter_list.append(f"• **{alter_name}** — `{proxy_text}`")
+
+        embed = discord.Embed(
+            title=f"📁 {folder['name']}",
+            description=f"**Description:** {folder.get('description', 'No description provided.')}\n\n" + "\n".join(alter_list),
+            color=folder.get("color", 0x8A2BE2)
+        )
+
+    embed.set_footer(text=f"User ID: {user_id}")
+    return embed_payload(embed)
+
 def setup_folder_commands(bot):
     @bot.command(name="create_folder")
     async def create_folder(ctx, *, folder_name: str):
@@ -27,6 +58,7 @@ def setup_folder_commands(bot):
             "color": 0x8A2BE2,
             "alters": []
         }
+        folder_changed(user_id, profile, folder_name)
 
         await data_manager.save_user_profile(user_id, profile)
         await ctx.send(f"✅ Folder '{folder_name}' created successfully!")
@@ -87,6 +119,7 @@ def setup_folder_commands(bot):
                 folder["name"] = new_name
                 if new_name != folder_name:
                     folders[new_name] = folders.pop(folder_name)
+                    folder_changed(user_id, profile, folder_name, new_name)
 
                 await data_manager.save_user_profile(user_id, profile)
                 await ctx.send(f"✅ Folder renamed from '{folder_name}' to '{new_name}' successfully!")
@@ -124,6 +157,7 @@ def setup_folder_commands(bot):
 
             if confirmation.content.strip().upper() == "CONFIRM":
                 del folders[folder_name]
+                folder_changed(user_id, profile, folder_name)
                 await data_manager.save_user_profile(user_id, profile)
                 await ctx.send(f"✅ Folder '{folder_name}' has been deleted successfully.")
             else:
@@ -143,15 +177,16 @@ def setup_folder_commands(bot):
             await ctx.send(f"❌ Folder '{folder_name}' does not exist.")
             return
 
-        if alter_name not in profile.get("alters", {}):
-            await ctx.send(f"❌ Alter '{alter_name}' does not exist.")
+        alter_name = await resolve_or_reply(ctx, profile, alter_name)
+        if alter_name is None:
             return
 
-        if alter_name in folders[folder_name]["alters"]:
+        if in_folder(user_id, profile, folder_name, alter_name):
             await ctx.send(f"❌ Alter '{alter_name}' is already in folder '{folder_name}'.")
             return
 
         folders[folder_name]["alters"].append(alter_name)
+        folder_changed(user_id, profile, folder_name)
         await data_manager.save_user_profile(user_id, profile)
         await ctx.send(f"✅ Alter '{alter_name}' added to folder '{folder_name}' successfully!")
 
@@ -166,11 +201,12 @@ def setup_folder_commands(bot):
             await ctx.send(f"❌ Folder '{folder_name}' does not exist.")
             return
 
-        if alter_name not in folders[folder_name]["alters"]:
+        if not in_folder(user_id, profile, folder_name, alter_name):
             await ctx.send(f"❌ Alter '{alter_name}' is not in folder '{folder_name}'.")
             return
 
         folders[folder_name]["alters"].remove(alter_name)
+        folder_changed(user_id, profile, folder_name)
         await data_manager.save_user_profile(user_id, profile)
         await ctx.send(f"✅ Alter '{alter_name}' removed from folder '{folder_name}' successfully!")
 
@@ -209,28 +245,5 @@ def setup_folder_commands(bot):
             await ctx.send(f"❌ Folder '{folder_name}' does not exist.")
             return
 
-        folder = folders[folder_name]
-        folder_alters = folder.get("alters", [])
-
-        if not folder_alters:
-            embed = discord.Embed(
-                title=f"📁 {folder['name']}",
-                description=f"**Description:** {folder.get('description', 'No description provided.')}\n\n*This folder is empty.*",
-                color=folder.get("color", 0x8A2BE2)
-            )
-        else:
-            alter_list = []
-            for alter_name in folder_alters:
-                if alter_name in profile.get("alters", {}):
-                    alter_data = profile["alters"][alter_name]
-                    proxy_text = alter_data.get('proxy', 'No proxy set')
-                    alter_list.append(f"• **{alter_name}** — `{proxy_text}`")
-
-            embed = discord.Embed(
-                title=f"📁 {folder['name']}",
-                description=f"**Description:** {folder.get('description', 'No description provided.')}\n\n" + "\n".join(alter_list),
-                color=folder.get("color", 0x8A2BE2)
-            )
-
-        embed.set_footer(text=f"User ID: {user_id}")
-        await ctx.send(embed=embed)
+        payload = render_cache.get("folder", user_id, folder_name, lambda: _render_folder(user_id, profile, folder_name))
+        await send_payload(ctx, payload)
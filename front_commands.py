@@ -0,0 +1,214 @@
+"""
+front_commands.py – switch tracking: !switch, !front, !fronthistory, !frontstats
+===============================================================================
+
+Key points
+----------
+* **History outside the profile** – every switch is appended to a per‑user, per‑UTC‑day
+  bucket in the ``front_switches`` collection (``data_manager.record_switch``), so the
+  profile document doesn't grow with a system's history. ``!fronthistory`` reads the
+  newest buckets only until it has enough entries.
+* **Incremental totals** – the profile holds just the current front
+  (``system.current_front = {"alters", "since"}``) and per‑alter ``front_time``
+  (minutes), ``front_count`` and ``last_front``. A switch closes the previous session
+  and adds its length to those totals in the same targeted update, so ``!frontstats``
+  never scans history.
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import Any
+
+import discord
+
+from data_manager import data_manager
+from export_format import now_iso, parse_when
+from search_index import resolve_or_reply
+
+HISTORY_DEFAULT = 10
+HISTORY_MAX = 25
+STATS_SHOWN = 15
+_OUT = {"out", "none", "nobody"}
+
+
+def _minutes_since(stamp: Any, now: datetime.datetime) -> float:
+    if not isinstance(stamp, str):
+        return 0.0
+    try:
+        return max(0.0, (now - parse_when(stamp)).total_seconds() / 60)
+    except ValueError:
+        return 0.0
+
+
+def _fmt_minutes(minutes: float) -> str:
+    minutes = int(minutes)
+    days, rest = divmod(minutes, 24 * 60)
+    hours, mins = divmod(rest, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {mins}m"
+    return f"{mins}m"
+
+
+def _timestamp(stamp: str, style: str = "R") -> str:
+    """Discord ``<t:…>`` markup for a naive‑UTC ISO stamp."""
+    try:
+        when = parse_when(stamp).replace(tzinfo=datetime.timezone.utc)
+    except ValueError:
+        return stamp
+    return f"<t:{int(when.timestamp())}:{style}>"
+
+
+def current_front(profile: dict[str, Any]) -> dict[str, Any]:
+    front = (profile.get("system") or {}).get("current_front")
+    return front if isinstance(front, dict) else {"alters": [], "since": None}
+
+
+def plan_switch(profile: dict[str, Any], fronters: list[str], stamp: str) -> dict[tuple, Any]:
+    """``$set`` paths for switching to ``fronters`` at ``stamp``: closes the running
+    session (adding its length to each outgoing fronter's ``front_time``) and opens a new one."""
+    now = parse_when(stamp)
+    alters = profile.get("alters") or {}
+    previous = current_front(profile)
+    elapsed = _minutes_since(previous.get("since"), now)
+
+    sets: dict[tuple, Any] = {("system", "current_front"): {"alters": fronters, "since": stamp}}
+    for name in previous.get("alters") or []:
+        alter = alters.get(name)
+        if isinstance(alter, dict) and elapsed:
+            sets[("alters", name, "front_time")] = round((alter.get("front_time") or 0) + elapsed, 2)
+    for name in fronters:
+        sets[("alters", name, "last_front")] = stamp
+        if name not in (previous.get("alters") or []):
+            sets[("alters", name, "front_count")] = (alters[name].get("front_count") or 0) + 1
+    return sets
+
+
+def setup_front_commands(bot):
+    @bot.command(name="switch", aliases=["sw"])
+    async def switch(ctx, *names: str):
+        user_id = str(ctx.author.id)
+        profile = await data_manager.get_user_profile(user_id)
+
+        if not names:
+            await ctx.send("Usage: `!switch <alter> [more alters…]` or `!switch out`")
+            return
+
+        fronters: list[str] = []
+        if not (len(names) == 1 and names[0].lower() in _OUT):
+            for query in names:
+                name = await resolve_or_reply(ctx, profile, query)
+                if name is None:
+                    return
+                if name not in fronters:
+                    fronters.append(name)
+
+        if fronters == (current_front(profile).get("alters") or []):
+            await ctx.send("ℹ️ That is already the current front.")
+            return
+
+        stamp = now_iso()
+        if not await data_manager.update_user_profile(user_id, plan_switch(profile, fronters, stamp)):
+            await ctx.send("❌ Failed to record the switch. Please try again.")
+            return
+        await data_manager.record_switch(user_id, {"at": stamp, "alters": fronters})
+
+        if fronters:
+            await ctx.send(f"🔄 Switch registered: **{', '.join(fronters)}** now fronting.")
+        else:
+            await ctx.send("🔄 Switch-out registered: nobody is fronting.")
+
+    @bot.command(name="front", aliases=["fronter", "fronters"])
+    async def front(ctx):
+        user_id = str(ctx.author.id)
+        profile = await data_manager.get_user_profile(user_id)
+        front = current_front(profile)
+        system_name = (profile.get("system") or {}).get("name") or ctx.author.display_name
+
+        if not front.get("alters"):
+            note = f"since {_timestamp(front['since'])}" if front.get("since") else "yet"
+            await ctx.send(f"Nobody is registered as fronting {note}. Use `!switch <alter>` to log a switch.")
+            return
+
+        alters = profile.get("alters", {})
+        lines = []
+        for name in front["alters"]:
+            alter = alters.get(name) or {}
+            pronouns = alter.get("pronouns")
+            lines.append(f"• **{alter.get('displayname') or name}**" + (f" ({pronouns})" if pronouns and pronouns != "Not set" else ""))
+
+        embed = discord.Embed(
+            title=f"🎭 Current front for {system_name}",
+            description="\n".join(lines),
+            color=0x8A2BE2
+        )
+        embed.add_field(name="⏱️ Since", value=f"{_timestamp(front['since'], 'f')} ({_timestamp(front['since'])})", inline=False)
+        embed.set_footer(text=f"User ID: {user_id}")
+        await ctx.send(embed=embed)
+
+    @bot.command(name="fronthistory", aliases=["fh"])
+    async def fronthistory(ctx, count: int = HISTORY_DEFAULT):
+        user_id = str(ctx.author.id)
+        count = max(1, min(count, HISTORY_MAX))
+        switches = await data_manager.get_switches(user_id, count)
+
+        if not switches:
+            await ctx.send("No switches recorded yet. Use `!switch <alter>` to log one.")
+            return
+
+        lines = []
+        until = None  # the next (newer) switch ends this one
+        for entry in switches:
+            who = ", ".join(entry.get("alters") or []) or "*switched out*"
+            duration = ""
+            if until is not None:
+                duration = f" – for {_fmt_minutes(_minutes_since(entry['at'], parse_when(until)))}"
+            elif entry.get("alters"):
+                duration = " – *current*"
+            lines.append(f"• **{who}** {_timestamp(entry['at'])}{duration}")
+            until = entry["at"]
+
+        embed = discord.Embed(
+            title="📜 Front History",
+            description="\n".join(lines),
+            color=0x8A2BE2
+        )
+        embed.set_footer(text=f"Last {len(switches)} switch(es) • User ID: {user_id}")
+        await ctx.send(embed=embed)
+
+    @bot.command(name="frontstats")
+    async def frontstats(ctx):
+        user_id = str(ctx.author.id)
+        profile = await data_manager.get_user_profile(user_id)
+        alters = profile.get("alters", {})
+
+        # stored totals + the session that is still running
+        front = current_front(profile)
+        running = _minutes_since(front.get("since"), datetime.datetime.utcnow())
+        totals = {name: (alter.get("front_time") or 0) for name, alter in alters.items() if isinstance(alter, dict)}
+        for name in front.get("alters") or []:
+            if name in totals:
+                totals[name] += running
+
+        ranked = sorted(((t, n) for n, t in totals.items() if t > 0), reverse=True)
+        if not ranked:
+            await ctx.send("No front time recorded yet. Use `!switch <alter>` to start tracking.")
+            return
+
+        total = sum(t for t, _ in ranked)
+        lines = [
+            f"• **{name}** – {_fmt_minutes(minutes)} ({minutes / total:.0%}, {alters[name].get('front_count') or 0} switch(es))"
+            for minutes, name in ranked[:STATS_SHOWN]
+        ]
+        if len(ranked) > STATS_SHOWN:
+            lines.append(f"*…and {len(ranked) - STATS_SHOWN} more*")
+
+        embed = discord.Embed(
+            title="📊 Front Time",
+            description="\n".join(lines),
+            color=0x8A2BE2
+        )
+        embed.set_footer(text=f"Total tracked: {_fmt_minutes(total)} • User ID: {user_id}")
+        await ctx.send(embed=embed)
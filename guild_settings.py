@@ -0,0 +1,147 @@
+"""
+guild_settings.py – per‑server settings with defaults
+=====================================================
+
+Key points
+----------
+* **One document per guild** in the ``system_settings`` collection
+  (``{"guild_id", "settings": {...}}``), read lazily through
+  ``data_manager.get_guild_settings`` and held in a bounded LRU
+  (``GUILD_SETTINGS_CACHE``) – a lookup on the proxy path is a dict hit.
+* **Targeted writes** – ``set_values`` changes only the named keys (``$set`` /
+  ``$unset`` of ``settings.<key>``); a value equal to the default is removed rather
+  than stored.
+* **Known keys only** – ``DEFAULTS`` lists every setting; unknown keys are a
+  programming error (``KeyError``).
+* ``command_prefix`` is the bot's ``command_prefix`` callable, so each guild can use
+  its own prefix (mentioning the bot always works too).
+* ``import_legacy_suggestion_channels`` moves the old ``suggestion_channels.json``
+  (lost on every deploy) into the collection once at startup, reading the file in a
+  thread so the event loop never blocks on it. Without a database (no ``MONGODB_URI``)
+  ``set_suggestion_channel`` keeps writing the file, since it is the only copy that
+  survives a restart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any
+
+from discord.ext import commands
+
+from data_manager import data_manager
+
+logger = logging.getLogger(__name__)
+
+LEGACY_SUGGESTION_FILE = "suggestion_channels.json"
+DEFAULT_PREFIX = "!"
+MAX_PREFIX_LENGTH = 5
+
+DEFAULTS: dict[str, Any] = {
+    "suggestion_channel": None,   # channel id (str) for !suggest
+    "proxy_enabled": True,        # False turns proxying off server‑wide
+    "log_channel": None,          # channel id (str) for the proxy log (log_channel.py)
+    "prefix": None,               # custom command prefix; None = the bot default
+}
+
+
+async def get(guild_id: int | str | None, key: str) -> Any:
+    """One setting for a guild (its default outside guilds or when unset)."""
+    default = DEFAULTS[key]
+    if guild_id is None:
+        return default
+    settings = await data_manager.get_guild_settings(guild_id)
+    return settings.get(key, default)
+
+
+async def get_all(guild_id: int | str) -> dict[str, Any]:
+    settings = await data_manager.get_guild_settings(guild_id)
+    return {key: settings.get(key, default) for key, default in DEFAULTS.items()}
+
+
+async def set_values(guild_id: int | str, **values: Any) -> bool:
+    """Save the given settings; a default value clears the stored one."""
+    for key in values:
+        if key not in DEFAULTS:
+            raise KeyError(f"unknown guild setting {key!r}")
+    return await data_manager.update_guild_settings(
+        guild_id, {key: (None if value == DEFAULTS[key] else value) for key, value in values.items()}
+    )
+
+
+async def set_suggestion_channel(guild_id: int | str, channel_id: str | None) -> bool:
+    """Save a guild's suggestion channel; in local mode also to the legacy JSON file."""
+    if not await set_values(guild_id, suggestion_channel=channel_id):
+        return False
+    if data_manager.mongodb_uri:
+        return True
+    try:
+        await asyncio.to_thread(_write_legacy, LEGACY_SUGGESTION_FILE, str(guild_id), channel_id)
+    except OSError as e:
+        logger.error(f"Couldn't save {LEGACY_SUGGESTION_FILE}: {e}")
+        return False
+    return True
+
+
+async def command_prefix(bot, message) -> list[str]:
+    """``command_prefix`` callable: the guild's prefix (or ``!``), plus mentioning the bot."""
+    guild_id = message.guild.id if message.guild else None
+    prefix = await get(guild_id, "prefix") or DEFAULT_PREFIX
+    return commands.when_mentioned_or(prefix)(bot, message)
+
+
+def _read_legacy(path: str) -> dict[str, Any] | None:
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable {path}: {e}")
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_legacy(path: str, guild_id: str, channel_id: str | None) -> None:
+    data = _read_legacy(path) or {}
+    if channel_id is None:
+        data.pop(guild_id, None)
+    else:
+        data[guild_id] = channel_id
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(f"{path}.tmp", path)
+
+
+async def import_legacy_suggestion_channels(path: str = LEGACY_SUGGESTION_FILE) -> int:
+    """Copy suggestion channels from the old JSON file into guild settings, once.
+
+    Guilds that already have a suggestion channel keep it. The file is renamed to
+    ``<path>.imported`` afterwards so later restarts skip it – except in local mode,
+    where it is where ``set_suggestion_channel`` keeps them.
+    """
+    legacy = await asyncio.to_thread(_read_legacy, path)
+    if not legacy:
+        return 0
+
+    imported = failed = 0
+    for guild_id, channel_id in legacy.items():
+        if await get(guild_id, "suggestion_channel") is None:
+            if await set_values(guild_id, suggestion_channel=str(channel_id)):
+                imported += 1
+            else:
+                failed += 1
+    if not data_manager.mongodb_uri:
+        return imported  # local mode: the file stays the copy that outlives restarts
+    if data_manager.system_settings_collection is None or failed:
+        logger.warning(f"Database unavailable – keeping {path} until suggestion channels can be saved")
+        return imported
+    try:
+        await asyncio.to_thread(os.replace, path, f"{path}.imported")
+    except OSError as e:
+        logger.warning(f"Imported {path} but couldn't rename it: {e}")
+    logger.info(f"Imported {imported} suggestion channel(s) from {path}")
+    return imported
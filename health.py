@@ -0,0 +1,108 @@
+"""
+health.py – liveness / readiness probes for Pixel
+=================================================
+
+* ``GET /livez``  – the event loop is answering and every gateway connection (one
+  per shard in ``AutoShardedBot`` mode) has had a heartbeat acknowledged recently. Failing this means the process should be restarted.
+* ``GET /readyz`` – the profile cache is warm and the MongoDB circuit is closed.
+
+Both handlers only read in‑memory state, so they are safe to probe every few seconds.
+The database is pinged in the background at most once per ``HEALTH_DB_PROBE_SECONDS``
+so an idle bot still notices an outage.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any
+
+from aiohttp import web
+from discord.ext import commands
+
+import metrics
+import sharding
+from data_manager import data_manager
+
+# ───────────────────────── configuration ───────────────────────── #
+
+MAX_HEARTBEAT_AGE = float(os.getenv("HEALTH_MAX_HEARTBEAT_AGE", "120"))
+MAX_LOOP_LAG = float(os.getenv("HEALTH_MAX_LOOP_LAG", "5"))
+DB_PROBE_SECONDS = float(os.getenv("HEALTH_DB_PROBE_SECONDS", "15"))
+
+# ───────────────────────── checks ──────────────────────────────── #
+
+class HealthChecks:
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # startup counts as a fresh heartbeat so we get a grace period to connect
+        self._started = time.perf_counter()
+        self._last_heartbeat: dict[int, float] = {}
+        self._last_db_probe = 0.0
+        self._db_probe: asyncio.Task | None = None
+
+    def _heartbeat_ages(self) -> dict[int, float]:
+        """Seconds since each local shard's gateway last acknowledged a heartbeat."""
+        now = time.perf_counter()
+        ages = {}
+        for shard_id, last_ack in sharding.heartbeat_acks(self.bot).items():  # perf_counter timestamps
+            last = max(self._last_heartbeat.get(shard_id, self._started), last_ack or 0.0)
+            self._last_heartbeat[shard_id] = last
+            ages[shard_id] = now - last
+        return ages
+
+    def liveness(self) -> tuple[bool, dict[str, Any]]:
+        ages = self._heartbeat_ages()
+        heartbeat_age = max(ages.values(), default=time.perf_counter() - self._started)
+        loop_lag = metrics.LOOP_LAG_LAST.value()
+        checks = {
+            "gateway_open": not self.bot.is_closed(),
+            "heartbeat_age_s": round(heartbeat_age, 3),  # the slowest shard
+            "shard_heartbeat_age_s": {str(k): round(v, 3) for k, v in sorted(ages.items())},
+            "heartbeat_ok": heartbeat_age <= MAX_HEARTBEAT_AGE,
+            "loop_lag_s": round(loop_lag, 4),
+            "loop_ok": loop_lag <= MAX_LOOP_LAG,
+        }
+        return checks["gateway_open"] and checks["heartbeat_ok"] and checks["loop_ok"], checks
+
+    def readiness(self) -> tuple[bool, dict[str, Any]]:
+        self._maybe_probe_db()
+        circuit = data_manager.circuit_state
+        checks = {
+            "bot_ready": self.bot.is_ready(),
+            "cache_warm": data_manager.cache_warm,
+            "db_circuit": circuit,
+        }
+        ok = checks["bot_ready"] and checks["cache_warm"] and circuit in {"closed", "disabled"}
+        return ok, checks
+
+    def _maybe_probe_db(self) -> None:
+        """Kick off a background ping; never make the probe wait on MongoDB."""
+        if data_manager.circuit_state == "disabled":
+            return
+        if self._db_probe and not self._db_probe.done():
+            return
+        now = time.monotonic()
+        if now - self._last_db_probe < DB_PROBE_SECONDS:
+            return
+        self._last_db_probe = now
+        self._db_probe = asyncio.create_task(data_manager.is_connected())
+
+    # ───── aiohttp handlers ─────
+    async def handle_livez(self, request: web.Request) -> web.Response:
+        ok, checks = self.liveness()
+        return web.json_response({"status": "ok" if ok else "fail", "checks": checks}, status=200 if ok else 503)
+
+    async def handle_readyz(self, request: web.Request) -> web.Response:
+        ok, checks = self.readiness()
+        return web.json_response({"status": "ok" if ok else "fail", "checks": checks}, status=200 if ok else 503)
+
+# ───────────────────────── setup function ──────────────────────── #
+
+def setup_health_checks(bot: commands.Bot, app: web.Application) -> HealthChecks:
+    """Mount /livez and /readyz on the ops server's aiohttp app."""
+    checks = HealthChecks(bot)
+    app.router.add_get("/livez", checks.handle_livez)
+    app.router.add_get("/readyz", checks.handle_readyz)
+    return checks
@@ -0,0 +1,123 @@
+"""
+http_client.py – the bot's shared outbound HTTP client
+======================================================
+
+Key points
+----------
+* **One pooled session** – a single ``aiohttp.ClientSession`` with a keep‑alive
+  connector and DNS cache, so avatar fetches, attachment downloads and trace exports
+  reuse connections instead of paying DNS + TLS on every call.
+* **Owned by ``main.main``** – ``await http_client.start()`` after setup and
+  ``await http_client.close()`` in its ``finally``. Scripts that never call ``start()``
+  (benchmarks, one‑off tools) get a session lazily on first use.
+* **Bounded** – total and per‑host connection limits, connect/total timeouts and a
+  response‑size cap (``fetch_bytes`` streams and aborts past ``max_bytes``).
+* **Measured** – every request is counted and timed by ``op`` in ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import aiohttp
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ───────────────────────── #
+
+HTTP_LIMIT = int(os.getenv("HTTP_LIMIT", "100"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "10"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_MAX_RESPONSE_BYTES = int(os.getenv("HTTP_MAX_RESPONSE_BYTES", str(25 * 1024 * 1024)))
+_CHUNK_SIZE = 64 * 1024
+
+HTTP_REQUESTS = metrics.Counter(
+    "pixel_http_requests_total", "Outbound HTTP requests by purpose and outcome", ("op", "status")
+)
+HTTP_LATENCY = metrics.Histogram("pixel_http_request_seconds", "Outbound HTTP request latency", ("op",))
+HTTP_BYTES = metrics.Counter("pixel_http_response_bytes_total", "Response bytes read by fetch_bytes", ("op",))
+
+
+class ResponseTooLarge(ValueError):
+    """The response body exceeded the caller's byte cap."""
+
+# ───────────────────────── client ──────────────────────────────── #
+
+class HTTPClient:
+    def __init__(self):
+        self._session: aiohttp.ClientSession | None = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_LIMIT,
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS, sock_connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={"User-Agent": "PixelBot"},
+            raise_for_status=False,
+        )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    async def start(self) -> None:
+        _ = self.session
+        logger.info(f"HTTP client ready (limit {HTTP_LIMIT}, {HTTP_LIMIT_PER_HOST} per host)")
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # ───── requests ─────
+    @asynccontextmanager
+    async def request(self, method: str, url: str, *, op: str, **kwargs: Any) -> AsyncIterator[aiohttp.ClientResponse]:
+        """``async with http_client.request("GET", url, op="avatar") as resp:`` – timed and counted."""
+        start = time.perf_counter()
+        status = "error"
+        try:
+            async with self.session.request(method, url, **kwargs) as resp:
+                status = str(resp.status)
+                yield resp
+        except ResponseTooLarge:
+            status = "too_large"
+            raise
+        except TimeoutError:
+            status = "timeout"
+            raise
+        finally:
+            HTTP_REQUESTS.inc(op=op, status=status)
+            HTTP_LATENCY.observe(time.perf_counter() - start, op=op)
+
+    async def fetch_bytes(self, url: str, *, op: str, max_bytes: int = HTTP_MAX_RESPONSE_BYTES) -> bytearray:
+        """GET ``url`` into memory; raises ``ResponseTooLarge`` as soon as ``max_bytes`` is
+        exceeded and ``aiohttp.ClientResponseError`` for non‑2xx responses."""
+        async with self.request("GET", url, op=op) as resp:
+            resp.raise_for_status()
+            if resp.content_length and resp.content_length > max_bytes:
+                raise ResponseTooLarge(f"{resp.content_length} bytes")
+            buf = bytearray()
+            async for chunk in resp.content.iter_chunked(_CHUNK_SIZE):
+                buf += chunk
+                if len(buf) > max_bytes:
+                    raise ResponseTooLarge(f"more than {max_bytes} bytes")
+            HTTP_BYTES.inc(len(buf), op=op)
+            return buf
+
+
+http_client = HTTPClient()
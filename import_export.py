@@ -10,33 +10,50 @@ Key points
   `!import_pluralkit <attach>` works alongside the classic prompt flow.
 * **Tracebacks** only echo to guild owners/admins for quick debugging without spamming users.
 * **Robust colour + UUID/ID handling**; missing/invalid values fall back cleanly.
+* **Bounded imports** – uploads are streamed with a hard byte cap (``MAX_IMPORT_BYTES``)
+  and parsed incrementally off the event loop by ``import_parsers``.
+* **Per‑request exports** – each export is serialized off the event loop into its own
+  spooled buffer (memory, or a private temp file above ``EXPORT_SPOOL_BYTES``),
+  optionally gzip'd, and handed straight to ``discord.File`` – no shared path on disk.
+* **Background jobs** – imports and exports run on ``jobs.job_queue`` with progress in
+  a status message; JSON decode/encode and PluralKit conversion use its process pool.
+* **Versioned exports** – ``!export_system`` writes the compact v2 format from
+  ``export_format``; ``!export_system since <date|last>`` writes a delta holding only
+  alters changed (or deleted) since then, which ``!import_system`` applies on top of
+  an existing profile.
+* **Incremental merge** – Pixel, PluralKit and Tupperbox imports are diffed against the
+  stored profile by ``profile_merge`` and only the differences are written; add
+  ``dry`` (e.g. ``!import_tupperbox dry``) to preview the changes without applying them.
 """
 
 from __future__ import annotations
 
-import json
+import io
+import os
+import pickle
 import asyncio
 import discord
 from discord.ext import commands
-import aiohttp
-import aiofiles
-from typing import Any
+from typing import IO, Any
 
 from data_manager import data_manager  # your DB wrapper
+from http_client import ResponseTooLarge, http_client
+from import_parsers import (
+    ImportFormatError, ImportTooLarge, encode_export, parse_pixel, parse_pluralkit, parse_tupperbox,
+)
+from export_format import now_iso, parse_when
+from jobs import Job, job_queue
+from rate_limit import throttled
+from profile_merge import (
+    PLURALKIT_ALTER_FIELDS, PLURALKIT_PLACEHOLDERS, PLURALKIT_SYSTEM_FIELDS, TUPPERBOX_ALTER_FIELDS,
+    TUPPERBOX_PLACEHOLDERS, apply_merge, plan_merge,
+)
+
+MAX_IMPORT_BYTES = int(os.getenv("MAX_IMPORT_BYTES", str(25 * 1024 * 1024)))
+EXPORT_SPOOL_BYTES = int(os.getenv("EXPORT_SPOOL_BYTES", str(8 * 1024 * 1024)))
 
 # ────────────────────────── small helpers ─────────────────────────── #
 
-def _pk_colour(value: str | int | None, default: int = 0x8A2BE2) -> int:
-    """Convert PluralKit colour strings like "#ff00ff" to int; tolerate garbage."""
-    if not value:
-        return default
-    if isinstance(value, str):
-        try:
-            return int(value.replace("#", ""), 16)
-        except ValueError:
-            return default
-    return value  # already int
-
 
 def _is_admin(ctx: commands.Context) -> bool:
     return ctx.guild is None or ctx.author == ctx.guild.owner or ctx.author.guild_permissions.manage_guild
@@ -50,13 +67,114 @@ async def _get_profile(uid: str) -> dict[str, Any]:
         profile = await profile
     return profile or {}
 
+
+async def _download_attachment(attachment: discord.Attachment, max_bytes: int = MAX_IMPORT_BYTES) -> bytearray:
+    """Stream an attachment into memory, aborting as soon as it exceeds ``max_bytes``."""
+    if attachment.size and attachment.size > max_bytes:
+        raise ImportTooLarge(f"{attachment.size} bytes")
+
+    try:
+        return await http_client.fetch_bytes(attachment.url, op="import", max_bytes=max_bytes)
+    except ResponseTooLarge as e:
+        raise ImportTooLarge(str(e)) from None
+
+
+async def _build_export(profile: dict[str, Any], compress: bool, since: str | None = None) -> IO[bytes]:
+    """Encode ``profile`` in the job process pool and return a readable, rewound buffer.
+
+    The profile is the live cached dict, so it is snapshotted (pickled) here on the
+    loop where nothing can mutate it mid‑copy; the encoding happens elsewhere.
+    """
+    snapshot = pickle.dumps(profile, protocol=pickle.HIGHEST_PROTOCOL)
+    encoded = await job_queue.run_cpu(encode_export, snapshot, compress, EXPORT_SPOOL_BYTES, since)
+    if isinstance(encoded, str):  # spilled to a private temp file
+        f = open(encoded, "rb")
+        os.unlink(encoded)  # the open handle keeps it readable
+        return f
+    return io.BytesIO(encoded)
+
+
+def _mib(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def _too_large_message() -> str:
+    return f"❌ That file is too large to import (limit {MAX_IMPORT_BYTES // (1024 * 1024)} MB)."
+
+
+def _is_dry_run(mode: str | None) -> bool:
+    return (mode or "").lower() in ("dry", "dry-run", "dryrun", "preview")
+
+
+async def _wait_for_upload(bot: commands.Bot, ctx: commands.Context, prompt: str) -> discord.Attachment | None:
+    """Use an attachment on the command message, or prompt for one."""
+    if ctx.message.attachments:
+        return ctx.message.attachments[0]
+    await ctx.send(prompt)
+    try:
+        message = await bot.wait_for(
+            "message",
+            timeout=300,
+            check=lambda m: m.author == ctx.author and m.channel == ctx.channel and m.attachments,
+        )
+    except asyncio.TimeoutError:
+        return None
+    return message.attachments[0]
+
+
+async def _merge_import(
+    job: Job,
+    ctx: commands.Context,
+    attachment: discord.Attachment,
+    *,
+    what: str,
+    title: str,
+    parse,
+    parse_args: tuple = (),
+    alter_fields=None,
+    system_fields=None,
+    placeholders=None,
+    dry_run: bool = False,
+) -> str:
+    """Download → parse in the process pool → diff against the profile → targeted update."""
+    uid = str(ctx.author.id)
+    try:
+        await job.progress(f"📥 Downloading your {what}…")
+        raw = await _download_attachment(attachment)
+        await job.progress(f"🔍 Reading your {what} ({_mib(len(raw))})…")
+        incoming = await job_queue.run_cpu(parse, raw, *parse_args)
+        del raw
+
+        profile = await _get_profile(uid)
+        plan = plan_merge(uid, profile, incoming, alter_fields=alter_fields, system_fields=system_fields,
+                          placeholders=placeholders)
+        if dry_run:
+            return plan.summary(dry_run=True)
+        if plan.changes:
+            await job.progress(f"💾 Saving {len(plan.new_alters)} new and {len(plan.changed_alters)} updated alters…")
+            await apply_merge(uid, plan)
+    except ImportTooLarge:
+        return _too_large_message()
+    except ImportFormatError as e:
+        return f"❌ That doesn't look like a {what}: {e}"
+    except Exception as e:
+        print(f"⚠️ {title} import failed for {ctx.author}: {e}")
+        if _is_admin(ctx):
+            await ctx.send(f"```py\n{e.__class__.__name__}: {e}\n```")
+        return f"❌ An error occurred while importing your {what}."
+
+    if not plan.changes:
+        return f"✅ **{title} import completed** – everything was already up to date.\n" + plan.summary()
+    return f"✅ **{title} import completed!**\n" + plan.summary()
+
 # ───────────────────────── command setup ──────────────────────────── #
 
 def setup_import_export(bot: commands.Bot) -> None:
 
     #                        EXPORT SYSTEM                       #
     @bot.command(name="export_system")
-    async def export_system(ctx: commands.Context):
+    @throttled()
+    async def export_system(ctx: commands.Context, *options: str):
         uid = str(ctx.author.id)
         profile = await _get_profile(uid)
 
@@ -64,185 +182,108 @@ def setup_import_export(bot: commands.Bot) -> None:
             await ctx.send("❌ You don't have a system set up yet.")
             return
 
-        filename = "pixel export.json"
-        try:
-            async with aiofiles.open(filename, "w") as f:
-                await f.write(json.dumps(profile, indent=4))
-
-            dm = await ctx.author.create_dm()
-            await dm.send(
-                "📂 Here is your **Pixel** system export file. Keep it safe!",
-                file=discord.File(filename),
-            )
-            await ctx.send("✅ Export completed – check your DMs.")
-        except Exception as e:
-            print(f"⚠️ export_system failed for {ctx.author}: {e}")
-            await ctx.send("❌ Couldn't export your system – please try again.")
+        # options: [gzip] [since <ISO date/time | last>]
+        words = [o.lower() for o in options]
+        compress = any(w in ("gzip", "gz", "compressed") for w in words)
+        since = None
+        if "since" in words:
+            i = words.index("since")
+            when = options[i + 1] if i + 1 < len(options) else ""
+            if when.lower() == "last":
+                since = (profile.get("settings") or {}).get("last_export_at")
+                if not since:
+                    await ctx.send("❌ You haven't exported before – run `!export_system` for a full backup first.")
+                    return
+            else:
+                try:
+                    since = parse_when(when).isoformat()
+                except ValueError:
+                    await ctx.send("❌ Use `!export_system since YYYY-MM-DD` (or `since last`).")
+                    return
+
+        kind = "delta" if since else "export"
+        filename = f"pixel-{kind}-{uid}.json" + (".gz" if compress else "")
+
+        async def work(job: Job) -> str:
+            what = f"changes since {since[:19].replace('T', ' ')} UTC" if since else f"{len(profile.get('alters', {}))} alters"
+            await job.progress(f"📦 Building your export ({what})…")
+            if not since:
+                # alters from before change tracking get a baseline, so the next
+                # `since last` delta doesn't have to include them
+                current = await _get_profile(uid)
+                unstamped = [n for n, a in current.get("alters", {}).items() if not a.get("updated_at")]
+                if unstamped:
+                    stamp = now_iso()
+                    await data_manager.update_user_profile(uid, {("alters", n, "updated_at"): stamp for n in unstamped})
+            started_at = now_iso()
+            buf = await _build_export(await _get_profile(uid), compress, since)
+            try:
+                await job.progress("📤 Sending your export…")
+                dm = await ctx.author.create_dm()
+                await dm.send(
+                    "📂 Here is your **Pixel** system export file. Keep it safe!",
+                    file=discord.File(buf, filename=filename),
+                )
+            except discord.HTTPException as e:
+                print(f"⚠️ export_system upload failed for {ctx.author}: {e}")
+                if e.status == 413 and not compress:
+                    return "❌ Your export is too large for Discord – try `!export_system gzip`."
+                return "❌ Couldn't export your system – please try again."
+            finally:
+                buf.close()
+            await data_manager.update_user_profile(uid, {("settings", "last_export_at"): started_at})
+            return "✅ Export completed – check your DMs."
+
+        await job_queue.submit(ctx, "export_system", work)
 
     #                        IMPORT PIXEL BACKUP                  #
     @bot.command(name="import_system")
-    async def import_system(ctx: commands.Context):
-        uid = str(ctx.author.id)
-
+    @throttled()
+    async def import_system(ctx: commands.Context, mode: str | None = None):
         # attachment may already be present
-        if ctx.message.attachments:
-            message = ctx.message
-        else:
-            await ctx.send("📂 Please upload your **PixelBot** system backup JSON file.")
-            try:
-                message = await bot.wait_for(
-                    "message",
-                    timeout=300,
-                    check=lambda m: m.author == ctx.author and m.channel == ctx.channel and m.attachments,
-                )
-            except asyncio.TimeoutError:
-                return
-
-        try:
-            async with aiohttp.ClientSession() as sess:
-                async with sess.get(message.attachments[0].url) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
-
-            data["user_id"] = uid
-            await data_manager.save_user_profile(uid, data)
-            
-            # Count imported items for feedback
-            num_alters = len(data.get("alters", {}))
-            num_folders = len(data.get("folders", {}))
-            
-            await ctx.send(
-                "✅ **Pixel system import completed!**\n" +
-                f"📊 **Imported:** {num_alters} members and {num_folders} folders"
+        attachment = await _wait_for_upload(bot, ctx, "📂 Please upload your **PixelBot** system backup JSON file.")
+        if attachment is None:
+            return
+
+        async def work(job: Job) -> str:
+            return await _merge_import(
+                job, ctx, attachment, what="Pixel backup", title="Pixel system",
+                parse=parse_pixel, parse_args=(MAX_IMPORT_BYTES,), dry_run=_is_dry_run(mode),
             )
-        except Exception as e:
-            print(f"⚠️ import_system failed for {ctx.author}: {e}")
-            if _is_admin(ctx):
-                await ctx.send(f"```py\n{e.__class__.__name__}: {e}\n```")
-            await ctx.send("❌ An error occurred while importing your system.")
+
+        await job_queue.submit(ctx, "import_system", work)
 
     #                        IMPORT PLURALKIT                      #
     @bot.command(name="import_pluralkit")
-    async def import_pluralkit(ctx: commands.Context):
-        uid = str(ctx.author.id)
+    @throttled()
+    async def import_pluralkit(ctx: commands.Context, mode: str | None = None):
+        attachment = await _wait_for_upload(bot, ctx, "📂 Please upload your **PluralKit** export JSON file.")
+        if attachment is None:
+            return
 
-        if ctx.message.attachments:
-            message = ctx.message
-        else:
-            await ctx.send("📂 Please upload your **PluralKit** export JSON file.")
-            try:
-                message = await bot.wait_for(
-                    "message",
-                    timeout=300,
-                    check=lambda m: m.author == ctx.author and m.channel == ctx.channel and m.attachments,
-                )
-            except asyncio.TimeoutError:
-                return
-
-        try:
-            async with aiohttp.ClientSession() as sess:
-                async with sess.get(message.attachments[0].url) as resp:
-                    resp.raise_for_status()
-                    pk = await resp.json()
-
-            profile = await _get_profile(uid)
-            profile.setdefault("system", {})
-            profile.setdefault("alters", {})
-            profile.setdefault("folders", {})
-
-            # ───── system block ─────
-            if pk.get("name"):
-                profile["system"] = {
-                    "name":        pk.get("name", "Imported System"),
-                    "description": pk.get("description", "Imported from PluralKit"),
-                    "pronouns":    pk.get("pronouns", "Not set"),
-                    "avatar":      pk.get("avatar_url"),
-                    "banner":      pk.get("banner"),
-                    "color":       _pk_colour(pk.get("color")),
-                    "tag":         pk.get("tag"),
-                    "created_at":  pk.get("created"),
-                    "front_history": [],
-                    "system_avatar": pk.get("avatar_url"),
-                    "system_banner": pk.get("banner"),
-                    "privacy_settings": {
-                        "show_front": True,
-                        "show_member_count": True,
-                        "allow_member_list": True,
-                    },
-                }
-
-            # ───── member / alter block ─────
-            for member in pk.get("members", []):
-                name = member.get("name", "Unknown")
-                if name in profile["alters"]:
-                    continue
-
-                proxy_tags = member.get("proxy_tags", [])
-                proxy = "No proxy set"
-                if proxy_tags:
-                    pre = proxy_tags[0].get("prefix", "")
-                    suf = proxy_tags[0].get("suffix", "")
-                    if pre and suf:
-                        proxy = f"{pre}...{suf}"
-                    elif pre:
-                        proxy = f"{pre} text"
-                    elif suf:
-                        proxy = f"text {suf}"
-
-                profile["alters"][name] = {
-                    "displayname": member.get("display_name") or name,
-                    "pronouns":    member.get("pronouns", "Not set"),
-                    "description": member.get("description", "Imported from PluralKit"),
-                    "avatar":      member.get("avatar_url"),
-                    "proxy_avatar": member.get("avatar_url"),
-                    "banner":      member.get("banner"),
-                    "proxy":       proxy,
-                    "aliases":     [],
-                    "color":       _pk_colour(member.get("color")),
-                    "use_embed":   True,
-                    "created_at":  member.get("created"),
-                    "role":        None,
-                    "age":         None,
-                    "birthday":    member.get("birthday"),
-                    "front_time":  0,
-                    "last_front":  None,
-                    "privacy": {
-                        "show_in_list": member.get("visibility", "public") == "public",
-                        "allow_proxy":  True,
-                    },
-                }
-
-            # ───── groups / folders block ─────
-            for group in pk.get("groups", []):
-                gname = group.get("name", "Unknown Group")
-                if gname in profile["folders"]:
-                    continue
-
-                profile["folders"][gname] = {
-                    "name":        gname,
-                    "description": group.get("description", "Imported from PluralKit"),
-                    "color":       _pk_colour(group.get("color")),
-                    "alters":      [],
-                }
-
-                for uuid in group.get("members", []):
-                    for m in pk.get("members", []):
-                        m_uid = m.get("uuid") or m.get("id")
-                        if m_uid == uuid:
-                            n = m.get("name")
-                            if n and n not in profile["folders"][gname]["alters"]:
-                                profile["folders"][gname]["alters"].append(n)
-
-            # ───── save and report ─────
-            await data_manager.save_user_profile(uid, profile)
-            await ctx.send(
-                "✅ **PluralKit import completed!**\n" +
-                f"📊 **Imported:** {1 if profile['system'].get('name') else 0} system, "
-                f"{len(profile['alters'])} alters, {len(profile['folders'])} folders"
+        async def work(job: Job) -> str:
+            return await _merge_import(
+                job, ctx, attachment, what="PluralKit export", title="PluralKit",
+                parse=parse_pluralkit, parse_args=(set(), set()),
+                alter_fields=PLURALKIT_ALTER_FIELDS, system_fields=PLURALKIT_SYSTEM_FIELDS,
+                placeholders=PLURALKIT_PLACEHOLDERS, dry_run=_is_dry_run(mode),
+            )
+
+        await job_queue.submit(ctx, "import_pluralkit", work)
+
+    #                        IMPORT TUPPERBOX                      #
+    @bot.command(name="import_tupperbox")
+    @throttled()
+    async def import_tupperbox(ctx: commands.Context, mode: str | None = None):
+        attachment = await _wait_for_upload(bot, ctx, "📂 Please upload your **Tupperbox** export (`tul!export`) JSON file.")
+        if attachment is None:
+            return
+
+        async def work(job: Job) -> str:
+            return await _merge_import(
+                job, ctx, attachment, what="Tupperbox export", title="Tupperbox",
+                parse=parse_tupperbox, alter_fields=TUPPERBOX_ALTER_FIELDS,
+                placeholders=TUPPERBOX_PLACEHOLDERS, dry_run=_is_dry_run(mode),
             )
 
-        except Exception as e:
-            print(f"⚠️ import_pluralkit failed for {ctx.author}: {e}")
-            if _is_admin(ctx):
-                await ctx.send(f"```py\n{e.__class__.__name__}: {e}\n```")
-            await ctx.send("❌ An error occurred while importing your PluralKit data.")
+        await job_queue.submit(ctx, "import_tupperbox", work)
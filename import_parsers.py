@@ -0,0 +1,599 @@
+"""
+import_parsers.py – incremental, validating parsers for system imports
+======================================================================
+
+Key points
+----------
+* **Incremental** – the upload is decoded (and, for gzip'd backups, inflated) in
+  ``CHUNK_BYTES`` pieces into a sliding text window that ``json.JSONDecoder.raw_decode``
+  walks one value at a time; consumed text is dropped as the window refills. Large
+  arrays/objects (PluralKit ``members``/``groups``/``switches``, Tupperbox ``tuppers``,
+  Pixel ``alters``) are decoded one element at a time and converted immediately, so
+  alongside the uploaded bytes only the window and the converted result are held –
+  never the full text or a full decoded tree.
+* **Validating** – shape problems raise ``ImportFormatError`` with a message that can
+  be shown to the user, as soon as the offending element is reached.
+* **Absent means ``None``** – a field the source leaves empty is ``None`` rather than
+  placeholder text, so a merge never mistakes it for data (``profile_merge`` fills in
+  placeholders only on records the import creates).
+* **Pure** – everything here is synchronous, top‑level and picklable, so callers run
+  it off the event loop (``asyncio.to_thread`` / a process pool). That includes
+  ``encode_export``, the serializer behind ``!export_system``.
+"""
+
+from __future__ import annotations
+
+import codecs
+import gzip
+import io
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Any, Iterator
+
+from export_format import FORMAT_NAME, SCHEMA_VERSION, build_export, expand_alter, parse_when
+
+_decoder = json.JSONDecoder()
+_WS = " \t\n\r"
+_NUMBER_TAIL = frozenset("0123456789.eE+-")
+
+MAX_NAME_LENGTH = 100
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file is not a valid export of the expected kind."""
+
+
+class ImportTooLarge(ValueError):
+    """The uploaded file exceeds the configured byte cap."""
+
+# ───────────────────────── JSON walking ────────────────────────── #
+
+CHUNK_BYTES = 64 * 1024
+
+
+def _raw_chunks(data: bytes, max_bytes: int | None) -> Iterator[bytes]:
+    """``data`` in ``CHUNK_BYTES`` pieces; gzip'd uploads are inflated on the fly when
+    ``max_bytes`` is given (``!export_system gzip``), capped at that much output."""
+    view = memoryview(data)
+    if max_bytes is None or data[:2] != b"\x1f\x8b":
+        for start in range(0, len(view), CHUNK_BYTES):
+            yield view[start:start + CHUNK_BYTES]
+        return
+
+    inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    total = 0
+    try:
+        for start in range(0, len(view), CHUNK_BYTES):
+            pending = view[start:start + CHUNK_BYTES]
+            while pending:
+                out = inflater.decompress(pending, CHUNK_BYTES)
+                pending = inflater.unconsumed_tail
+                total += len(out)
+                if total > max_bytes:
+                    raise ImportTooLarge(f"more than {max_bytes} bytes once decompressed")
+                yield out
+    except zlib.error:
+        raise ImportFormatError("file looks gzip compressed but is corrupt") from None
+
+
+def _text_chunks(data: bytes, max_bytes: int | None = None) -> Iterator[str]:
+    """The upload as UTF‑8 text, decoded one chunk at a time."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pieces = _raw_chunks(data, max_bytes)
+    while True:
+        piece = next(pieces, None)
+        try:
+            text = decoder.decode(b"" if piece is None else piece, final=piece is None)
+        except UnicodeDecodeError:
+            raise ImportFormatError("file is not UTF-8 encoded JSON") from None
+        if text:
+            yield text
+        if piece is None:
+            return
+
+
+class _Cursor:
+    """Read position over a sliding window of the document text.
+
+    Text is pulled from ``chunks`` only when a value needs it, and everything before
+    the read position is dropped on each refill, so the window is one chunk plus the
+    largest single value being decoded – never the whole document.
+    """
+
+    __slots__ = ("chunks", "buf", "pos", "offset", "lines", "eof")
+
+    def __init__(self, chunks: Iterator[str]):
+        self.chunks = chunks
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0   # characters dropped from the front of ``buf``
+        self.lines = 0    # newlines among them
+        self.eof = False
+
+    @property
+    def where(self) -> int:
+        return self.offset + self.pos
+
+    def _more(self, want: int = CHUNK_BYTES) -> bool:
+        """Drop consumed text and append at least ``want`` characters; False at end of file."""
+        if self.eof:
+            return False
+        consumed = self.buf[:self.pos]
+        self.offset += self.pos
+        self.lines += consumed.count("\n")
+        parts = [self.buf[self.pos:]]
+        self.pos = 0
+        got = 0
+        for piece in self.chunks:
+            parts.append(piece)
+            got += len(piece)
+            if got >= want:
+                break
+        else:
+            self.eof = True
+        self.buf = "".join(parts)
+        return got > 0
+
+    def peek(self) -> str:
+        """The next non‑whitespace character ("" at end of file), without consuming it."""
+        while True:
+            buf, i = self.buf, self.pos
+            while i < len(buf) and buf[i] in _WS:
+                i += 1
+            self.pos = i
+            if i < len(buf):
+                return buf[i]
+            if not self._more():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ImportFormatError(f"expected '{char}' at offset {self.where}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # usually the value just runs past the window – grow it geometrically
+                if self._more(max(CHUNK_BYTES, len(self.buf))):
+                    continue
+                raise ImportFormatError(f"invalid JSON at line {self.lines + e.lineno}: {e.msg}") from None
+            if (isinstance(value, (int, float)) and not self.eof
+                    and _NUMBER_TAIL.issuperset(self.buf[end:]) and self._more()):
+                continue  # a number cut at the window edge ("1." / "1e") carries on in the next chunk
+            self.pos = end
+            return value
+
+    def skip_value(self) -> None:
+        self.value()
+
+
+def _iter_object(cur: _Cursor) -> Iterator[str]:
+    """Yield each key of the object at the cursor; the caller must consume its value."""
+    cur.expect("{")
+    if cur.peek() == "}":
+        cur.pos += 1
+        return
+    while True:
+        key = cur.value()
+        if not isinstance(key, str):
+            raise ImportFormatError(f"object keys must be strings (offset {cur.where})")
+        cur.expect(":")
+        yield key
+        if cur.peek() == ",":
+            cur.pos += 1
+            continue
+        cur.expect("}")
+        return
+
+
+def _iter_array(cur: _Cursor) -> Iterator[Any]:
+    """Yield each decoded element of the array at the cursor."""
+    cur.expect("[")
+    if cur.peek() == "]":
+        cur.pos += 1
+        return
+    while True:
+        yield cur.value()
+        if cur.peek() == ",":
+            cur.pos += 1
+            continue
+        cur.expect("]")
+        return
+
+
+def _peek(cur: _Cursor) -> str:
+    return cur.peek()
+
+
+def _finish(cur: _Cursor) -> None:
+    if cur.peek():
+        raise ImportFormatError(f"unexpected data after the JSON document (offset {cur.where})")
+
+# ───────────────────────── small helpers ───────────────────────── #
+
+def pk_colour(value: str | int | None, default: int | None = 0x8A2BE2) -> int | None:
+    """Convert PluralKit colour strings like "#ff00ff" to int; tolerate garbage."""
+    if not value:
+        return default
+    if isinstance(value, str):
+        try:
+            return int(value.replace("#", ""), 16)
+        except ValueError:
+            return default
+    return value  # already int
+
+
+def _require(cond: bool, message: str) -> None:
+    if not cond:
+        raise ImportFormatError(message)
+
+
+def _opt_str(obj: dict[str, Any], key: str, where: str) -> None:
+    value = obj.get(key)
+    _require(value is None or isinstance(value, str), f"{where}: `{key}` must be text")
+
+# ───────────────────────── PluralKit ───────────────────────────── #
+
+def _pk_system(pk: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "name":        pk.get("name", "Imported System"),
+        "description": pk.get("description"),
+        "pronouns":    pk.get("pronouns"),
+        "avatar":      pk.get("avatar_url"),
+        "banner":      pk.get("banner"),
+        "color":       pk_colour(pk.get("color"), None),
+        "tag":         pk.get("tag"),
+        "created_at":  pk.get("created"),
+        "front_history": [],
+        "system_avatar": pk.get("avatar_url"),
+        "system_banner": pk.get("banner"),
+        "privacy_settings": {
+            "show_front": True,
+            "show_member_count": True,
+            "allow_member_list": True,
+        },
+    }
+
+
+def _pk_validate_member(member: Any, index: int) -> str:
+    where = f"member #{index + 1}"
+    _require(isinstance(member, dict), f"{where} is not an object")
+    name = member.get("name", "Unknown")
+    _require(isinstance(name, str) and name.strip(), f"{where}: `name` must be non-empty text")
+    _require(len(name) <= MAX_NAME_LENGTH, f"{where}: name is longer than {MAX_NAME_LENGTH} characters")
+    for key in ("display_name", "pronouns", "description", "avatar_url", "banner", "birthday"):
+        _opt_str(member, key, where)
+    tags = member.get("proxy_tags", [])
+    _require(isinstance(tags, list) and all(isinstance(t, dict) for t in tags), f"{where}: `proxy_tags` must be a list")
+    return name
+
+
+def _proxy_text(pre: str | None, suf: str | None) -> str | None:
+    """Pixel's proxy notation for a prefix/suffix pair (None if both are empty)."""
+    pre, suf = pre or "", suf or ""
+    if pre and suf:
+        return f"{pre}...{suf}"
+    if pre:
+        return f"{pre} text"
+    if suf:
+        return f"text {suf}"
+    return None
+
+
+def pk_member_to_alter(member: dict[str, Any]) -> dict[str, Any]:
+    proxy_tags = member.get("proxy_tags", [])
+    proxy = None
+    if proxy_tags:
+        proxy = _proxy_text(proxy_tags[0].get("prefix"), proxy_tags[0].get("suffix"))
+
+    return {
+        "displayname": member.get("display_name") or None,
+        "pronouns":    member.get("pronouns"),
+        "description": member.get("description"),
+        "avatar":      member.get("avatar_url"),
+        "proxy_avatar": member.get("avatar_url"),
+        "banner":      member.get("banner"),
+        "proxy":       proxy,
+        "aliases":     [],
+        "color":       pk_colour(member.get("color"), None),
+        "use_embed":   True,
+        "created_at":  member.get("created"),
+        "role":        None,
+        "age":         None,
+        "birthday":    member.get("birthday"),
+        "front_time":  0,
+        "last_front":  None,
+        "privacy": {
+            "show_in_list": member.get("visibility", "public") == "public",
+            "allow_proxy":  True,
+        },
+    }
+
+
+def _pk_validate_group(group: Any, index: int) -> None:
+    where = f"group #{index + 1}"
+    _require(isinstance(group, dict), f"{where} is not an object")
+    gname = group.get("name", "Unknown Group")
+    _require(isinstance(gname, str) and gname.strip(), f"{where}: `name` must be non-empty text")
+    members = group.get("members", [])
+    _require(isinstance(members, list), f"{where}: `members` must be a list")
+
+
+def parse_pluralkit(data: bytes, existing_alters: set[str], existing_folders: set[str]) -> dict[str, Any]:
+    """Convert a PluralKit export into Pixel system/alters/folders.
+
+    Members whose name already exists in ``existing_alters`` are skipped, as are groups
+    already present in ``existing_folders``. Returns
+    ``{"system": dict | None, "alters": {...}, "folders": {...}, "members_seen": int}``.
+    """
+    cur = _Cursor(_text_chunks(data))
+    _require(_peek(cur) == "{", "a PluralKit export must be a JSON object")
+
+    system_fields: dict[str, Any] = {}
+    alters: dict[str, dict[str, Any]] = {}
+    folders: dict[str, dict[str, Any]] = {}
+    member_names: dict[Any, str] = {}  # uuid / short id → member name
+    groups: list[dict[str, Any]] = []
+    members_seen = 0
+
+    for key in _iter_object(cur):
+        if key == "members":
+            _require(_peek(cur) == "[", "`members` must be a list")
+            for index, member in enumerate(_iter_array(cur)):
+                name = _pk_validate_member(member, index)
+                members_seen += 1
+                for ref in (member.get("uuid"), member.get("id")):
+                    if ref:
+                        member_names.setdefault(ref, name)
+                if name in existing_alters or name in alters:
+                    continue
+                alters[name] = pk_member_to_alter(member)
+        elif key == "groups":
+            _require(_peek(cur) == "[", "`groups` must be a list")
+            for index, group in enumerate(_iter_array(cur)):
+                _pk_validate_group(group, index)
+                groups.append(group)
+        elif key == "switches":
+            # can be huge and Pixel doesn't import it – walk it without keeping anything
+            if _peek(cur) == "[":
+                for _ in _iter_array(cur):
+                    pass
+            else:
+                cur.skip_value()
+        else:
+            system_fields[key] = cur.value()
+    _finish(cur)
+
+    # ───── groups / folders ─────
+    # one dict lookup per group entry: O(total group entries), not groups × size × members
+    for group in groups:
+        gname = group.get("name", "Unknown Group")
+        if gname in existing_folders or gname in folders:
+            continue
+
+        folder_alters: list[str] = []
+        seen: set[str] = set()
+        for ref in group.get("members", []):
+            n = member_names.get(ref) if isinstance(ref, str) else None
+            if n and n not in seen:
+                seen.add(n)
+                folder_alters.append(n)
+
+        folders[gname] = {
+            "name":        gname,
+            "description": group.get("description"),
+            "color":       pk_colour(group.get("color"), None),
+            "alters":      folder_alters,
+        }
+
+    system = _pk_system(system_fields) if system_fields.get("name") else None
+    return {"system": system, "alters": alters, "folders": folders, "members_seen": members_seen}
+
+# ───────────────────────── Tupperbox ───────────────────────────── #
+
+def _tb_validate_tupper(tupper: Any, index: int) -> str:
+    where = f"tupper #{index + 1}"
+    _require(isinstance(tupper, dict), f"{where} is not an object")
+    name = tupper.get("name")
+    _require(isinstance(name, str) and name.strip(), f"{where}: `name` must be non-empty text")
+    _require(len(name) <= MAX_NAME_LENGTH, f"{where}: name is longer than {MAX_NAME_LENGTH} characters")
+    for key in ("nick", "description", "avatar_url", "birthday"):
+        _opt_str(tupper, key, where)
+    brackets = tupper.get("brackets", [])
+    _require(isinstance(brackets, list) and all(b is None or isinstance(b, str) for b in brackets),
+             f"{where}: `brackets` must be a list of text")
+    return name
+
+
+def tb_tupper_to_alter(tupper: dict[str, Any]) -> dict[str, Any]:
+    brackets = tupper.get("brackets") or []
+    proxy = _proxy_text(brackets[0], brackets[1] if len(brackets) > 1 else None) if brackets else None
+    return {
+        "displayname": tupper.get("nick") or None,
+        "pronouns":    None,
+        "description": tupper.get("description") or None,
+        "avatar":      tupper.get("avatar_url"),
+        "proxy_avatar": tupper.get("avatar_url"),
+        "banner":      None,
+        "proxy":       proxy,
+        "aliases":     [],
+        "color":       0x8A2BE2,
+        "use_embed":   True,
+        "created_at":  tupper.get("created_at"),
+        "role":        None,
+        "age":         None,
+        "birthday":    tupper.get("birthday"),
+        "front_time":  0,
+        "last_front":  None,
+        "privacy": {
+            "show_in_list": True,
+            "allow_proxy":  True,
+        },
+    }
+
+
+def parse_tupperbox(data: bytes) -> dict[str, Any]:
+    """Convert a Tupperbox ``tul!export`` file into Pixel alters/folders.
+
+    Tuppers become alters (first bracket pair → proxy), groups become folders.
+    Returns ``{"system": None, "alters": {...}, "folders": {...}, "members_seen": int}``.
+    """
+    cur = _Cursor(_text_chunks(data))
+    _require(_peek(cur) == "{", "a Tupperbox export must be a JSON object")
+
+    alters: dict[str, dict[str, Any]] = {}
+    group_of: dict[str, Any] = {}  # alter name → group id
+    groups: dict[Any, dict[str, Any]] = {}
+    members_seen = 0
+
+    for key in _iter_object(cur):
+        if key == "tuppers":
+            _require(_peek(cur) == "[", "`tuppers` must be a list")
+            for index, tupper in enumerate(_iter_array(cur)):
+                name = _tb_validate_tupper(tupper, index)
+                members_seen += 1
+                if name in alters:
+                    continue
+                alters[name] = tb_tupper_to_alter(tupper)
+                if tupper.get("group_id") is not None:
+                    group_of[name] = tupper["group_id"]
+        elif key == "groups":
+            _require(_peek(cur) == "[", "`groups` must be a list")
+            for index, group in enumerate(_iter_array(cur)):
+                _require(isinstance(group, dict), f"group #{index + 1} is not an object")
+                gname = group.get("name")
+                _require(isinstance(gname, str) and gname.strip(), f"group #{index + 1}: `name` must be non-empty text")
+                groups[group.get("id")] = group
+        else:
+            cur.skip_value()
+    _finish(cur)
+    _require(members_seen > 0 or groups, "no `tuppers` found – is this a Tupperbox export?")
+
+    folders: dict[str, dict[str, Any]] = {}
+    by_id: dict[Any, dict[str, Any]] = {}
+    for gid, group in groups.items():
+        if group["name"] in folders:
+            continue
+        folders[group["name"]] = by_id[gid] = {
+            "name":        group["name"],
+            "description": group.get("description") or None,
+            "color":       None,
+            "alters":      [],
+        }
+    for name, gid in group_of.items():
+        folder = by_id.get(gid)
+        if folder is not None:
+            folder["alters"].append(name)
+
+    return {"system": None, "alters": alters, "folders": folders, "members_seen": members_seen}
+
+# ───────────────────────── Pixel backups ───────────────────────── #
+
+_PIXEL_OBJECT_KEYS = ("system", "folders", "settings", "autoproxy")
+
+
+def parse_pixel(data: bytes, max_bytes: int | None = None) -> dict[str, Any]:
+    """Validate and load a Pixel ``!export_system`` backup into a profile dict.
+
+    With ``max_bytes`` set, gzip'd backups are inflated as they are read (up to that size).
+    """
+    cur = _Cursor(_text_chunks(data, max_bytes))
+    _require(_peek(cur) == "{", "a Pixel backup must be a JSON object")
+
+    profile: dict[str, Any] = {}
+    for key in _iter_object(cur):
+        if key == "alters":
+            _require(_peek(cur) == "{", "`alters` must be an object keyed by alter name")
+            alters: dict[str, Any] = {}
+            for name in _iter_object(cur):
+                alter = cur.value()
+                _require(name.strip() != "", "alter names must be non-empty")
+                _require(isinstance(alter, dict), f"alter {name!r} is not an object")
+                alters[name] = alter
+            profile["alters"] = alters
+        elif key == "_id":
+            cur.skip_value()  # MongoDB internals from older exports
+        else:
+            value = cur.value()
+            if key in _PIXEL_OBJECT_KEYS:
+                _require(isinstance(value, dict), f"`{key}` must be an object")
+            profile[key] = value
+    _finish(cur)
+
+    profile.setdefault("alters", {})
+    profile.setdefault("folders", {})
+    if profile.get("format") == FORMAT_NAME:
+        _upgrade_v2(profile)
+    return profile
+
+
+def _upgrade_v2(doc: dict[str, Any]) -> None:
+    """Turn a v2 export (possibly a delta) back into profile shape, in place."""
+    version = doc.pop("version", None)
+    _require(isinstance(version, int), "`version` must be a number")
+    _require(version <= SCHEMA_VERSION, f"this backup was made by a newer Pixel (format v{version})")
+    for key in ("format", "exported_at"):
+        doc.pop(key, None)
+    doc["alters"] = {name: expand_alter(name, alter) for name, alter in doc["alters"].items()}
+    since = doc.get("since")
+    _require(since is None or isinstance(since, str), "`since` must be a timestamp")
+    deleted = doc.get("deleted_alters", [])
+    _require(isinstance(deleted, list) and all(isinstance(n, str) for n in deleted),
+             "`deleted_alters` must be a list of names")
+
+# ───────────────────────── exports ─────────────────────────────── #
+
+class _SpillWriter(io.RawIOBase):
+    """Collects bytes in memory, moving to a private temp file past ``limit``."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.memory: io.BytesIO | None = io.BytesIO()
+        self.file = None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.memory is not None and self.memory.tell() + len(data) > self.limit:
+            self.file = tempfile.NamedTemporaryFile(prefix="pixel-export-", delete=False)
+            self.file.write(self.memory.getbuffer())
+            self.memory = None
+        (self.memory if self.memory is not None else self.file).write(data)
+        return len(data)
+
+
+def encode_export(snapshot: bytes, compress: bool, spool_bytes: int, since: str | None = None) -> bytes | str:
+    """Encode a pickled profile snapshot as a compact v2 export (optionally gzip'd).
+
+    With ``since`` (ISO timestamp) only alters changed after it – plus deletions – are
+    included. Returns the bytes, or – when the output is larger than ``spool_bytes`` –
+    the path of a private temp file holding them, which the caller opens and unlinks.
+    """
+    profile = build_export(pickle.loads(snapshot), parse_when(since) if since else None)
+    del snapshot
+    out = _SpillWriter(spool_bytes)
+    sink = gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6, mtime=0) if compress else out
+    try:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+        for chunk in encoder.iterencode(profile):
+            sink.write(chunk.encode("utf-8"))
+        if compress:
+            sink.close()  # writes the gzip trailer into ``out``
+    except BaseException:
+        if out.file is not None:
+            out.file.close()
+            os.unlink(out.file.name)
+        raise
+    if out.file is not None:
+        out.file.close()
+        return out.file.name
+    return out.memory.getvalue()
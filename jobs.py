@@ -0,0 +1,237 @@
+"""
+jobs.py – background job queue for heavy commands
+==================================================
+
+Key points
+----------
+* **Bounded** – jobs wait in a queue of ``JOB_QUEUE_SIZE`` and are run by
+  ``JOB_WORKERS`` worker tasks, so a burst of imports can't pile onto the loop.
+  Each user may have ``JOB_PER_USER`` jobs queued or running at once.
+* **Progress** – every job owns a status message in the invoking channel; the
+  command's work function calls ``await job.progress("…")`` and the message is edited
+  (throttled to one edit per ``JOB_PROGRESS_SECONDS``) until the final result.
+* **CPU off the loop** – ``await job_queue.run_cpu(fn, *args)`` runs pure, top‑level
+  functions (JSON decode/encode, PluralKit conversion) in a small process pool, so a
+  huge import doesn't hold the GIL the proxy pipeline needs. If the pool can't be
+  used the call falls back to a thread.
+
+Usage::
+
+    async def work(job: Job) -> str:
+        await job.progress("📥 Downloading…")
+        result = await job_queue.run_cpu(parse_pixel, raw)
+        return "✅ Done"
+
+    await job_queue.submit(ctx, "import_system", work)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable
+
+import discord
+from discord.ext import commands
+
+import metrics
+from loop_monitor import set_activity
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ───────────────────────── #
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "50"))
+JOB_PER_USER = int(os.getenv("JOB_PER_USER", "1"))
+JOB_PROCESSES = int(os.getenv("JOB_PROCESSES", "2"))  # 0 = run CPU steps in threads
+JOB_PROGRESS_SECONDS = float(os.getenv("JOB_PROGRESS_SECONDS", "2"))
+
+JOBS = metrics.Counter("pixel_jobs_total", "Background jobs by kind and outcome", ("kind", "status"))
+JOB_DURATION = metrics.Histogram(
+    "pixel_job_duration_seconds", "Background job run time (excluding queue wait)", ("kind",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+JOB_QUEUE_DEPTH = metrics.Gauge("pixel_job_queue_depth", "Jobs waiting for a worker")
+
+# ───────────────────────── jobs ────────────────────────────────── #
+
+Work = Callable[["Job"], Awaitable[str | None]]
+_ids = itertools.count(1)
+
+
+class Job:
+    __slots__ = ("id", "kind", "user_id", "ctx", "work", "status", "message",
+                 "created", "started", "_last_edit", "_pending_text", "_flusher")
+
+    def __init__(self, kind: str, ctx: commands.Context, work: Work):
+        self.id = next(_ids)
+        self.kind = kind
+        self.user_id = ctx.author.id
+        self.ctx = ctx
+        self.work = work
+        self.status = "queued"
+        self.message: discord.Message | None = None
+        self.created = time.monotonic()
+        self.started: float | None = None
+        self._last_edit = 0.0
+        self._pending_text: str | None = None
+        self._flusher: asyncio.Task | None = None
+
+    async def progress(self, text: str, *, force: bool = False) -> None:
+        """Show ``text`` on the status message; edits closer together than
+        ``JOB_PROGRESS_SECONDS`` are coalesced (latest text wins) unless ``force`` is set."""
+        now = time.monotonic()
+        if not force and now - self._last_edit < JOB_PROGRESS_SECONDS:
+            self._pending_text = text
+            if self._flusher is None:
+                self._flusher = asyncio.create_task(self._flush_later(self._last_edit + JOB_PROGRESS_SECONDS - now))
+            return
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        self._pending_text = None
+        self._last_edit = now
+        try:
+            if self.message is None:
+                self.message = await self.ctx.send(text)
+            else:
+                await self.message.edit(content=text)
+        except discord.HTTPException as e:
+            logger.warning(f"Job {self.id} ({self.kind}) could not update its status message: {e}")
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._flusher = None
+        if self._pending_text is not None:
+            await self.progress(self._pending_text, force=True)
+
+# ───────────────────────── queue ───────────────────────────────── #
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+class JobQueue:
+    def __init__(self):
+        self._queue: asyncio.Queue[Job] | None = None
+        self._workers: list[asyncio.Task] = []
+        self._active: dict[int, int] = {}  # user id → queued + running jobs
+        self._pool: ProcessPoolExecutor | None = None
+        JOB_QUEUE_DEPTH.set_function(lambda: self._queue.qsize() if self._queue else 0)
+
+    # ───── lifecycle ─────
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+        self._workers = [asyncio.create_task(self._worker(i), name=f"job-worker-{i}") for i in range(JOB_WORKERS)]
+        if JOB_PROCESSES > 0:
+            try:
+                # forkserver: never fork the live bot process (threads, sockets, event loop)
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(JOB_PROCESSES, mp_context=multiprocessing.get_context(method))
+                self._pool.submit(_warm_up)  # start the helpers now rather than on the first import
+            except (OSError, ValueError) as e:
+                logger.warning(f"Process pool unavailable, CPU-heavy job steps will use threads: {e}")
+                self._pool = None
+        logger.info(f"Job queue started ({JOB_WORKERS} workers, {JOB_PROCESSES} processes)")
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ───── submitting ─────
+    def active_for(self, user_id: int) -> int:
+        return self._active.get(user_id, 0)
+
+    async def submit(self, ctx: commands.Context, kind: str, work: Work) -> Job | None:
+        """Queue ``work`` and post its status message; replies and returns None if rejected."""
+        if self._queue is None:
+            self.start()
+        reason = None
+        if self.active_for(ctx.author.id) >= JOB_PER_USER:
+            reason = "You already have an import/export running – please wait for it to finish."
+        elif self._queue.full():
+            reason = "Pixel is busy with other imports/exports right now – please try again in a few minutes."
+        if reason:
+            JOBS.inc(kind=kind, status="rejected")
+            await ctx.send(f"❌ {reason}")
+            return None
+
+        # reserve the slot before awaiting, then post the status message before a
+        # worker can pick the job up so progress edits always have a message to edit
+        job = Job(kind, ctx, work)
+        self._active[job.user_id] = self.active_for(job.user_id) + 1
+        ahead = self._queue.qsize()
+        await job.progress(f"⏳ Queued – {ahead} job(s) ahead of you." if ahead else "⏳ Starting…", force=True)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._release(job)
+            JOBS.inc(kind=kind, status="rejected")
+            await job.progress("❌ Pixel is busy with other imports/exports right now – please try again in a few minutes.", force=True)
+            return None
+        return job
+
+    def _release(self, job: Job) -> None:
+        remaining = self._active.get(job.user_id, 1) - 1
+        if remaining > 0:
+            self._active[job.user_id] = remaining
+        else:
+            self._active.pop(job.user_id, None)
+
+    # ───── running ─────
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._release(job)
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        set_activity(f"job:{job.kind}")
+        job.status = "running"
+        job.started = time.monotonic()
+        try:
+            result = await job.work(job)
+            job.status = "done"
+            if result:
+                await job.progress(result, force=True)
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            logger.exception(f"Job {job.id} ({job.kind}) for {job.user_id} failed: {e}")
+            await job.progress(f"❌ Something went wrong while running `{job.kind}` – please try again.", force=True)
+        finally:
+            JOBS.inc(kind=job.kind, status=job.status)
+            JOB_DURATION.observe(time.monotonic() - job.started, kind=job.kind)
+
+    async def run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a picklable top‑level function in the process pool (thread if unavailable)."""
+        if self._pool is not None:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+            except BrokenProcessPool:
+                logger.error("Job process pool broke; falling back to threads")
+                self._pool = None
+        return await asyncio.to_thread(fn, *args)
+
+
+job_queue = JobQueue()
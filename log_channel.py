@@ -0,0 +1,208 @@
+"""
+log_channel.py – batched per‑guild log of proxied messages
+==========================================================
+
+Key points
+----------
+* **Opt‑in per guild** – ``!set_log_channel #channel`` stores ``log_channel`` in the
+  guild's settings (``guild_settings``); guilds without one cost a
+  cached dict lookup per proxied message.
+* **Batched** – entries (author, alter, jump link, a content preview) are buffered per
+  guild and flushed every ``LOG_FLUSH_SECONDS`` as messages of up to 10 embeds, so a
+  busy channel adds one log post per ten proxies instead of one per proxy.
+* **Backpressure** – each guild buffer holds at most ``LOG_BUFFER_PER_GUILD`` entries
+  (oldest dropped first). A 429 on a log channel puts that guild on hold for the
+  ``retry_after`` Discord sends (doubling on repeats, up to ``LOG_MAX_BACKOFF``) with
+  the batch put back. Each guild flushes in its own task, so a guild waiting out a 429
+  never delays the others (the bot sets ``max_ratelimit_timeout`` so long 429s raise
+  instead of sleeping inside ``channel.send``). A log channel that has gone missing or
+  lost permissions has its buffer dropped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import os
+import time
+from collections import deque
+from typing import Any
+
+import discord
+
+import guild_settings
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ───────────────────────── #
+
+LOG_FLUSH_SECONDS = float(os.getenv("LOG_FLUSH_SECONDS", "3"))
+LOG_BUFFER_PER_GUILD = int(os.getenv("LOG_BUFFER_PER_GUILD", "200"))
+LOG_MESSAGES_PER_FLUSH = int(os.getenv("LOG_MESSAGES_PER_FLUSH", "2"))  # per guild
+LOG_MAX_BACKOFF = 60.0
+EMBEDS_PER_MESSAGE = 10   # Discord's limit
+PREVIEW_CHARS = 450       # 10 embeds must stay under Discord's 6000 characters per message
+
+LOG_ENTRIES = metrics.Counter(
+    "pixel_log_channel_entries_total", "Proxy log-channel entries by outcome", ("outcome",)
+)
+LOG_BACKLOG = metrics.Gauge("pixel_log_channel_backlog", "Proxy log-channel entries waiting to be posted")
+LOG_RATE_LIMITED = metrics.Counter("pixel_log_channel_rate_limited_total", "429s while posting to log channels")
+
+# ───────────────────────── batcher ─────────────────────────────── #
+
+def _entry_embed(entry: dict[str, Any]) -> discord.Embed:
+    embed = discord.Embed(
+        description=entry["content"] or "*(attachment only)*",
+        color=entry["color"],
+        timestamp=entry["at"]
+    )
+    embed.set_author(name=entry["display"], icon_url=entry["avatar"])
+    embed.add_field(name="Account", value=f"<@{entry['user_id']}>", inline=True)
+    embed.add_field(name="Alter", value=entry["alter"], inline=True)
+    embed.add_field(name="Message", value=f"[Jump]({entry['jump_url']}) in <#{entry['channel_id']}>", inline=True)
+    embed.set_footer(text=f"Message ID: {entry['message_id']} • Original: {entry['original_id']}")
+    return embed
+
+
+class LogChannelBatcher:
+    def __init__(self):
+        self.bot = None
+        self._buffers: dict[int, deque[dict[str, Any]]] = {}
+        self._held_until: dict[int, float] = {}
+        self._backoff: dict[int, float] = {}
+        self._flushing: dict[int, asyncio.Task] = {}
+        self._task: asyncio.Task | None = None
+        LOG_BACKLOG.set_function(lambda: sum(len(b) for b in self._buffers.values()))
+
+    # ───── lifecycle ─────
+    def start(self, bot) -> None:
+        self.bot = bot
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="log-channel-flush")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await asyncio.wait_for(self.flush(), timeout=5)  # best effort on shutdown
+        except Exception:
+            pass
+        for task in list(self._flushing.values()):
+            task.cancel()
+
+    def forget_guild(self, guild_id: int) -> None:
+        self._buffers.pop(guild_id, None)
+        self._held_until.pop(guild_id, None)
+        self._backoff.pop(guild_id, None)
+
+    # ───── producing ─────
+    async def record(self, msg: discord.Message, sent: discord.Message, alter: str,
+                     display: str, avatar: str | None, content: str | None, color: int | None) -> None:
+        """Queue a log entry for a proxied message if the guild has a log channel."""
+        if msg.guild is None:
+            return
+        if not await guild_settings.get(msg.guild.id, "log_channel"):
+            return
+
+        buffer = self._buffers.get(msg.guild.id)
+        if buffer is None:
+            buffer = self._buffers[msg.guild.id] = deque(maxlen=LOG_BUFFER_PER_GUILD)
+        if len(buffer) == buffer.maxlen:
+            LOG_ENTRIES.inc(outcome="overflow")  # the oldest entry falls off
+        content = content or ""
+        buffer.append({
+            "user_id": msg.author.id,
+            "alter": alter,
+            "display": display[:256],
+            "avatar": avatar,
+            "color": color or 0x8A2BE2,
+            "content": content if len(content) <= PREVIEW_CHARS else content[:PREVIEW_CHARS - 1] + "…",
+            "channel_id": msg.channel.id,
+            "message_id": sent.id,
+            "original_id": msg.id,
+            "jump_url": f"https://discord.com/channels/{msg.guild.id}/{msg.channel.id}/{sent.id}",
+            "at": datetime.datetime.now(datetime.timezone.utc),
+        })
+
+    # ───── flushing ─────
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(LOG_FLUSH_SECONDS)
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start a flush task for every guild that has entries, isn't held and isn't already flushing."""
+        now = time.monotonic()
+        for guild_id in list(self._buffers):
+            if guild_id in self._flushing or self._held_until.get(guild_id, 0) > now:
+                continue
+            self._flushing[guild_id] = asyncio.create_task(
+                self._flush_task(guild_id), name=f"log-channel-flush-{guild_id}"
+            )
+
+    async def _flush_task(self, guild_id: int) -> None:
+        try:
+            await self._flush_guild(guild_id)
+        except Exception as e:
+            logger.error(f"Log channel flush for guild {guild_id} failed: {e}")
+        finally:
+            self._flushing.pop(guild_id, None)
+
+    async def flush(self) -> None:
+        """Flush every guild that can be flushed now and wait for all in‑flight flushes."""
+        self._dispatch()
+        if self._flushing:
+            await asyncio.gather(*self._flushing.values(), return_exceptions=True)
+
+    async def _flush_guild(self, guild_id: int) -> None:
+        buffer = self._buffers.get(guild_id)
+        if not buffer:
+            self._buffers.pop(guild_id, None)
+            return
+        channel_id = await guild_settings.get(guild_id, "log_channel")
+        channel = self.bot.get_channel(int(channel_id)) if channel_id and self.bot else None
+        if channel is None:
+            LOG_ENTRIES.inc(len(buffer), outcome="unavailable")
+            self.forget_guild(guild_id)
+            return
+
+        for _ in range(LOG_MESSAGES_PER_FLUSH):
+            if not buffer:
+                break
+            batch = [buffer.popleft() for _ in range(min(EMBEDS_PER_MESSAGE, len(buffer)))]
+            try:
+                await channel.send(embeds=[_entry_embed(e) for e in batch],
+                                   allowed_mentions=discord.AllowedMentions.none())
+            except (discord.Forbidden, discord.NotFound) as e:
+                logger.warning(f"Log channel {channel_id} in guild {guild_id} unusable, dropping entries: {e}")
+                LOG_ENTRIES.inc(len(batch) + len(buffer), outcome="unavailable")
+                self.forget_guild(guild_id)
+                return
+            except (discord.RateLimited, discord.HTTPException) as e:
+                buffer.extendleft(reversed(batch))  # retry these first
+                if isinstance(e, discord.RateLimited) or e.status == 429:
+                    LOG_RATE_LIMITED.inc()
+                    self._hold(guild_id, float(getattr(e, "retry_after", 0) or 0))
+                else:
+                    logger.warning(f"Posting to log channel {channel_id} failed: {e}")
+                return
+            LOG_ENTRIES.inc(len(batch), outcome="sent")
+            self._backoff.pop(guild_id, None)
+            self._held_until.pop(guild_id, None)
+
+        if not buffer:
+            self._buffers.pop(guild_id, None)
+
+    def _hold(self, guild_id: int, retry_after: float) -> None:
+        """Pause a rate‑limited guild: Discord's retry_after, doubling on repeated 429s."""
+        backoff = min(LOG_MAX_BACKOFF, max(self._backoff.get(guild_id, LOG_FLUSH_SECONDS / 2) * 2, retry_after))
+        self._backoff[guild_id] = backoff
+        self._held_until[guild_id] = time.monotonic() + backoff
+
+
+log_channel = LogChannelBatcher()
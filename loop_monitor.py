@@ -0,0 +1,140 @@
+"""
+loop_monitor.py – event‑loop lag sampler and slow‑callback detector
+===================================================================
+
+Key points
+----------
+* **Lag sampler** – sleeps ``LOOP_SAMPLE_SECONDS`` and measures how late it woke up.
+  Samples feed the Prometheus histogram and a short in‑memory window for ``!pixel``.
+* **Slow‑callback reporter** (opt‑in, ``SLOW_CALLBACK_MS``) – times every callback the
+  loop runs, the same way asyncio debug mode's ``slow_callback_duration`` does, but
+  without the rest of debug mode's overhead. Stalls are attributed to the command or
+  handler that was running via the ``current_activity`` context variable (set by
+  ``on_message`` and by the tracing ``before_invoke`` hook).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import deque
+from typing import Any
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ───────────────────────── #
+
+SAMPLE_SECONDS = float(os.getenv("LOOP_SAMPLE_SECONDS", "0.5"))
+SLOW_CALLBACK_MS = float(os.getenv("SLOW_CALLBACK_MS", "0"))  # 0 = reporter disabled
+WINDOW_SECONDS = 300
+
+SLOW_CALLBACKS = metrics.Counter(
+    "pixel_slow_callbacks_total", "Event loop callbacks slower than SLOW_CALLBACK_MS", ("activity",)
+)
+
+# ───────────────────────── activity labels ─────────────────────── #
+
+current_activity: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_activity", default=None)
+
+
+def set_activity(label: str) -> None:
+    """Label the current task (and anything it spawns) for stall attribution."""
+    current_activity.set(label)
+
+
+def _describe(handle: asyncio.Handle) -> tuple[str, str]:
+    """Return (activity, callback) for a handle that just ran."""
+    activity = None
+    try:
+        activity = handle._context.get(current_activity)
+    except AttributeError:
+        pass
+
+    callback = getattr(handle, "_callback", None)
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        where = getattr(coro, "__qualname__", None) or repr(coro)
+        return activity or task.get_name(), where
+    return activity or "loop", getattr(callback, "__qualname__", None) or repr(callback)
+
+# ───────────────────────── monitor ─────────────────────────────── #
+
+class LoopMonitor:
+    def __init__(self):
+        self.samples: deque[float] = deque(maxlen=max(1, int(WINDOW_SECONDS / SAMPLE_SECONDS)))
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=50)
+        self._sampler: asyncio.Task | None = None
+        self._original_run = None
+
+    # ───── lag sampler ─────
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + SAMPLE_SECONDS
+            await asyncio.sleep(SAMPLE_SECONDS)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            metrics.LOOP_LAG.observe(lag)
+            metrics.LOOP_LAG_LAST.set(lag)
+
+    def lag_summary(self) -> dict[str, float]:
+        """p50 / p99 / max lag in seconds over the recent window."""
+        if not self.samples:
+            return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+        ordered = sorted(self.samples)
+        n = len(ordered)
+        return {
+            "p50": ordered[n // 2],
+            "p99": ordered[min(n - 1, int(n * 0.99))],
+            "max": ordered[-1],
+        }
+
+    # ───── slow‑callback reporter ─────
+    def _install_reporter(self, threshold: float) -> None:
+        original = asyncio.events.Handle._run
+        monitor = self
+
+        def _run(handle: asyncio.Handle) -> None:
+            start = time.perf_counter()
+            original(handle)
+            elapsed = time.perf_counter() - start
+            if elapsed >= threshold:
+                monitor._report(handle, elapsed)
+
+        self._original_run = original
+        asyncio.events.Handle._run = _run
+
+    def _report(self, handle: asyncio.Handle, elapsed: float) -> None:
+        activity, callback = _describe(handle)
+        SLOW_CALLBACKS.inc(activity=activity)
+        self.stalls.append({"at": time.time(), "seconds": elapsed, "activity": activity, "callback": callback})
+        logger.warning(f"Event loop blocked for {elapsed * 1000:.0f} ms in {activity} ({callback})")
+
+    def recent_stalls(self, within: float = 3600) -> list[dict[str, Any]]:
+        cutoff = time.time() - within
+        return [s for s in self.stalls if s["at"] >= cutoff]
+
+    # ───── lifecycle ─────
+    def start(self) -> None:
+        if self._sampler is None:
+            self._sampler = asyncio.create_task(self._sample())
+        if SLOW_CALLBACK_MS > 0 and self._original_run is None:
+            self._install_reporter(SLOW_CALLBACK_MS / 1000)
+            logger.info(f"Slow callback reporter enabled (>{SLOW_CALLBACK_MS:.0f} ms)")
+
+    def stop(self) -> None:
+        if self._sampler:
+            self._sampler.cancel()
+            self._sampler = None
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+
+loop_monitor = LoopMonitor()
@@ -11,10 +11,22 @@ from data_manager import data_manager         # db
 from system_commands  import setup_system_commands
 from alter_commands   import setup_alter_commands
 from folder_commands  import setup_folder_commands
+from bulk_commands    import setup_bulk_commands
+from front_commands   import setup_front_commands
 from admin_commands   import setup_admin_commands
 from utility_commands import setup_utility_commands
 from proxy_handler    import setup_proxy_handler
+from proxy_message_commands import setup_proxy_message_commands
+from metrics          import setup_metrics, MetricsServer
+from health           import setup_health_checks
+from loop_monitor     import loop_monitor
+from tracing          import setup_tracing, start_export, stop_export
+from http_client      import http_client
+from jobs             import job_queue
+from log_channel      import log_channel
 import import_export                           
+import guild_settings
+import sharding
 
 # ─── load environment variables  ──────────────────────── #
 load_dotenv()
@@ -27,8 +39,15 @@ intents.messages = True
 intents.guilds = True
 intents.message_content = True
 
-# Initialize the bot
-bot = commands.Bot(command_prefix="!", intents=intents, case_insensitive=True)
+# Initialize the bot (AutoShardedBot when SHARD_COUNT / SHARD_IDS are set)
+bot = sharding.create_bot(
+    command_prefix=guild_settings.command_prefix,
+    intents=intents,
+    case_insensitive=True,
+    # 429s longer than this raise RateLimited instead of sleeping inside the request
+    # (30 s is discord.py's minimum), so e.g. log_channel can hold just that guild
+    max_ratelimit_timeout=float(os.getenv("MAX_RATELIMIT_TIMEOUT", "30")),
+)
 bot.remove_command("help")
 
 # Set up status options optimized for DID/OSDD systems
@@ -58,6 +77,7 @@ async def on_ready():
 async def on_guild_remove(guild):
     """Clean up server data when the bot leaves a guild."""
     gid = str(guild.id)
+    log_channel.forget_guild(guild.id)
     try:
         # Clear any blacklist docs that reference the guild
         await data_manager.save_blacklist("channel",  gid, {})
@@ -81,15 +101,32 @@ async def update_status():
 async def main():
     """Initialize database, register commands, and start the bot."""
     await data_manager.initialize()               # connect to MongoDB 
+    await guild_settings.import_legacy_suggestion_channels()  # one-off move off suggestion_channels.json
 
     # Register every command group once
     setup_system_commands(bot)
     setup_alter_commands(bot)
     setup_folder_commands(bot)
+    setup_bulk_commands(bot)
+    setup_front_commands(bot)
     setup_admin_commands(bot)
     import_export.setup_import_export(bot)       
     setup_utility_commands(bot)
     setup_proxy_handler(bot)
+    setup_proxy_message_commands(bot)
+    setup_metrics(bot)
+    sharding.setup_sharding(bot)
+    setup_tracing(bot)
+    await http_client.start()                   # pooled outbound HTTP (avatars, imports, OTLP)
+    job_queue.start()                           # imports / exports / bulk ops
+    log_channel.start(bot)                      # batched proxy log channels
+    loop_monitor.start()
+    start_export()
+
+    # Prometheus + /livez + /readyz endpoints (METRICS_PORT, default 9091)
+    metrics_server = MetricsServer(bot)
+    setup_health_checks(bot, metrics_server.app)
+    await metrics_server.start()
 
     try:
         await bot.start(os.getenv("DISCORD_TOKEN"))
@@ -98,6 +135,13 @@ async def main():
     except Exception as e:
         print(f"❌ Bot encountered an error: {e}")
     finally:
+        await metrics_server.stop()
+        await stop_export()
+        await job_queue.stop()
+        await log_channel.stop()
+        await http_client.close()
+        loop_monitor.stop()
+
         # Clean up MongoDB connection only on actual shutdown
         print("🔌 Closing MongoDB connection...")
         await data_manager.close_connection()
@@ -0,0 +1,158 @@
+"""
+member_list.py – sorted, visibility‑filtered member listing behind ``!list``
+============================================================================
+
+Key points
+----------
+* **Maintained, not re‑sorted** – each profile's listing keeps its visible alters in
+  name order (``bisect``‑maintained). When the profile version moves, ``refresh``
+  re‑files only the alters whose listed fields changed, the same way
+  ``search_index`` does.
+* **Other orders on demand** – ``created`` / ``newest`` / ``role`` orders and
+  role / folder filters are derived from the name order the first time they are asked
+  for and then reused until the profile changes (a few per profile).
+* **Pages are rendered lazily** – ``!list`` keeps only a reference to the ordered
+  names; ``page_lines`` formats just the requested page when a button is pressed.
+"""
+
+from __future__ import annotations
+
+import bisect
+import datetime
+import os
+from collections import OrderedDict
+from typing import Any
+
+from data_manager import data_manager
+from export_format import parse_when
+
+MEMBER_LIST_PROFILES = int(os.getenv("MEMBER_LIST_PROFILES", "256"))
+PAGE_SIZE = 15
+SORTS = ("name", "created", "newest", "role")
+_DERIVED_VIEWS = 8  # cached (sort, role, folder) combinations per profile
+
+_NEVER = datetime.datetime.max
+
+
+def _created_key(value: Any) -> datetime.datetime:
+    if not isinstance(value, str) or not value:
+        return _NEVER  # unknown creation dates go last
+    try:
+        return parse_when(value)
+    except ValueError:
+        return _NEVER
+
+
+def _listed_fields(alter: Any) -> tuple[bool, str, Any]:
+    """(visible, casefolded role, created_at) – what the listing depends on."""
+    if not isinstance(alter, dict):
+        return (True, "", None)
+    privacy = alter.get("privacy") or {}
+    role = alter.get("role")
+    return (
+        bool(privacy.get("show_in_list", True)),
+        role.casefold() if isinstance(role, str) else "",
+        alter.get("created_at"),
+    )
+
+
+class MemberListing:
+    __slots__ = ("version", "fields", "created", "by_name", "views")
+
+    def __init__(self):
+        self.version = -1
+        self.fields: dict[str, tuple[bool, str, Any]] = {}
+        self.created: dict[str, datetime.datetime] = {}
+        self.by_name: list[tuple[str, str]] = []  # (casefolded name, name) of visible alters
+        self.views: OrderedDict[tuple, list[str]] = OrderedDict()
+
+    def refresh(self, alters: dict[str, Any], version: int) -> None:
+        for name in [n for n in self.fields if n not in alters]:
+            self._file(name, None)
+        for name, alter in alters.items():
+            fields = _listed_fields(alter)
+            if self.fields.get(name) != fields:
+                self._file(name, fields)
+        self.views.clear()  # folders, roles or dates may have moved
+        self.version = version
+
+    def _file(self, name: str, fields: tuple[bool, str, Any] | None) -> None:
+        key = (name.casefold(), name)
+        old = self.fields.pop(name, None)
+        if old is not None and old[0]:
+            i = bisect.bisect_left(self.by_name, key)
+            if i < len(self.by_name) and self.by_name[i] == key:
+                del self.by_name[i]
+        self.created.pop(name, None)
+        if fields is not None:
+            self.fields[name] = fields
+            self.created[name] = _created_key(fields[2])
+            if fields[0]:
+                bisect.insort(self.by_name, key)
+
+    @property
+    def visible(self) -> int:
+        return len(self.by_name)
+
+    def names(self, profile: dict[str, Any], sort: str = "name", role: str | None = None,
+              folder: str | None = None) -> list[str]:
+        """Visible alter names in ``sort`` order, optionally limited to a role / folder."""
+        view = (sort, role.casefold() if role else None, folder)
+        cached = self.views.get(view)
+        if cached is not None:
+            self.views.move_to_end(view)
+            return cached
+
+        names = [n for _, n in self.by_name]
+        if view[1] is not None:
+            names = [n for n in names if self.fields[n][1] == view[1]]
+        if folder is not None:
+            members = set(((profile.get("folders") or {}).get(folder) or {}).get("alters") or ())
+            names = [n for n in names if n in members]
+        if sort in ("created", "newest"):
+            created = self.created
+            dated = [n for n in names if created[n] is not _NEVER]
+            dated.sort(key=created.__getitem__, reverse=sort == "newest")
+            names = dated + [n for n in names if created[n] is _NEVER]  # undated last
+        elif sort == "role":
+            names.sort(key=lambda n: (self.fields[n][1] == "", self.fields[n][1]))
+
+        self.views[view] = names
+        if len(self.views) > _DERIVED_VIEWS:
+            self.views.popitem(last=False)
+        return names
+
+
+_listings: OrderedDict[str, MemberListing] = OrderedDict()
+
+
+def listing_for(user_id: str, profile: dict[str, Any]) -> MemberListing:
+    user_id = str(user_id)
+    version = data_manager.profile_version(user_id)
+    listing = _listings.get(user_id)
+    if listing is None:
+        listing = _listings[user_id] = MemberListing()
+        if len(_listings) > MEMBER_LIST_PROFILES:
+            _listings.popitem(last=False)
+    if listing.version != version:
+        listing.refresh(profile.get("alters") or {}, version)
+    _listings.move_to_end(user_id)
+    return listing
+
+
+def page_count(names: list[str]) -> int:
+    return max(1, -(-len(names) // PAGE_SIZE))
+
+
+def page_lines(profile: dict[str, Any], names: list[str], page: int) -> list[str]:
+    """Format one page; alters deleted since the listing was taken are skipped."""
+    alters = profile.get("alters") or {}
+    lines = []
+    for name in names[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]:
+        alter = alters.get(name)
+        if not isinstance(alter, dict):
+            continue
+        role_text = f" ({alter['role']})" if alter.get("role") else ""
+        proxy_text = alter.get("proxy") or "No proxy set"
+        lines.append(f"• **{name}**{role_text} — `{proxy_text}`")
+    return lines
@@ -0,0 +1,296 @@
+"""
+metrics.py – Prometheus‑compatible instrumentation for Pixel
+============================================================
+
+Key points
+----------
+* **Zero extra dependencies** – counters, gauges and histograms are rendered in the
+  Prometheus text format by hand and served by the aiohttp server we already ship.
+* **Reusable** – every module imports the metric objects it needs from here, e.g.
+  ``metrics.CACHE_HITS.inc(cache="profiles")`` or
+  ``with metrics.timed(metrics.MONGO_LATENCY, op="find_one"): ...``.
+* **Cheap** – an update is a dict lookup plus an add; nothing is formatted until
+  ``/metrics`` is scraped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import math
+import os
+import resource
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from aiohttp import web
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── metric types ────────────────────────── #
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _label_str(self, key: tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for key, val in self._values.items():
+            lines.append(f"{self.name}{self._label_str(key)} {val}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Compute the (unlabelled) value lazily at scrape time."""
+        self._function = fn
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        if self._function is not None:
+            try:
+                val = float(self._function())
+            except Exception:
+                val = math.nan
+            lines.append(f"{self.name} {val}")
+        for key, val in self._values.items():
+            lines.append(f"{self.name}{self._label_str(key)} {val}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label key: [bucket counts..., sum, count]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        row = self._values.get(key)
+        if row is None:
+            row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+        idx = bisect.bisect_left(self.buckets, value)
+        if idx < len(self.buckets):
+            row[idx] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for key, row in self._values.items():
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = self._label_str(key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = self._label_str(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {row[-1]}")
+            lines.append(f"{self.name}_sum{self._label_str(key)} {row[-2]}")
+            lines.append(f"{self.name}_count{self._label_str(key)} {row[-1]}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels: Any) -> Iterator[None]:
+    """Observe the wall time of the wrapped block (works around ``await`` too)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def render_all() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# ───────────────────────── shared metrics ──────────────────────── #
+
+# proxy pipeline
+MESSAGES_SEEN = Counter("pixel_messages_seen_total", "Non-bot messages received by on_message")
+MESSAGES_PROXIED = Counter("pixel_messages_proxied_total", "Messages re-sent through a proxy webhook", ("mode",))
+MESSAGE_ROUTES = Counter("pixel_message_routes_total", "How on_message classified each message", ("route",))
+FASTPATH_SKIPS = Counter("pixel_proxy_fastpath_skips_total", "Messages dropped before proxy matching", ("reason",))
+PROXY_LATENCY = Histogram("pixel_proxy_latency_seconds", "on_message to webhook send completed")
+
+# data layer
+CACHE_HITS = Counter("pixel_cache_hits_total", "Cache lookups served from memory", ("cache",))
+CACHE_MISSES = Counter("pixel_cache_misses_total", "Cache lookups that fell through", ("cache",))
+MONGO_LATENCY = Histogram("pixel_mongo_op_seconds", "MongoDB operation latency", ("op",))
+MONGO_ERRORS = Counter("pixel_mongo_errors_total", "MongoDB operations that raised", ("op",))
+
+# discord
+WEBHOOK_CALLS = Counter("pixel_webhook_calls_total", "Webhook REST calls made by the proxy", ("op",))
+RATE_LIMITED = Counter("pixel_discord_rate_limited_total", "429 responses reported by discord.py", ("source",))
+COMMANDS = Counter("pixel_commands_total", "Prefix commands invoked", ("command", "status"))
+GATEWAY_LATENCY = Gauge("pixel_gateway_latency_seconds", "Discord gateway heartbeat latency")
+GUILDS = Gauge("pixel_guilds", "Guilds the bot is currently in")
+
+# process
+LOOP_LAG = Histogram(
+    "pixel_event_loop_lag_seconds", "Event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+LOOP_LAG_LAST = Gauge("pixel_event_loop_lag_last_seconds", "Most recent event loop lag sample")
+PROCESS_RSS = Gauge("pixel_process_resident_memory_bytes", "Resident set size of the bot process")
+
+# ───────────────────────── discord.py hooks ────────────────────── #
+
+class _RateLimitLogHandler(logging.Handler):
+    """discord.py retries 429s internally and only reports them through its loggers."""
+
+    def __init__(self, source: str):
+        super().__init__(level=logging.WARNING)
+        self.source = source
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if "rate limit" in str(record.msg).lower():
+            RATE_LIMITED.inc(source=self.source)
+
+
+def _install_rate_limit_handlers() -> None:
+    for logger_name, source in (("discord.http", "http"), ("discord.webhook.async_", "webhook")):
+        target = logging.getLogger(logger_name)
+        if not any(isinstance(h, _RateLimitLogHandler) for h in target.handlers):
+            target.addHandler(_RateLimitLogHandler(source))
+
+
+def setup_metrics(bot: commands.Bot) -> None:
+    """Register command counters and bot‑level gauges."""
+    _install_rate_limit_handlers()
+    GATEWAY_LATENCY.set_function(lambda: bot.latency)
+    GUILDS.set_function(lambda: len(bot.guilds))
+
+    @bot.listen("on_command_completion")
+    async def _count_command_ok(ctx: commands.Context):
+        COMMANDS.inc(command=ctx.command.qualified_name, status="ok")
+
+    @bot.listen("on_command_error")
+    async def _count_command_error(ctx: commands.Context, error: Exception):
+        name = ctx.command.qualified_name if ctx.command else "unknown"
+        COMMANDS.inc(command=name, status=type(error).__name__)
+
+# ───────────────────────── process sampling ────────────────────── #
+
+def _read_rss() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak, in KiB on Linux – close enough off‑Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def _sample_process(interval: float) -> None:
+    # loop lag is sampled by loop_monitor.py
+    while True:
+        PROCESS_RSS.set(_read_rss())
+        await asyncio.sleep(interval)
+
+# ───────────────────────── HTTP server ─────────────────────────── #
+
+class MetricsServer:
+    """Embedded aiohttp server exposing ``/metrics``; owned by ``main.main``.
+
+    Other modules may add routes to ``self.app`` before ``start()`` (see health.py).
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.host = os.getenv("METRICS_HOST", "0.0.0.0")
+        self.port = int(os.getenv("METRICS_PORT", "9091"))
+        self.app = web.Application()
+        self.app.router.add_get("/metrics", self._handle_metrics)
+        self._runner: web.AppRunner | None = None
+        self._sampler: asyncio.Task | None = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=render_all(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def start(self) -> None:
+        self._sampler = asyncio.create_task(_sample_process(1.0))
+        if self.port <= 0:
+            logger.info("METRICS_PORT disabled; metrics are collected but not served")
+            return
+
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            logger.info(f"Metrics server listening on {self.host}:{self.port}")
+        except OSError as e:
+            logger.error(f"Could not start metrics server on port {self.port}: {e}")
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def stop(self) -> None:
+        if self._sampler:
+            self._sampler.cancel()
+            self._sampler = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,226 @@
+"""
+profile_links.py – references to alters from elsewhere in a profile
+===================================================================
+
+Key points
+----------
+* **Reverse index** – folders store member names as plain strings; ``folders_of``
+  answers "which folders is this alter in?" from an alter → folders map maintained
+  per folder: edits re‑index only the folders they touch, and a full build happens
+  only on a cache miss or when the profile is reloaded.
+* **Cascading rename / delete** – ``rename_alter`` and ``delete_alters`` update the
+  alter itself, every folder that lists it, the current front and every autoproxy
+  front / latch reference in one ``data_manager.update_user_profile`` call, so a rename or delete
+  can't leave dangling names behind.
+* Autoproxy config comes in two shapes (per‑scope ``{"<guild id>|global": {...}}`` from
+  the proxy handler, and the flat ``{"mode", "alter", "last_proxied"}`` written by
+  ``!autoproxy`` in alter_commands); both are handled.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from data_manager import data_manager
+from export_format import expired_tombstones, now_iso
+
+LINK_INDEX_PROFILES = int(os.getenv("LINK_INDEX_PROFILES", "256"))
+
+_AUTOPROXY_REFS = ("alter", "last_proxied")
+
+# ───────────────────────── reverse index ───────────────────────── #
+
+def _members(folder: Any) -> list[str] | None:
+    return folder.get("alters") if isinstance(folder, dict) else None
+
+
+class _FolderIndex:
+    """alter → folders for one profile, kept in step with its ``folders`` dict.
+
+    Each folder's member list is remembered by identity plus a snapshot of what was
+    indexed. A version bump costs one identity/length check per folder, and only the
+    folders whose list was replaced (targeted ``$set``s) or resized are re‑indexed.
+    Commands that edit a list in place call ``folder_changed`` right away.
+    """
+
+    __slots__ = ("version", "folders", "indexed", "by_alter")
+
+    def __init__(self, folders: dict[str, Any]):
+        self.version = -1
+        self.folders = folders
+        self.indexed: dict[str, tuple[list[str] | None, tuple[str, ...]]] = {}
+        self.by_alter: dict[str, set[str]] = {}
+        for folder_name, folder in folders.items():
+            self._add(folder_name, _members(folder))
+
+    def _add(self, folder_name: str, members: list[str] | None) -> None:
+        snapshot = tuple(members or ())
+        self.indexed[folder_name] = (members, snapshot)
+        for alter_name in snapshot:
+            self.by_alter.setdefault(alter_name, set()).add(folder_name)
+
+    def _drop(self, folder_name: str) -> None:
+        _, snapshot = self.indexed.pop(folder_name, (None, ()))
+        for alter_name in snapshot:
+            names = self.by_alter.get(alter_name)
+            if names is not None:
+                names.discard(folder_name)
+                if not names:
+                    del self.by_alter[alter_name]
+
+    def reindex(self, folder_name: str) -> None:
+        self._drop(folder_name)
+        if folder_name in self.folders:
+            self._add(folder_name, _members(self.folders[folder_name]))
+
+    def refresh(self) -> None:
+        for folder_name, (members, snapshot) in list(self.indexed.items()):
+            current = _members(self.folders.get(folder_name))
+            if current is not members or len(current or ()) != len(snapshot):
+                self.reindex(folder_name)
+        for folder_name in self.folders.keys() - self.indexed.keys():
+            self._add(folder_name, _members(self.folders[folder_name]))
+
+
+_indexes: OrderedDict[str, _FolderIndex] = OrderedDict()
+_NO_FOLDERS: dict[str, Any] = {}  # stands in for a missing ``folders`` (never modified)
+
+
+def _index_for(user_id: str, profile: dict[str, Any]) -> _FolderIndex:
+    """The profile's index; built on a miss or when the profile was reloaded, else refreshed."""
+    user_id = str(user_id)
+    folders = profile.get("folders")
+    if not isinstance(folders, dict):
+        folders = _NO_FOLDERS
+    version = data_manager.profile_version(user_id)
+    index = _indexes.get(user_id)
+    if index is None or index.folders is not folders:
+        index = _indexes[user_id] = _FolderIndex(folders)
+        if len(_indexes) > LINK_INDEX_PROFILES:
+            _indexes.popitem(last=False)
+    elif index.version != version:
+        index.refresh()
+    index.version = version
+    _indexes.move_to_end(user_id)
+    return index
+
+
+def folder_changed(user_id: str, profile: dict[str, Any], *folder_names: str) -> None:
+    """Re‑index folders whose member list was edited in place (or that were created,
+    renamed or deleted); call it right after the change."""
+    index = _indexes.get(str(user_id))
+    if index is None or index.folders is not profile.get("folders"):
+        return  # built fresh on next use
+    for folder_name in folder_names:
+        index.reindex(folder_name)
+
+
+def folders_of(user_id: str, profile: dict[str, Any], alter_name: str) -> frozenset[str]:
+    """Names of the folders that list ``alter_name``."""
+    return frozenset(_index_for(user_id, profile).by_alter.get(alter_name, ()))
+
+
+def in_folder(user_id: str, profile: dict[str, Any], folder_name: str, alter_name: str) -> bool:
+    return folder_name in _index_for(user_id, profile).by_alter.get(alter_name, ())
+
+# ───────────────────────── cascades ────────────────────────────── #
+
+def _autoproxy_changes(profile: dict[str, Any], renames: dict[str, str | None]) -> dict[tuple, Any]:
+    """``$set`` paths that repoint (or clear, for ``None``) autoproxy references."""
+    sets: dict[tuple, Any] = {}
+    store = profile.get("autoproxy")
+    if not isinstance(store, dict):
+        return sets
+
+    def visit(conf: dict[str, Any], prefix: tuple) -> None:
+        for field in _AUTOPROXY_REFS:
+            old = conf.get(field)
+            if isinstance(old, str) and old in renames:
+                sets[(*prefix, field)] = renames[old]
+                if field == "alter" and renames[old] is None and conf.get("mode") == "front":
+                    sets[(*prefix, "mode")] = "off"  # front on a deleted alter – nothing left to front
+
+    visit(store, ("autoproxy",))
+    for key, conf in store.items():
+        if isinstance(conf, dict):
+            visit(conf, ("autoproxy", key))
+    return sets
+
+
+def _front_changes(profile: dict[str, Any], renames: dict[str, str | None]) -> dict[tuple, Any]:
+    front = (profile.get("system") or {}).get("current_front")
+    if not isinstance(front, dict) or not any(n in renames for n in front.get("alters") or ()):
+        return {}
+    fronters = [renames.get(n, n) for n in front["alters"]]
+    return {("system", "current_front", "alters"): [n for n in fronters if n is not None]}
+
+
+def _folder_changes(user_id: str, profile: dict[str, Any], renames: dict[str, str | None]) -> dict[tuple, Any]:
+    by_alter = _index_for(user_id, profile).by_alter
+    touched = {f for old in renames for f in by_alter.get(old, ())}
+    sets: dict[tuple, Any] = {}
+    folders = profile.get("folders") or {}
+    for folder_name in touched:
+        members: list[str] = []
+        for member in folders[folder_name].get("alters") or []:
+            member = renames.get(member, member)
+            if member is not None and member not in members:
+                members.append(member)
+        sets[("folders", folder_name, "alters")] = members
+    return sets
+
+
+async def _update_and_reindex(user_id: str, profile: dict[str, Any], sets: dict[tuple, Any], unsets: list[tuple]) -> bool:
+    ok = await data_manager.update_user_profile(user_id, sets, unsets)
+    touched = [path[1] for path in sets if path[0] == "folders" and len(path) == 3]
+    if touched:
+        folder_changed(user_id, profile, *touched)
+    return ok
+
+
+async def rename_alter(user_id: str, profile: dict[str, Any], old: str, new: str) -> bool:
+    """Move alter ``old`` to ``new`` and repoint folders and autoproxy at it."""
+    alter = dict(profile["alters"][old])
+    stamp = now_iso()
+    alter["updated_at"] = stamp
+    if alter.get("displayname") in (None, old):
+        alter["displayname"] = new
+    alter.pop("name", None)  # left behind by older versions of `!edit <alter> name`
+
+    renames = {old: new}
+    sets: dict[tuple, Any] = {("alters", new): alter, ("deleted_alters", old): stamp}
+    sets.update(_folder_changes(user_id, profile, renames))
+    sets.update(_front_changes(profile, renames))
+    sets.update(_autoproxy_changes(profile, renames))
+    unsets = [("alters", old)]
+    if new in (profile.get("deleted_alters") or {}):
+        unsets.append(("deleted_alters", new))
+    return await _update_and_reindex(user_id, profile, sets, unsets)
+
+
+def deletion_changes(user_id: str, profile: dict[str, Any], names: list[str], stamp: str) -> tuple[dict[tuple, Any], list[tuple]]:
+    """``(sets, unsets)`` that delete existing alters ``names``, tombstone them and drop
+    every reference to them; ``profile_merge`` folds these into an import's plan."""
+    renames: dict[str, str | None] = dict.fromkeys(names)
+    sets: dict[tuple, Any] = {("deleted_alters", n): stamp for n in names}
+    unsets: list[tuple] = [("alters", n) for n in names]
+    unsets.extend(("deleted_alters", n) for n in expired_tombstones(profile) if n not in renames)
+    sets.update(_folder_changes(user_id, profile, renames))
+    sets.update(_front_changes(profile, renames))
+    sets.update(_autoproxy_changes(profile, renames))
+    return sets, unsets
+
+
+async def delete_alters(user_id: str, profile: dict[str, Any], names: Iterable[str]) -> bool:
+    """Delete alters (tombstoned for delta exports) and drop every reference to them."""
+    alters = profile.get("alters") or {}
+    names = [n for n in dict.fromkeys(names) if n in alters]
+    if not names:
+        return True
+    sets, unsets = deletion_changes(user_id, profile, names, now_iso())
+    if len(names) == len(alters):
+        sets[("alters",)] = {}
+        unsets = [path for path in unsets if path[0] != "alters"]
+    return await _update_and_reindex(user_id, profile, sets, unsets)
@@ -0,0 +1,224 @@
+"""
+profile_merge.py – diff an imported system against a stored profile
+===================================================================
+
+Key points
+----------
+* **Diff, then apply** – ``plan_merge`` compares an importer's output with the cached
+  profile and sorts every alter and folder into new / changed / unchanged, producing
+  the minimal set of ``(path) → value`` changes. Nothing is written until
+  ``apply_merge`` hands those to ``data_manager.update_user_profile`` as one targeted
+  ``$set`` – re‑importing an unchanged 1000‑member export writes nothing at all.
+* **Source‑owned fields only** – for alters that already exist, only the fields the
+  importer knows about are compared, and empty (``None``) values never overwrite local
+  data, so Pixel‑only details (roles, front time, aliases, …) survive a re‑import.
+* **Placeholders on create only** – importers leave fields the source lacks as
+  ``None``; the ``*_PLACEHOLDERS`` text ("No proxy set", "Imported from …") is filled
+  in only on alters, folders and systems the import creates.
+* **Folders merge membership** – an existing folder keeps its members and gains the
+  imported ones.
+* **Deltas** – a v2 delta backup's ``deleted_alters`` are deleted the way ``!delete``
+  does it (``profile_links.deletion_changes``: tombstones, and folder, front and
+  autoproxy references dropped), and merged alters are stamped with ``updated_at``.
+* **Dry run** – ``plan.summary(dry_run=True)`` describes what would happen.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from data_manager import data_manager
+from export_format import now_iso
+from profile_links import deletion_changes
+
+# fields each importer is authoritative for on alters / the system that already exist
+PLURALKIT_ALTER_FIELDS = ("displayname", "pronouns", "description", "avatar", "proxy_avatar",
+                          "banner", "proxy", "color", "birthday")
+PLURALKIT_SYSTEM_FIELDS = ("name", "description", "pronouns", "avatar", "banner", "color", "tag",
+                           "system_avatar", "system_banner")
+TUPPERBOX_ALTER_FIELDS = ("displayname", "description", "avatar", "proxy_avatar", "proxy", "birthday")
+FOLDER_FIELDS = ("description", "color")
+
+# shown for fields the source left empty, on records an import creates
+_DEFAULT_PLACEHOLDERS = {
+    "alters":  {"pronouns": "Not set", "proxy": "No proxy set", "color": 0x8A2BE2},
+    "folders": {"color": 0x8A2BE2},
+    "system":  {"pronouns": "Not set", "color": 0x8A2BE2},
+}
+PLURALKIT_PLACEHOLDERS = {
+    "alters":  {**_DEFAULT_PLACEHOLDERS["alters"], "description": "Imported from PluralKit"},
+    "folders": {**_DEFAULT_PLACEHOLDERS["folders"], "description": "Imported from PluralKit"},
+    "system":  {**_DEFAULT_PLACEHOLDERS["system"], "description": "Imported from PluralKit"},
+}
+TUPPERBOX_PLACEHOLDERS = {
+    "alters":  {**_DEFAULT_PLACEHOLDERS["alters"], "description": "Imported from Tupperbox"},
+    "folders": {**_DEFAULT_PLACEHOLDERS["folders"], "description": "Imported from Tupperbox"},
+}
+
+_SHOWN_NAMES = 10
+
+
+class MergePlan:
+    def __init__(self):
+        self.new_alters: list[str] = []
+        self.changed_alters: list[str] = []
+        self.unchanged_alters = 0
+        self.new_folders: list[str] = []
+        self.changed_folders: list[str] = []
+        self.unchanged_folders = 0
+        self.deleted_alters: list[str] = []
+        self.system_fields: list[str] = []
+        self.other_fields: list[str] = []
+        self.sets: dict[tuple[str, ...], Any] = {}
+        self.unsets: list[tuple[str, ...]] = []
+
+    @property
+    def changes(self) -> int:
+        return len(self.sets) + len(self.unsets)
+
+    def summary(self, dry_run: bool = False) -> str:
+        lines = ["🔎 **Dry run – nothing was changed.** Here is what the import would do:"] if dry_run else []
+        lines.append(f"📊 **Alters:** {len(self.new_alters)} new, {len(self.changed_alters)} updated, "
+                     f"{self.unchanged_alters} unchanged")
+        lines.append(f"📁 **Folders:** {len(self.new_folders)} new, {len(self.changed_folders)} updated, "
+                     f"{self.unchanged_folders} unchanged")
+        if self.deleted_alters:
+            lines.append(f"🗑️ **Removed:** {len(self.deleted_alters)} alters deleted since the base backup")
+        if self.system_fields:
+            lines.append(f"🪪 **System:** {', '.join(self.system_fields)} updated")
+        if self.other_fields:
+            lines.append(f"⚙️ **Other:** {', '.join(self.other_fields)} updated")
+        for label, names in (("New", self.new_alters), ("Updated", self.changed_alters)):
+            if names:
+                shown = ", ".join(names[:_SHOWN_NAMES])
+                more = f" and {len(names) - _SHOWN_NAMES} more" if len(names) > _SHOWN_NAMES else ""
+                lines.append(f"• {label}: {shown}{more}")
+        return "\n".join(lines)
+
+
+def _filled(record: dict[str, Any], placeholders: dict[str, Any] | None) -> dict[str, Any]:
+    """``record`` with placeholders for its empty fields (new records only)."""
+    if not placeholders:
+        return record
+    return {**record, **{k: v for k, v in placeholders.items() if record.get(k) is None}}
+
+
+def _diff_fields(old: dict[str, Any], new: dict[str, Any], fields: Iterable[str] | None) -> list[str]:
+    keys = new.keys() if fields is None else (f for f in fields if f in new)
+    return [k for k in keys if new[k] is not None and old.get(k) != new[k]]
+
+
+def plan_merge(
+    user_id: str,
+    profile: dict[str, Any],
+    incoming: dict[str, Any],
+    *,
+    alter_fields: Iterable[str] | None = None,
+    system_fields: Iterable[str] | None = None,
+    placeholders: dict[str, dict[str, Any]] | None = None,
+) -> MergePlan:
+    """Compare ``incoming`` (``{"system", "alters", "folders", ...}``) with ``profile``.
+
+    ``alter_fields`` / ``system_fields`` limit which keys are compared on records that
+    already exist (``None`` = every key the importer provides). Other top‑level keys
+    in ``incoming`` (e.g. ``settings`` from a Pixel backup) are replaced when they differ.
+    ``placeholders`` (``{"alters" | "folders" | "system": {field: text}}``) fill empty
+    fields of records that don't exist locally yet.
+    """
+    placeholders = placeholders or {}
+    plan = MergePlan()
+    alter_fields = tuple(alter_fields) if alter_fields is not None else None
+    stamp = now_iso()
+
+    # ───── alters ─────
+    local_alters = profile.get("alters") or {}
+    incoming_alters = incoming.get("alters") or {}
+    for name, new in incoming_alters.items():
+        old = local_alters.get(name)
+        if not isinstance(old, dict):
+            plan.new_alters.append(name)
+            new = _filled(new, placeholders.get("alters"))
+            plan.sets[("alters", name)] = {**new, "displayname": new.get("displayname") or name,
+                                           "updated_at": new.get("updated_at") or stamp}
+            continue
+        changed = _diff_fields(old, new, alter_fields)
+        if changed:
+            plan.changed_alters.append(name)
+            for field in changed:
+                plan.sets[("alters", name, field)] = new[field]
+            if "updated_at" not in changed:
+                plan.sets[("alters", name, "updated_at")] = stamp
+        else:
+            plan.unchanged_alters += 1
+
+    plan.deleted_alters = [name for name in dict.fromkeys(incoming.get("deleted_alters") or [])
+                           if name in local_alters and name not in incoming_alters]
+
+    # ───── folders ─────
+    local_folders = profile.get("folders") or {}
+    for name, new in (incoming.get("folders") or {}).items():
+        old = local_folders.get(name)
+        if not isinstance(old, dict):
+            plan.new_folders.append(name)
+            plan.sets[("folders", name)] = _filled(new, placeholders.get("folders"))
+            continue
+        changed = _diff_fields(old, new, FOLDER_FIELDS)
+        for field in changed:
+            plan.sets[("folders", name, field)] = new[field]
+        members = list(old.get("alters") or [])
+        known = set(members)
+        added = [a for a in new.get("alters") or [] if a not in known]
+        if added:
+            plan.sets[("folders", name, "alters")] = members + added
+        if changed or added:
+            plan.changed_folders.append(name)
+        else:
+            plan.unchanged_folders += 1
+
+    # ───── system ─────
+    new_system = incoming.get("system")
+    if new_system:
+        old_system = profile.get("system") if isinstance(profile.get("system"), dict) else {}
+        if not old_system.get("name"):
+            new_system = _filled(new_system, placeholders.get("system"))
+            plan.system_fields = [k for k in new_system if old_system.get(k) != new_system[k]]
+            plan.sets[("system",)] = {**old_system, **new_system}
+        else:
+            plan.system_fields = _diff_fields(old_system, new_system, system_fields)
+            for field in plan.system_fields:
+                plan.sets[("system", field)] = new_system[field]
+
+    # ───── everything else (Pixel backups) ─────
+    for key, value in incoming.items():
+        if key in ("system", "alters", "folders", "user_id", "members_seen", "since", "deleted_alters") or value is None:
+            continue
+        if profile.get(key) != value:
+            plan.other_fields.append(key)
+            plan.sets[(key,)] = value
+
+    if plan.deleted_alters:
+        _plan_deletions(user_id, profile, plan, stamp)
+    return plan
+
+
+def _plan_deletions(user_id: str, profile: dict[str, Any], plan: MergePlan, stamp: str) -> None:
+    """Fold the cascading delete of ``plan.deleted_alters`` into the plan's changes."""
+    deleted = set(plan.deleted_alters)
+    sets, unsets = deletion_changes(user_id, profile, plan.deleted_alters, stamp)
+    for path, value in sets.items():
+        if any(path[:i] in plan.sets for i in range(1, len(path))):
+            continue  # the import replaces that whole record
+        if path[0] == "folders" and path in plan.sets:
+            value = [a for a in plan.sets[path] if a not in deleted]  # merged membership
+        plan.sets[path] = value
+    plan.unsets.extend(unsets)
+    for path, folder in plan.sets.items():
+        if path[0] == "folders" and len(path) == 2 and folder.get("alters"):
+            plan.sets[path] = {**folder, "alters": [a for a in folder["alters"] if a not in deleted]}
+
+
+async def apply_merge(user_id: str, plan: MergePlan) -> bool:
+    """Persist a plan's changes with one targeted update (no‑op if nothing changed)."""
+    if not plan.changes:
+        return True
+    return await data_manager.update_user_profile(user_id, plan.sets, plan.unsets)
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 import io
+import time
 from typing import Any
 
 import discord
 from data_manager import data_manager
+import metrics
+import guild_settings
+import rate_limit
+import webhook_cache
+from log_channel import log_channel
+from loop_monitor import set_activity
+from search_index import not_found, resolve
 
 # ───────────────────────── debug helper ────────────────────────── #
 
@@ -13,6 +21,11 @@ def _d(tag: str, *vals: Any) -> None:
     print(f"[DEBUG] {tag}:", *vals)
 
 
+def _files(downloads: list[tuple[bytes, str]]) -> list[discord.File]:
+    """Fresh ``discord.File`` objects for one send attempt."""
+    return [discord.File(io.BytesIO(data), filename=filename) for data, filename in downloads]
+
+
 # ───────────────────────── setup function ──────────────────────── #
 
 def setup_proxy_handler(bot: discord.Bot) -> None:
@@ -24,29 +37,55 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
     @bot.event
     async def on_message(message: discord.Message):  # noqa: D401
         if message.author.bot:
+            metrics.FASTPATH_SKIPS.inc(reason="bot")
             return
 
+        metrics.MESSAGES_SEEN.inc()
+        started = time.perf_counter()
+        set_activity("on_message")
+
         _d("MSG", {
             "guild": message.guild.id if message.guild else "DM",
             "author": message.author.id,
             "content": message.content[:80]
         })
 
-        # 1) autoproxy command handling ------------------------------------
-        if message.content.startswith("!autoproxy"):
-            await _handle_autoproxy_command(message)
-            return
+        # Classify once: a message is either a command or a proxy candidate
+        prefix = await _matched_prefix(message)
+        if prefix is not None:
+            name = message.content[len(prefix):].split(maxsplit=1)
+            name = name[0] if name else ""
 
-        # 2) proxy processing ---------------------------------------------
+            # 1) autoproxy command handling --------------------------------
+            if name.lower() == "autoproxy":
+                metrics.MESSAGE_ROUTES.inc(route="autoproxy")
+                await _handle_autoproxy_command(message, prefix)
+                return
+
+            # 2) any other command – proxy matching is skipped entirely ----
+            if name in bot.all_commands:
+                metrics.MESSAGE_ROUTES.inc(route="command")
+                await bot.process_commands(message)
+                return
+
+        # 3) proxy processing ---------------------------------------------
+        metrics.MESSAGE_ROUTES.inc(route="proxy_candidate")
         proxied = await _process_proxy(message)
-        if not proxied:
-            await bot.process_commands(message)
+        if proxied:
+            metrics.PROXY_LATENCY.observe(time.perf_counter() - started)
+
+    async def _matched_prefix(message: discord.Message) -> str | None:
+        """The command prefix this message starts with (per‑guild, via ``bot.get_prefix``)."""
+        prefixes = await bot.get_prefix(message)
+        if isinstance(prefixes, str):
+            prefixes = (prefixes,)
+        return next((p for p in prefixes if message.content.startswith(p)), None)
 
     # ============================================================
     # Command: !autoproxy
     # ============================================================
-    async def _handle_autoproxy_command(msg: discord.Message) -> None:
-        parts = msg.content.split()
+    async def _handle_autoproxy_command(msg: discord.Message, prefix: str) -> None:
+        parts = msg.content[len(prefix):].split()
         if len(parts) < 2:
             return
 
@@ -67,7 +106,6 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
         store: dict[str, Any] = profile.get("autoproxy", {})
         key = "global" if scope == "global" else gid
         conf = store.get(key, {"mode": "off", "alter": None, "last_proxied": None})
-        alters = profile.get("alters", {})
 
         if sub in {"off", "unlatch"}:
             if sub == "unlatch" and not global_flag:
@@ -91,12 +129,15 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
                 reply = f"🔴 **Autoproxy disabled** ({scope})."
                 _d("UNLATCH_SPECIFIC", f"Disabled {scope} autoproxy only")
         elif sub == "front":
-            if alter_arg and alter_arg in alters:
-                conf.update({"mode": "front", "alter": alter_arg})
-                reply = f"🟢 **Autoproxy set to FRONT mode** for **{alter_arg}** ({scope})."
-            else:
+            if not alter_arg:
                 await msg.channel.send("❌ **Invalid alter name.**")
                 return
+            name, suggestions = resolve(uid, profile, alter_arg, strict=True)
+            if name is None:
+                await msg.channel.send(not_found(alter_arg, suggestions, strict=True))
+                return
+            conf.update({"mode": "front", "alter": name})
+            reply = f"🟢 **Autoproxy set to FRONT mode** for **{name}** ({scope})."
         elif sub == "latch":
             conf.update({"mode": "latch", "alter": None})
             reply = f"🟡 **Autoproxy set to LATCH mode** ({scope})."
@@ -113,17 +154,31 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
     # ============================================================
     # Proxy processing (patterns + autoproxy)
     # ============================================================
+    def _within_budget(msg: discord.Message, gid: str | None) -> bool:
+        """Spend the per-user / per-guild proxy tokens; only called once a target matched,
+        so plain chat never drains them. Over the limit the message is left as is."""
+        if rate_limit.PROXY_USER.allow(msg.author.id) and (not gid or rate_limit.PROXY_GUILD.allow(gid)):
+            return True
+        metrics.FASTPATH_SKIPS.inc(reason="throttled")
+        _d("THROTTLED", "Proxy budget exhausted, leaving message unproxied")
+        return False
+
     async def _process_proxy(msg: discord.Message) -> bool:
         uid = str(msg.author.id)
         gid = str(msg.guild.id) if msg.guild else None
         is_dm = msg.guild is None
 
-        # ---- blacklist checking --------------------------------------
+        # ---- server-wide switch / blacklist checking -------------------
         if not is_dm and gid:
+            if not await guild_settings.get(gid, "proxy_enabled"):
+                metrics.FASTPATH_SKIPS.inc(reason="proxy_disabled")
+                return False
+
             # Check if the current channel is blacklisted
             channel_blacklist = await data_manager.get_blacklist("channel", gid)
             if isinstance(channel_blacklist, dict) and str(msg.channel.id) in channel_blacklist:
                 _d("BLACKLIST", "Channel blacklisted, skipping proxy")
+                metrics.FASTPATH_SKIPS.inc(reason="blacklist")
                 return False
             
             # Check if the channel's category is blacklisted
@@ -131,11 +186,17 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
                 category_blacklist = await data_manager.get_blacklist("category", gid)
                 if isinstance(category_blacklist, dict) and str(msg.channel.category.id) in category_blacklist:
                     _d("BLACKLIST", "Category blacklisted, skipping proxy")
+                    metrics.FASTPATH_SKIPS.inc(reason="blacklist")
                     return False
 
         profile = await data_manager.get_user_profile(uid) or {}
         alters = profile.get("alters", {})
 
+        # Nothing can match (patterns and autoproxy both need an alter)
+        if not alters:
+            metrics.FASTPATH_SKIPS.inc(reason="no_alters")
+            return False
+
         # ---- explicit proxy patterns ------------------------------
         for name, alter_data in alters.items():
             proxy_pattern = alter_data.get("proxy")
@@ -176,6 +237,8 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
                     if is_dm:
                         await msg.channel.send("I cannot proxy in DMs. Please head to a server.")
                         return True
+                    if not _within_budget(msg, gid):
+                        return False
                     
                     # Update global latch if active
                     autoproxy_store = profile.get("autoproxy", {})
@@ -185,7 +248,10 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
                         await data_manager.save_user_profile(uid, profile)
                         _d("GLOBAL_LATCH_UPDATE", f"Updated global latch to {name}")
                     
-                    return await _proxy_send(msg, name, content_hit, alter_data)
+                    sent = await _proxy_send(msg, name, content_hit, alter_data)
+                    if sent:
+                        metrics.MESSAGES_PROXIED.inc(mode="pattern")
+                    return sent
 
         # ---- autoproxy front / latch ------------------------------
         store: dict[str, Any] = profile.get("autoproxy", {})
@@ -235,6 +301,8 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
             if is_dm:
                 await msg.channel.send("I cannot proxy in DMs. Please head to a server.")
                 return True
+            if not _within_budget(msg, gid):
+                return False
             
             # Update last_proxied for latch mode
             if auto["mode"] == "latch":
@@ -243,7 +311,10 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
                 profile["autoproxy"] = store
                 await data_manager.save_user_profile(uid, profile)
             
-            return await _proxy_send(msg, target, msg.content, alters[target])
+            sent = await _proxy_send(msg, target, msg.content, alters[target])
+            if sent:
+                metrics.MESSAGES_PROXIED.inc(mode=auto["mode"])
+            return sent
 
         _d("AUTOPROXY_NO_TARGET", "No valid target found")
         return False
@@ -261,12 +332,17 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
             "attachment_names": [att.filename for att in msg.attachments]
         })
 
-        # 1) Download attachments before deleting
-        files: list[discord.File] = []
+        # 0) Bot-wide REST budget (delete + webhook send) – checked before touching anything
+        if not await rate_limit.WEBHOOK_GLOBAL.wait("global", rate_limit.WEBHOOK_MAX_WAIT, cost=2):
+            _d("THROTTLED", "Global webhook budget exhausted, leaving message unproxied")
+            return False
+
+        # 1) Download attachments before deleting (bytes are kept: discord.py closes
+        #    each discord.File after a send, so a retry needs fresh ones)
+        downloads: list[tuple[bytes, str]] = []
         for att in msg.attachments:
             try:
-                buf = await att.read()
-                files.append(discord.File(io.BytesIO(buf), filename=att.filename))
+                downloads.append((await att.read(), att.filename))
                 _d("ATTACH_DOWNLOAD", f"Successfully downloaded {att.filename}")
             except Exception as e:
                 _d("ATTACH_ERR", e)
@@ -289,27 +365,33 @@ def setup_proxy_handler(bot: discord.Bot) -> None:
 
         # 4) Send via webhook
         try:
-            wh = next((w for w in await msg.channel.webhooks() if w.name == "Pixel Proxy"), None)
-            if not wh:
-                wh = await msg.channel.create_webhook(name="Pixel Proxy")
+            wh = await webhook_cache.get(msg.channel)
             
             # For attachments with no content, ensure we send something valid
             webhook_content = content.strip() if content.strip() else None
             
             _d("WEBHOOK_SEND", {
                 "content": webhook_content, 
-                "files_count": len(files),
+                "files_count": len(downloads),
                 "username": display,
                 "avatar_url": avatar
             })
             
-            await wh.send(
-                content=webhook_content, 
-                username=display, 
-                avatar_url=avatar, 
-                files=files
-            )
+            metrics.WEBHOOK_CALLS.inc(op="send")
+            send = dict(content=webhook_content, username=display, avatar_url=avatar, wait=True)
+            try:
+                sent = await wh.send(**send, files=_files(downloads))
+            except discord.NotFound:
+                # Webhook was deleted since we cached it – make a new one and retry once
+                webhook_cache.forget(msg.channel.id)
+                wh = await webhook_cache.get(msg.channel)
+                metrics.WEBHOOK_CALLS.inc(op="send")
+                sent = await wh.send(**send, files=_files(downloads))
             _d("PROXY", display, "→", content[:60])
+            await data_manager.log_proxy_message(
+                sent.id, msg.channel.id, msg.guild.id if msg.guild else None, uid, alter, msg.id
+            )
+            await log_channel.record(msg, sent, alter, display, avatar, webhook_content, data.get("color"))
         except discord.Forbidden as e:
             _d("WEBHOOK_ERR", f"Forbidden: {e}")
             await msg.channel.send(f"⚠️ Can't create webhooks. Proxy message from {display}: {content}")
@@ -0,0 +1,134 @@
+"""
+proxy_message_commands.py – act on messages after they were proxied
+===================================================================
+
+Key points
+----------
+* Every proxied message is logged by ``proxy_handler`` (``data_manager.log_proxy_message``:
+  webhook message id → author, alter, channel), kept in a ring buffer for recent
+  messages and in MongoDB until its TTL expires. Each lookup below is a buffer hit or
+  one indexed ``find_one``.
+* **React with ❌** on your own proxied message to delete it.
+* ``!edit_last <text>`` edits your latest proxied message in the channel (or the one
+  you reply to).
+* ``!whosent <message link | id>`` (or reply to the message) shows who sent it.
+"""
+
+from __future__ import annotations
+
+import re
+
+import discord
+
+import webhook_cache
+from data_manager import data_manager
+
+DELETE_EMOJI = "❌"
+_MESSAGE_ID = re.compile(r"(\d{15,21})/?$")
+
+
+def _message_id(ctx, target: str) -> int | None:
+    """The message a command points at: a link / id argument, else the replied‑to message."""
+    match = _MESSAGE_ID.search(target.strip())
+    if match:
+        return int(match.group(1))
+    reference = ctx.message.reference
+    return reference.message_id if reference else None
+
+
+async def _delete_command_message(ctx) -> None:
+    try:
+        await ctx.message.delete()
+    except (discord.Forbidden, discord.NotFound):
+        pass
+
+
+def setup_proxy_message_commands(bot):
+    @bot.listen("on_raw_reaction_add")
+    async def delete_on_reaction(payload: discord.RawReactionActionEvent):
+        if str(payload.emoji) != DELETE_EMOJI or payload.guild_id is None:
+            return
+        record = await data_manager.get_proxy_message(payload.message_id)
+        if record is None or record["user_id"] != str(payload.user_id):
+            return
+        channel = bot.get_channel(payload.channel_id)
+        if channel is None:
+            return
+        try:
+            wh = await webhook_cache.get(channel)
+            await wh.delete_message(payload.message_id)
+        except discord.NotFound:
+            pass  # already gone
+        except discord.HTTPException as e:
+            print(f"⚠️ Couldn't delete proxied message {payload.message_id}: {e}")
+            return
+        await data_manager.forget_proxy_message(payload.message_id)
+
+    @bot.command(name="edit_last", aliases=["edit_proxy"])
+    async def edit_last(ctx, *, text: str = ""):
+        if ctx.guild is None:
+            await ctx.send("❌ Proxied messages can only be edited in a server.")
+            return
+        if not text.strip():
+            await ctx.send("Usage: `!edit_last <new text>` (reply to a proxied message to edit that one instead)")
+            return
+
+        user_id = str(ctx.author.id)
+        reference = ctx.message.reference
+        if reference and reference.message_id:
+            record = await data_manager.get_proxy_message(reference.message_id)
+            if record is None:
+                await ctx.send("❌ That isn't a proxied message (or it's too old to edit).")
+                return
+        else:
+            record = await data_manager.get_last_proxy_message(user_id, ctx.channel.id)
+            if record is None:
+                await ctx.send("❌ You have no proxied messages in this channel to edit.")
+                return
+        if record["user_id"] != user_id:
+            await ctx.send("❌ You can only edit your own proxied messages.")
+            return
+
+        try:
+            wh = await webhook_cache.get(ctx.channel)
+            await wh.edit_message(int(record["message_id"]), content=text)
+        except discord.NotFound:
+            await data_manager.forget_proxy_message(record["message_id"])
+            await ctx.send("❌ That message no longer exists.")
+            return
+        except discord.HTTPException as e:
+            await ctx.send(f"❌ Couldn't edit the message: {e}")
+            return
+        await _delete_command_message(ctx)
+
+    @bot.command(name="whosent", aliases=["who_sent"])
+    async def whosent(ctx, *, target: str = ""):
+        message_id = _message_id(ctx, target)
+        if message_id is None:
+            await ctx.send("Usage: `!whosent <message link or ID>` or reply to the message with `!whosent`")
+            return
+
+        record = await data_manager.get_proxy_message(message_id)
+        if record is None:
+            await ctx.send("❌ That isn't a proxied message I know of (records are kept for a limited time).")
+            return
+
+        profile = await data_manager.get_user_profile(record["user_id"])
+        system_name = (profile.get("system") or {}).get("name") or "Unnamed system"
+        alter = (profile.get("alters") or {}).get(record["alter"]) or {}
+
+        embed = discord.Embed(
+            title="💬 Proxied message",
+            color=alter.get("color") or 0x8A2BE2
+        )
+        embed.add_field(name="Alter", value=alter.get("displayname") or record["alter"], inline=True)
+        embed.add_field(name="System", value=system_name, inline=True)
+        embed.add_field(name="Account", value=f"<@{record['user_id']}>", inline=True)
+        if record.get("guild_id"):
+            embed.add_field(
+                name="Message",
+                value=f"https://discord.com/channels/{record['guild_id']}/{record['channel_id']}/{record['message_id']}",
+                inline=False
+            )
+        embed.set_footer(text=f"User ID: {record['user_id']}")
+        await ctx.send(embed=embed)
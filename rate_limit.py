@@ -0,0 +1,133 @@
+"""
+rate_limit.py – in‑memory token buckets for proxies, webhooks and heavy commands
+================================================================================
+
+Key points
+----------
+* **Token bucket** – each key (user, guild or ``"global"``) may spend ``burst`` tokens
+  at once, refilled at ``rate`` per second. State is two floats per active key.
+* **Idle eviction** – a bucket that has been idle long enough to refill completely is
+  indistinguishable from a new one, so it is dropped during a sweep (at most every
+  ``SWEEP_SECONDS``, piggy‑backed on normal calls – no background task).
+* **Where they apply**
+    - ``PROXY_USER`` / ``PROXY_GUILD`` – charged in ``_process_proxy`` only once a
+      proxy or autoproxy target has matched (plain chat costs nothing); an over‑limit
+      message is simply left unproxied (no reply, no REST call).
+    - ``WEBHOOK_GLOBAL`` – the whole bot's proxy REST budget; ``_proxy_send`` waits up
+      to ``WEBHOOK_MAX_WAIT`` seconds for a token before touching the message.
+    - ``COMMAND_USER`` / ``COMMAND_GLOBAL`` – ``@throttled()`` on imports, exports
+      and bulk edits.
+* Every rejection is counted in ``pixel_throttled_total{limiter=…}``.
+
+Configure with ``<LIMITER>_RATE`` (tokens per second) and ``<LIMITER>_BURST``,
+e.g. ``PROXY_USER_RATE=1 PROXY_USER_BURST=8``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+from discord.ext import commands
+
+import metrics
+
+SWEEP_SECONDS = 60.0
+
+THROTTLED = metrics.Counter("pixel_throttled_total", "Requests refused or delayed by a rate limiter", ("limiter",))
+BUCKETS = metrics.Gauge("pixel_rate_limit_buckets", "Active token buckets", ("limiter",))
+
+
+class RateLimiter:
+    __slots__ = ("name", "rate", "burst", "_buckets", "_last_sweep")
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.rate = float(os.getenv(f"{name.upper()}_RATE", rate))
+        self.burst = float(os.getenv(f"{name.upper()}_BURST", burst))
+        self._buckets: dict[object, list[float]] = {}  # key -> [tokens, updated]
+        self._last_sweep = time.monotonic()
+
+    def _refill(self, key: object, now: float) -> list[float]:
+        if now - self._last_sweep > SWEEP_SECONDS:
+            self._sweep(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            BUCKETS.set(len(self._buckets), limiter=self.name)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        return bucket
+
+    def _sweep(self, now: float) -> None:
+        idle = [k for k, (tokens, updated) in self._buckets.items()
+                if tokens + (now - updated) * self.rate >= self.burst]
+        for k in idle:
+            del self._buckets[k]
+        self._last_sweep = now
+        BUCKETS.set(len(self._buckets), limiter=self.name)
+
+    def retry_after(self, key: object, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens and return 0, or return the seconds until they'd be available."""
+        now = time.monotonic()
+        bucket = self._refill(key, now)
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        THROTTLED.inc(limiter=self.name)
+        return (cost - bucket[0]) / self.rate if self.rate > 0 else float("inf")
+
+    def allow(self, key: object, cost: float = 1.0) -> bool:
+        return self.retry_after(key, cost) == 0.0
+
+    async def wait(self, key: object, max_wait: float, cost: float = 1.0) -> bool:
+        """Take ``cost`` tokens, sleeping up to ``max_wait`` seconds for them; False if that's not enough."""
+        now = time.monotonic()
+        bucket = self._refill(key, now)
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return True
+        delay = (cost - bucket[0]) / self.rate if self.rate > 0 else float("inf")
+        THROTTLED.inc(limiter=self.name)
+        if delay > max_wait:
+            return False
+        bucket[0] -= cost  # reserve now (going negative) so later callers queue behind us
+        await asyncio.sleep(delay)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+# ───────────────────────── limiters ────────────────────────────── #
+
+PROXY_USER = RateLimiter("proxy_user", rate=1.0, burst=8)
+PROXY_GUILD = RateLimiter("proxy_guild", rate=10.0, burst=40)
+WEBHOOK_GLOBAL = RateLimiter("webhook_global", rate=30.0, burst=50)   # Discord allows 50 req/s per bot
+WEBHOOK_MAX_WAIT = float(os.getenv("WEBHOOK_MAX_WAIT", "2"))
+COMMAND_USER = RateLimiter("command_user", rate=1 / 30, burst=3)       # imports / exports / bulk edits
+COMMAND_GLOBAL = RateLimiter("command_global", rate=0.5, burst=10)
+
+
+class Throttled(commands.CheckFailure):
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited for {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def throttled(cost: float = 1.0):
+    """Command check for expensive commands: per‑user and bot‑wide buckets."""
+
+    async def predicate(ctx: commands.Context) -> bool:
+        wait = COMMAND_USER.retry_after(ctx.author.id, cost)
+        if wait:
+            await ctx.send(f"⏳ Slow down – you can use `{ctx.invoked_with}` again in {wait:.0f} seconds.")
+            raise Throttled(wait)
+        wait = COMMAND_GLOBAL.retry_after("global", cost)
+        if wait:
+            await ctx.send(f"⏳ The bot is busy with other imports and exports – please try again in {max(wait, 1):.0f} seconds.")
+            raise Throttled(wait)
+        return True
+
+    return commands.check(predicate)
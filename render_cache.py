@@ -0,0 +1,89 @@
+"""
+render_cache.py – prebuilt ``!show`` / ``!system`` / ``!folder`` payloads
+========================================================================
+
+Key points
+----------
+* **Keyed by profile version** – an entry is ``(kind, user, item) → (version, payload)``;
+  a lookup whose version no longer matches ``data_manager.profile_version`` is a miss
+  and the entry is rebuilt in place, so every save invalidates without a callback.
+* **Bounded** – an LRU of ``RENDER_CACHE_SIZE`` entries. Payloads are plain dicts
+  (``embed.to_dict()`` or message text), not live ``discord.Embed`` objects, so a hit
+  never shares mutable state between sends.
+* **Measured** – hits / misses go to ``pixel_cache_hits_total{cache="render"}`` (and
+  misses) and ``stats()`` feeds the hit rate shown by ``!pixel``.
+
+Usage::
+
+    payload = render_cache.get("show", user_id, name, lambda: build_show(...))
+    await send_payload(ctx, payload)
+"""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from typing import Any, Callable
+
+import discord
+
+import metrics
+from data_manager import data_manager
+
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "2048"))
+
+Payload = dict[str, Any]  # {"embed": <embed dict>} or {"content": "<text>"}
+
+RENDER_CACHE_ENTRIES = metrics.Gauge("pixel_render_cache_entries", "Prebuilt embeds held by the render cache")
+
+
+class RenderCache:
+    def __init__(self, maxsize: int = RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, str, str], tuple[int, Payload]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        RENDER_CACHE_ENTRIES.set_function(lambda: len(self._entries))
+
+    def get(self, kind: str, user_id: str, item: str, build: Callable[[], Payload]) -> Payload:
+        """Return the cached payload for ``item`` or ``build()`` (and keep) a fresh one."""
+        key = (kind, str(user_id), item)
+        version = data_manager.profile_version(user_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.CACHE_HITS.inc(cache="render")
+            return entry[1]
+
+        self.misses += 1
+        metrics.CACHE_MISSES.inc(cache="render")
+        payload = build()
+        self._entries[key] = (version, payload)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return payload
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def embed_payload(embed: discord.Embed) -> Payload:
+    return {"embed": embed.to_dict()}
+
+
+async def send_payload(ctx, payload: Payload) -> None:
+    if "embed" in payload:
+        await ctx.send(embed=discord.Embed.from_dict(payload["embed"]))
+    else:
+        await ctx.send(payload["content"])
+
+
+render_cache = RenderCache()
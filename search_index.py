@@ -0,0 +1,258 @@
+"""
+search_index.py – per‑profile lookup index over alter names, aliases and text
+============================================================================
+
+Key points
+----------
+* **Maintained per profile version** – ``data_manager`` bumps a per‑user version on
+  every save; when ``index_for`` sees it moved, ``refresh`` re‑indexes only the alters
+  whose names / display names / aliases / descriptions changed (an edit in a
+  5000‑alter system costs milliseconds, not a rebuild). The most recent
+  ``SEARCH_INDEX_PROFILES`` indexes are kept in an LRU.
+* **Name resolution** – ``resolve`` turns what a user typed into the stored alter key:
+  exact key → casefolded name → alias → display name → unique name prefix, then
+  falls back to close‑match suggestions (never guessed silently). Destructive
+  commands pass ``strict=True``: only the name (any case) or an alias is accepted,
+  and display‑name or prefix hits come back as suggestions.
+* **Ranked search** – ``search`` (behind ``!find``) matches every query word as a
+  prefix of a word in an alter's name, display name, aliases or description using a
+  sorted token list + ``bisect``, so a lookup touches only the matching slice even
+  for systems with thousands of alters.
+"""
+
+from __future__ import annotations
+
+import bisect
+import difflib
+import heapq
+import os
+import re
+from collections import OrderedDict
+from typing import Any
+
+from data_manager import data_manager
+
+SEARCH_INDEX_PROFILES = int(os.getenv("SEARCH_INDEX_PROFILES", "256"))
+DESCRIPTION_CHARS = 500  # only the start of long descriptions is indexed
+
+_WORD = re.compile(r"\w+")
+
+# score for a query word matching a whole word in each field; prefixes score half
+_NAME, _DISPLAYNAME, _ALIAS, _DESCRIPTION = 60, 50, 45, 10
+_FUZZY_SCAN_LIMIT = 500  # bigger systems only fuzzy‑match names sharing the first letters
+
+
+def _words(text: Any) -> list[str]:
+    return _WORD.findall(text.casefold()) if isinstance(text, str) else []
+
+
+def _indexed_fields(alter: Any) -> tuple:
+    """The parts of an alter the index depends on (compared to spot changed alters)."""
+    if not isinstance(alter, dict):
+        return (None, (), None)
+    displayname = alter.get("displayname")
+    description = alter.get("description")
+    return (
+        displayname if isinstance(displayname, str) and displayname else None,
+        tuple(a for a in alter.get("aliases") or [] if isinstance(a, str)),
+        description[:DESCRIPTION_CHARS] if isinstance(description, str) else None,
+    )
+
+
+class AlterIndex:
+    """Lookup tables for one profile; ``refresh`` re‑indexes only alters that changed."""
+
+    __slots__ = ("version", "fields", "by_casefold", "by_alias", "by_displayname", "folded", "tokens", "postings")
+
+    def __init__(self):
+        self.version = -1
+        self.fields: dict[str, tuple] = {}             # alter → _indexed_fields at last refresh
+        self.by_casefold: dict[str, list[str]] = {}
+        self.by_alias: dict[str, list[str]] = {}
+        self.by_displayname: dict[str, list[str]] = {}
+        self.folded: list[str] = []                     # sorted keys of by_casefold
+        self.tokens: list[str] = []                     # sorted keys of postings
+        self.postings: dict[str, dict[str, int]] = {}  # word → {alter: best score}
+
+    # ───── maintenance ─────
+    def refresh(self, alters: dict[str, Any], version: int) -> None:
+        for name in [n for n in self.fields if n not in alters]:
+            self._remove(name)
+        for name, alter in alters.items():
+            fields = _indexed_fields(alter)
+            old = self.fields.get(name)
+            if old != fields:
+                if old is not None:
+                    self._remove(name)
+                self._add(name, fields)
+        self.version = version
+
+    @staticmethod
+    def _link(table: dict[str, list[str]], key: str, name: str, keys: list[str] | None = None) -> None:
+        names = table.get(key)
+        if names is None:
+            table[key] = [name]
+            if keys is not None:
+                bisect.insort(keys, key)
+        elif name not in names:
+            names.append(name)
+
+    @staticmethod
+    def _unlink(table: dict[str, list[str]], key: str, name: str, keys: list[str] | None = None) -> None:
+        names = table.get(key)
+        if names is None or name not in names:
+            return
+        names.remove(name)
+        if not names:
+            del table[key]
+            if keys is not None:
+                del keys[bisect.bisect_left(keys, key)]
+
+    @staticmethod
+    def _words_of(name: str, fields: tuple) -> tuple[tuple[int, list[str]], ...]:
+        displayname, aliases, description = fields
+        # best field first, so the first score recorded per alter is the highest
+        return ((_NAME, _words(name)), (_DISPLAYNAME, _words(displayname)),
+                (_ALIAS, _words(" ".join(aliases))), (_DESCRIPTION, _words(description)))
+
+    def _add(self, name: str, fields: tuple) -> None:
+        displayname, aliases, _ = fields
+        self.fields[name] = fields
+        self._link(self.by_casefold, name.casefold(), name, self.folded)
+        if displayname:
+            self._link(self.by_displayname, displayname.casefold(), name)
+        for a in aliases:
+            self._link(self.by_alias, a.casefold(), name)
+        postings = self.postings
+        for score, words in self._words_of(name, fields):
+            for word in words:
+                hits = postings.get(word)
+                if hits is None:
+                    postings[word] = {name: score}
+                    bisect.insort(self.tokens, word)
+                elif name not in hits:
+                    hits[name] = score
+
+    def _remove(self, name: str) -> None:
+        fields = self.fields.pop(name)
+        displayname, aliases, _ = fields
+        self._unlink(self.by_casefold, name.casefold(), name, self.folded)
+        if displayname:
+            self._unlink(self.by_displayname, displayname.casefold(), name)
+        for a in aliases:
+            self._unlink(self.by_alias, a.casefold(), name)
+        for _, words in self._words_of(name, fields):
+            for word in words:
+                hits = self.postings.get(word)
+                if hits is not None and hits.pop(name, None) is not None and not hits:
+                    del self.postings[word]
+                    del self.tokens[bisect.bisect_left(self.tokens, word)]
+
+    @staticmethod
+    def _prefixed(keys: list[str], prefix: str) -> list[str]:
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\U0010ffff")
+        return keys[lo:hi]
+
+    # ───── resolution ─────
+    def resolve(self, query: str, strict: bool = False) -> tuple[str | None, list[str]]:
+        """Return ``(alter key, [])`` for an unambiguous match, else ``(None, suggestions)``.
+
+        With ``strict`` only a casefolded name or an alias counts as a match.
+        """
+        folded = query.strip().casefold()
+        if not folded:
+            return None, []
+        for table in (self.by_casefold, self.by_alias, self.by_displayname):
+            names = table.get(folded)
+            if names:
+                if strict and table is self.by_displayname:
+                    return None, names[:5]
+                return (names[0], []) if len(names) == 1 else (None, names[:5])
+
+        prefixed = self._prefixed(self.folded, folded)
+        if len(prefixed) == 1 and len(self.by_casefold[prefixed[0]]) == 1 and not strict:
+            return self.by_casefold[prefixed[0]][0], []
+        if prefixed:
+            return None, [self.by_casefold[k][0] for k in sorted(prefixed, key=len)[:5]]
+        pool = self.folded if len(self.folded) <= _FUZZY_SCAN_LIMIT else self._prefixed(self.folded, folded[:2])
+        close = difflib.get_close_matches(folded, pool, n=5, cutoff=0.75)
+        return None, [self.by_casefold[c][0] for c in close]
+
+    # ───── ranked search ─────
+    def _matches(self, word: str) -> dict[str, int]:
+        """Best score per alter for one query word (whole word, or half for a prefix)."""
+        tokens = self._prefixed(self.tokens, word)
+        if tokens == [word]:
+            return self.postings[word]
+        scores: dict[str, int] = {}
+        for token in tokens:
+            exact = token == word
+            for name, score in self.postings[token].items():
+                if not exact:
+                    score //= 2
+                if score > scores.get(name, 0):
+                    scores[name] = score
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[str, int]]:
+        """Alters matching every word of ``query``, best first, as ``(name, score)``."""
+        words = _words(query)
+        if not words:
+            return []
+        matches = sorted((self._matches(w) for w in dict.fromkeys(words)), key=len)
+        if not matches[0]:
+            return []
+        totals = dict(matches[0])
+        for scores in matches[1:]:
+            totals = {n: s + scores[n] for n, s in totals.items() if n in scores}
+            if not totals:
+                return []
+
+        results = heapq.nsmallest(limit, totals.items(), key=lambda kv: (-kv[1], len(kv[0]), kv[0]))
+        folded = query.strip().casefold()
+        exact = (self.by_casefold.get(folded) or self.by_alias.get(folded) or [None])[0]
+        if exact and (not results or results[0][0] != exact):
+            results = [(exact, 1000)] + [r for r in results if r[0] != exact][:limit - 1]
+        return results
+
+# ───────────────────────── per‑user cache ──────────────────────── #
+
+_indexes: OrderedDict[str, AlterIndex] = OrderedDict()
+
+
+def index_for(user_id: str, profile: dict[str, Any]) -> AlterIndex:
+    user_id = str(user_id)
+    version = data_manager.profile_version(user_id)
+    index = _indexes.get(user_id)
+    if index is None:
+        index = _indexes[user_id] = AlterIndex()
+        if len(_indexes) > SEARCH_INDEX_PROFILES:
+            _indexes.popitem(last=False)
+    if index.version != version:
+        index.refresh(profile.get("alters") or {}, version)
+    _indexes.move_to_end(user_id)
+    return index
+
+
+def resolve(user_id: str, profile: dict[str, Any], query: str, strict: bool = False) -> tuple[str | None, list[str]]:
+    """Map what the user typed to an alter key; exact keys skip the index entirely."""
+    if query in (profile.get("alters") or {}):
+        return query, []
+    return index_for(user_id, profile).resolve(query, strict)
+
+
+async def resolve_or_reply(ctx, profile: dict[str, Any], query: str, strict: bool = False) -> str | None:
+    """``resolve`` for commands: returns the alter key, or replies with suggestions and returns None."""
+    name, suggestions = resolve(str(ctx.author.id), profile, query, strict)
+    if name is None:
+        await ctx.send(not_found(query, suggestions, strict))
+    return name
+
+
+def not_found(query: str, suggestions: list[str], strict: bool = False) -> str:
+    """The reply for an alter name that didn't resolve, with any suggestions."""
+    hint = f" Did you mean {', '.join(f'**{s}**' for s in suggestions)}?" if suggestions else ""
+    if strict and suggestions:
+        hint += " Type the full name or an alias to be sure."
+    return f"❌ Alter '{query}' does not exist.{hint}"
@@ -0,0 +1,274 @@
+"""
+sharding.py – opt‑in AutoShardedBot mode and shard‑partitioned caches
+=====================================================================
+
+Key points
+----------
+* **Off by default** – without ``SHARD_COUNT`` the bot is a plain ``commands.Bot`` on
+  one gateway connection, exactly as before.
+* **Configuration**
+    - ``SHARD_COUNT=auto`` – ``AutoShardedBot`` with the shard count Discord recommends,
+      every shard in this process.
+    - ``SHARD_COUNT=8`` – a fixed count, every shard in this process.
+    - ``SHARD_COUNT=8 SHARD_IDS=0,1,2,3`` – this process runs only the listed shards
+      (another process runs the rest).
+* **Ownership** – a guild lives on shard ``(guild_id >> 22) % shard_count``; ``owns``
+  is True only for guilds on this process's shards, so startup loads (blacklists) skip
+  everyone else's guilds.
+* **Partitioned caches** – ``ShardedLRU`` keeps one bounded LRU per shard, so a busy
+  shard evicts its own entries instead of another shard's, and a shard's entries can
+  be dropped on their own. Blacklists, guild settings and proxy webhooks use it (all
+  reload on a miss); a shard that stays disconnected for ``SHARD_DROP_AFTER`` seconds
+  has its partitions dropped, while short reconnects keep them. Entries that exist
+  only in memory (local mode, no database) are ``pinned``: never evicted or dropped.
+* **Per‑shard status** – ``shard_status`` feeds ``!pixel``; latency, guild count and
+  connection state are exported as ``pixel_shard_*{shard=…}`` gauges.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator
+
+from discord.ext import commands, tasks
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ───────────────────────── #
+
+SHARD_COUNT = os.getenv("SHARD_COUNT", "").strip().lower()   # "" = unsharded, "auto" or a number
+SHARD_IDS = [int(s) for s in os.getenv("SHARD_IDS", "").replace(" ", "").split(",") if s]
+SAMPLE_SECONDS = 15
+SHARD_DROP_AFTER = float(os.getenv("SHARD_DROP_AFTER", "300"))   # seconds down before its caches go
+
+SHARD_LATENCY = metrics.Gauge("pixel_shard_latency_seconds", "Gateway heartbeat latency per shard", ("shard",))
+SHARD_GUILDS = metrics.Gauge("pixel_shard_guilds", "Guilds on each shard", ("shard",))
+SHARD_CONNECTED = metrics.Gauge("pixel_shard_connected", "1 while the shard's gateway connection is up", ("shard",))
+
+ENABLED = bool(SHARD_COUNT)
+_count = int(SHARD_COUNT) if SHARD_COUNT.isdigit() else 1   # "auto" is filled in on connect
+_local: frozenset[int] | None = frozenset(SHARD_IDS) if SHARD_IDS else None   # None = every shard
+_partitioned: list[ShardedLRU] = []
+
+
+def create_bot(**options: Any) -> commands.Bot:
+    """``commands.Bot``, or ``AutoShardedBot`` when ``SHARD_COUNT`` is set."""
+    if not ENABLED:
+        return commands.Bot(**options)
+    if SHARD_COUNT != "auto" and not SHARD_COUNT.isdigit():
+        raise ValueError(f"SHARD_COUNT must be 'auto' or a number, not {SHARD_COUNT!r}")
+    if SHARD_IDS:
+        if SHARD_COUNT == "auto":
+            raise ValueError("SHARD_IDS needs a fixed SHARD_COUNT")
+        if any(not 0 <= s < _count for s in SHARD_IDS):
+            raise ValueError(f"SHARD_IDS must be between 0 and {_count - 1}")
+        options["shard_ids"] = sorted(set(SHARD_IDS))
+    if SHARD_COUNT != "auto":
+        options["shard_count"] = _count
+    return commands.AutoShardedBot(**options)
+
+# ───────────────────────── ownership ───────────────────────────── #
+
+def shard_count() -> int:
+    return _count
+
+
+def shard_of(guild_id: int | str | None) -> int:
+    """The shard a guild's events arrive on (0 outside guilds)."""
+    if guild_id is None:
+        return 0
+    return (int(guild_id) >> 22) % _count
+
+
+def owns(guild_id: int | str | None) -> bool:
+    """True if this process runs the shard for ``guild_id``."""
+    return _local is None or shard_of(guild_id) in _local
+
+
+def configure(bot: commands.Bot) -> None:
+    """Pick up the shard count Discord chose (``SHARD_COUNT=auto``) and re‑file cache entries."""
+    global _count
+    count = getattr(bot, "shard_count", None) or 1
+    if count != _count:
+        logger.info(f"Shard count is now {count} (was {_count}); repartitioning caches")
+        _count = count
+        for cache in _partitioned:
+            cache.repartition()
+
+# ───────────────────────── partitioned LRU ─────────────────────── #
+
+class ShardedLRU:
+    """An LRU map split per shard; each shard's partition holds at most ``maxsize`` entries.
+
+    Every entry is stored with the guild it belongs to, which decides its partition.
+    Entries put with ``pinned=True`` are the only copy of their data, so they are kept
+    outside the partitions – never evicted, dropped with a shard or counted in ``maxsize``.
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self._parts: dict[int, OrderedDict[Hashable, tuple[Any, Any]]] = {}
+        self._pinned: dict[Hashable, tuple[Any, Any]] = {}
+        _partitioned.append(self)
+
+    def get(self, key: Hashable, guild_id: int | str | None) -> Any:
+        pinned = self._pinned.get(key)
+        if pinned is not None:
+            return pinned[1]
+        part = self._parts.get(shard_of(guild_id))
+        entry = part.get(key) if part is not None else None
+        if entry is None:
+            return None
+        part.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, guild_id: int | str | None, value: Any, pinned: bool = False) -> None:
+        if pinned:
+            part = self._parts.get(shard_of(guild_id))
+            if part is not None:
+                part.pop(key, None)
+            self._pinned[key] = (guild_id, value)
+            return
+        self._pinned.pop(key, None)
+        part = self._parts.setdefault(shard_of(guild_id), OrderedDict())
+        part[key] = (guild_id, value)
+        part.move_to_end(key)
+        if len(part) > self.maxsize:
+            part.popitem(last=False)
+
+    def pop(self, key: Hashable, guild_id: int | str | None = None) -> Any:
+        """Remove ``key``; without ``guild_id`` every partition is checked."""
+        if key in self._pinned:
+            return self._pinned.pop(key)[1]
+        parts = [self._parts.get(shard_of(guild_id))] if guild_id is not None else self._parts.values()
+        for part in parts:
+            if part is not None and key in part:
+                return part.pop(key)[1]
+        return None
+
+    def drop_shard(self, shard_id: int) -> int:
+        """Forget everything cached for one shard; returns how many entries went."""
+        return len(self._parts.pop(shard_id, ()))
+
+    def items(self) -> Iterator[tuple[Hashable, Any]]:
+        for key, (_, value) in self._pinned.items():
+            yield key, value
+        for part in self._parts.values():
+            for key, (_, value) in part.items():
+                yield key, value
+
+    def repartition(self) -> None:
+        parts, self._parts = self._parts, {}
+        for part in parts.values():
+            for key, (guild_id, value) in part.items():
+                self.put(key, guild_id, value)
+
+    def clear(self) -> None:
+        self._parts.clear()
+        self._pinned.clear()
+
+    def sizes(self) -> dict[int, int]:
+        return {shard_id: len(part) for shard_id, part in sorted(self._parts.items())}
+
+    def __len__(self) -> int:
+        return len(self._pinned) + sum(len(part) for part in self._parts.values())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._pinned or any(key in part for part in self._parts.values())
+
+
+def drop_shard(shard_id: int) -> int:
+    """Drop one shard's partition from every ``ShardedLRU``; returns the entries freed."""
+    return sum(cache.drop_shard(shard_id) for cache in _partitioned)
+
+# ───────────────────────── shard status ────────────────────────── #
+
+def heartbeat_acks(bot: commands.Bot) -> dict[int, float | None]:
+    """``perf_counter`` time of each local shard's last heartbeat ACK (None before the first)."""
+    shards = getattr(bot, "shards", None)
+    if isinstance(shards, dict):   # AutoShardedBot
+        sockets = {shard_id: getattr(info._parent, "ws", None) for shard_id, info in shards.items()}
+    else:
+        sockets = {bot.shard_id or 0: getattr(bot, "ws", None)}
+    return {
+        shard_id: getattr(getattr(ws, "_keep_alive", None), "_last_ack", None)
+        for shard_id, ws in sockets.items()
+    }
+
+
+def shard_status(bot: commands.Bot) -> list[dict[str, Any]]:
+    """Latency, guild count and connection state for every shard this process runs."""
+    guilds: dict[int, int] = {}
+    for guild in bot.guilds:
+        guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+
+    shards = getattr(bot, "shards", None)
+    if isinstance(shards, dict):
+        rows = [(shard_id, info.latency, not info.is_closed()) for shard_id, info in sorted(shards.items())]
+    else:
+        rows = [(bot.shard_id or 0, bot.latency, not bot.is_closed())]
+    return [
+        {"shard": shard_id, "latency": latency, "connected": connected, "guilds": guilds.get(shard_id, 0)}
+        for shard_id, latency, connected in rows
+    ]
+
+# ───────────────────────── setup function ──────────────────────── #
+
+def setup_sharding(bot: commands.Bot) -> None:
+    """Track shard connections, sample per‑shard gauges and free caches of shards that stay down."""
+    pending_drops: dict[int, asyncio.Task] = {}
+
+    async def drop_later(shard_id: int):
+        await asyncio.sleep(SHARD_DROP_AFTER)
+        pending_drops.pop(shard_id, None)
+        logger.warning(f"Shard {shard_id} down for {SHARD_DROP_AFTER:.0f}s; dropped {drop_shard(shard_id)} cached entries")
+
+    def back_up(shard_id: int):
+        SHARD_CONNECTED.set(1, shard=shard_id)
+        task = pending_drops.pop(shard_id, None)
+        if task is not None:
+            task.cancel()
+
+    @tasks.loop(seconds=SAMPLE_SECONDS)
+    async def sample_shards():
+        for row in shard_status(bot):
+            latency = row["latency"]
+            SHARD_LATENCY.set(latency if math.isfinite(latency) else -1, shard=row["shard"])
+            SHARD_GUILDS.set(row["guilds"], shard=row["shard"])
+            SHARD_CONNECTED.set(1 if row["connected"] else 0, shard=row["shard"])
+
+    @bot.listen("on_connect")
+    async def _configure_shards():
+        configure(bot)
+
+    @bot.listen("on_ready")
+    async def _start_shard_sampling():
+        if not sample_shards.is_running():
+            sample_shards.start()
+
+    @bot.listen("on_shard_ready")
+    async def _shard_ready(shard_id: int):
+        back_up(shard_id)
+        logger.info(f"Shard {shard_id} ready")
+
+    @bot.listen("on_shard_resumed")
+    async def _shard_resumed(shard_id: int):
+        back_up(shard_id)
+
+    @bot.listen("on_shard_connect")
+    async def _shard_connect(shard_id: int):
+        back_up(shard_id)
+
+    @bot.listen("on_shard_disconnect")
+    async def _shard_disconnect(shard_id: int):
+        SHARD_CONNECTED.set(0, shard=shard_id)
+        logger.warning(f"Shard {shard_id} disconnected")
+        if shard_id not in pending_drops:
+            pending_drops[shard_id] = asyncio.create_task(drop_later(shard_id), name=f"shard-{shard_id}-drop")
@@ -1,8 +1,62 @@
 import discord
 from discord.ext import commands
 from data_manager import data_manager
+from profile_links import delete_alters
+from render_cache import embed_payload, render_cache, send_payload
+from jobs import job_queue
 import re
 
+_MARKDOWN_LINK = re.compile(r"(?<!\\)\[([^\]]+)\]\((https?://[^\s)]+)\)")
+
+
+def _preserve_links(text):
+    if text is None:
+        return "No description provided."
+    return _MARKDOWN_LINK.sub(r"[\1](\2)", str(text))
+
+
+def _render_system(user_id, system_info):
+    """Build the ``!system`` payload (cached by ``render_cache`` until the profile changes)."""
+    system_name = system_info.get("name", "Unnamed System")
+    system_pronouns = system_info.get("pronouns", "Not set")
+    system_description = system_info.get("description", "No description provided.")
+    system_avatar = system_info.get("avatar", None)
+    system_banner = system_info.get("banner", None)
+    system_color = system_info.get("color", 0x8A2BE2)
+    system_tag = system_info.get("tag", None)
+
+    system_description = _preserve_links(system_description)
+
+    # Build description with system tag if it exists
+    description_parts = [
+        f"Pronouns: {system_pronouns}\n"
+    ]
+    
+    if system_tag:
+        description_parts.append(f"System Tag: {system_tag}\n")
+        
+    description_parts.extend([
+        f"Description: {system_description}\n",
+        f"Linked Discord Account: <@{user_id}>"
+    ])
+
+    embed = discord.Embed(
+        title=system_name,
+        description="\n".join(description_parts),
+        color=system_color
+    )
+
+    if system_avatar:
+        embed.set_thumbnail(url=system_avatar)
+
+    if system_banner:
+        embed.set_image(url=system_banner)
+
+    embed.set_footer(text=f"User ID: {user_id}")
+
+    return embed_payload(embed)
+
+
 def setup_system_commands(bot):
     @bot.command(name="create_system")
     async def create_system(ctx, *, system_name: str):
@@ -206,53 +260,8 @@ def setup_system_commands(bot):
             await ctx.send("❌ You don't have a system set up yet. Use `!create_system` to create one.")
             return
 
-        system_name = system_info.get("name", "Unnamed System")
-        system_pronouns = system_info.get("pronouns", "Not set")
-        system_description = system_info.get("description", "No description provided.")
-        system_avatar = system_info.get("avatar", None)
-        system_banner = system_info.get("banner", None)
-        system_color = system_info.get("color", 0x8A2BE2)
-        system_tag = system_info.get("tag", None)
-
-        def preserve_links(text):
-            if text is None:
-                return "No description provided."
-            return re.sub(
-                r"(?<!\\)\[([^\]]+)\]\((https?://[^\s)]+)\)",
-                r"[\1](\2)",
-                str(text)
-            )
-
-        system_description = preserve_links(system_description)
-
-        # Build description with system tag if it exists
-        description_parts = [
-            f"Pronouns: {system_pronouns}\n"
-        ]
-        
-        if system_tag:
-            description_parts.append(f"System Tag: {system_tag}\n")
-            
-        description_parts.extend([
-            f"Description: {system_description}\n",
-            f"Linked Discord Account: {ctx.author.mention}"
-        ])
-
-        embed = discord.Embed(
-            title=system_name,
-            description="\n".join(description_parts),
-            color=system_color
-        )
-
-        if system_avatar:
-            embed.set_thumbnail(url=system_avatar)
-
-        if system_banner:
-            embed.set_image(url=system_banner)
-
-        embed.set_footer(text=f"User ID: {user_id}")
-
-        await ctx.send(embed=embed)
+        payload = render_cache.get("system", user_id, "", lambda: _render_system(user_id, system_info))
+        await send_payload(ctx, payload)
 
     @bot.command(name="wipe_alters")
     async def wipe_alters(ctx):
@@ -273,9 +282,13 @@ def setup_system_commands(bot):
             )
 
             if confirmation.content.strip().upper() == "CONFIRM":
-                profile["alters"] = {}
-                await data_manager.save_user_profile(user_id, profile)
-                await ctx.send("✅ All alters have been wiped from your system.")
+                async def work(job):
+                    profile = await data_manager.get_user_profile(user_id)
+                    await job.progress(f"🧹 Wiping {len(profile.get('alters', {}))} alters…")
+                    await delete_alters(user_id, profile, list(profile.get("alters", {})))
+                    return "✅ All alters have been wiped from your system."
+
+                await job_queue.submit(ctx, "wipe_alters", work)
             else:
                 await ctx.send("❌ Wipe canceled. Your alters are safe.")
 
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+import sharding
+from data_manager import data_manager
+
+
+@pytest.fixture
+def local_mode(monkeypatch):
+    """No database configured and tiny caches, so every put overflows."""
+    monkeypatch.setattr(data_manager, "mongodb_uri", None)
+    for name in ("blacklists", "system_settings"):
+        data_manager._cache[name].clear()
+        monkeypatch.setattr(data_manager._cache[name], "maxsize", 1)
+    yield
+    for name in ("blacklists", "system_settings"):
+        data_manager._cache[name].clear()
+
+
+def _guild(n: int) -> str:
+    return str(n << 22)
+
+
+def test_local_blacklist_survives_overflow_and_shard_drop(local_mode):
+    async def run():
+        assert await data_manager.save_blacklist("channel", _guild(1), {"10": True})
+        for n in range(2, 6):   # fill the shard's LRU well past maxsize
+            await data_manager.get_blacklist("channel", _guild(n))
+        sharding.drop_shard(sharding.shard_of(_guild(1)))
+        return await data_manager.get_blacklist("channel", _guild(1))
+
+    assert asyncio.run(run()) == {"10": True}
+
+
+def test_local_guild_settings_survive_overflow_and_shard_drop(local_mode):
+    async def run():
+        assert await data_manager.update_guild_settings(_guild(1), {"proxy_enabled": False})
+        for n in range(2, 6):
+            await data_manager.get_guild_settings(_guild(n))
+        sharding.drop_shard(sharding.shard_of(_guild(1)))
+        return await data_manager.get_guild_settings(_guild(1))
+
+    assert asyncio.run(run()) == {"proxy_enabled": False}
+
+
+def test_blacklist_not_saved_while_database_unreachable(monkeypatch):
+    async def unreachable():
+        return False
+
+    monkeypatch.setattr(data_manager, "mongodb_uri", "mongodb://unreachable")
+    monkeypatch.setattr(data_manager, "_ensure_connection", unreachable)
+    assert asyncio.run(data_manager.save_blacklist("channel", _guild(7), {"10": True})) is False
+    assert ("channel", _guild(7)) not in data_manager._cache["blacklists"]
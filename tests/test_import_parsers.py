@@ -0,0 +1,19 @@
+import pytest
+
+from import_parsers import CHUNK_BYTES, _Cursor, _iter_array, _text_chunks
+
+
+def _array(text: str) -> list:
+    cur = _Cursor(_text_chunks(text.encode("utf-8")))
+    return list(_iter_array(cur))
+
+
+@pytest.mark.parametrize("number, expected", [("1.5", 1.5), ("1e5", 1e5), ("1.5e-3", 1.5e-3), ("-12", -12)])
+def test_number_split_at_chunk_boundary(number, expected):
+    # the chunk boundary falls right after the number's first character ("1|.5", "1|e5", "-|12")
+    text = "[" + " " * (CHUNK_BYTES - 3) + number + ", 2]"
+    assert _array(text) == [expected, 2]
+
+
+def test_number_ending_the_document():
+    assert _array("[" + " " * (CHUNK_BYTES - 3) + "12]") == [12]
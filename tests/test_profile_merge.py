@@ -0,0 +1,28 @@
+from export_format import expand_alter
+from profile_merge import plan_merge
+
+
+def test_delta_deletions_cascade():
+    profile = {
+        "alters": {n: expand_alter(n, {}) for n in ("A", "B", "C")},
+        "folders": {"F": {"alters": ["A", "B"]}, "G": {"alters": ["B"]}},
+        "system": {"name": "S", "current_front": {"alters": ["B", "C"]}},
+        "autoproxy": {"1": {"mode": "front", "alter": "B", "last_proxied": "B"}},
+    }
+    incoming = {
+        "alters": {"D": expand_alter("D", {})},
+        "deleted_alters": ["B", "missing"],
+        "folders": {"F": {"alters": ["A", "B", "D"]}, "H": {"alters": ["B", "D"]}},
+    }
+    plan = plan_merge("test-cascade", profile, incoming)
+
+    assert plan.deleted_alters == ["B"]
+    assert ("alters", "B") in plan.unsets
+    assert ("deleted_alters", "B") in plan.sets
+    assert plan.sets[("folders", "F", "alters")] == ["A", "D"]
+    assert plan.sets[("folders", "G", "alters")] == []
+    assert plan.sets[("folders", "H")]["alters"] == ["D"]
+    assert plan.sets[("system", "current_front", "alters")] == ["C"]
+    assert plan.sets[("autoproxy", "1", "alter")] is None
+    assert plan.sets[("autoproxy", "1", "mode")] == "off"
+    assert plan.sets[("autoproxy", "1", "last_proxied")] is None
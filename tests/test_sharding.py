@@ -0,0 +1,24 @@
+import sharding
+
+
+def test_lru_evicts_per_shard():
+    cache = sharding.ShardedLRU("test-evict", 2)
+    for key in ("a", "b", "c"):
+        cache.put(key, 0, key)
+    assert "a" not in cache and cache.get("c", 0) == "c"
+    cache.drop_shard(0)
+    assert len(cache) == 0
+
+
+def test_pinned_entries_are_never_evicted_or_dropped():
+    cache = sharding.ShardedLRU("test-pinned", 1)
+    cache.put("kept", 0, 1, pinned=True)
+    cache.put("a", 0, 2)
+    cache.put("b", 0, 3)
+    assert cache.get("kept", 0) == 1
+    sharding.drop_shard(0)
+    assert cache.get("kept", 0) == 1 and "b" not in cache
+
+    cache.put("kept", 0, 4)   # persisted now: an ordinary entry again
+    cache.drop_shard(0)
+    assert "kept" not in cache
@@ -0,0 +1,312 @@
+"""
+tracing.py – per‑command latency tracing for Pixel
+==================================================
+
+Key points
+----------
+* **One trace per command** – ``bot.process_commands`` is replaced by an equivalent
+  ``get_context`` + ``invoke`` that runs inside a trace; the ``before_invoke`` /
+  ``after_invoke`` hooks add an ``invoke`` span around the command body and
+  ``on_command_error`` records failures.
+* **Sub‑spans** – ``@traced(...)`` wraps ``data_manager`` calls, and every Discord REST
+  request made through ``bot.http`` becomes a span named after its route.
+* **Slow trace buffer** – traces slower than ``TRACE_SLOW_MS`` are kept in a ring buffer
+  for ``!slow_traces``.
+* **Optional export** – with ``OTLP_TRACES_ENDPOINT`` set (e.g.
+  ``http://localhost:4318/v1/traces``) finished traces are batched and POSTed as
+  OTLP/JSON to a local collector. Export never blocks a command.
+
+Outside a trace every helper here is a single context‑variable lookup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import aiohttp
+import discord
+from discord.ext import commands
+
+import metrics
+from http_client import http_client
+from loop_monitor import set_activity
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ───────────────────────── #
+
+SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "250"))
+BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "50"))
+OTLP_ENDPOINT = os.getenv("OTLP_TRACES_ENDPOINT")
+OTLP_FLUSH_SECONDS = 5.0
+OTLP_MAX_QUEUE = 1000
+
+COMMAND_LATENCY = metrics.Histogram(
+    "pixel_command_duration_seconds", "Prefix command latency from parse to completion", ("command",)
+)
+
+# ───────────────────────── spans / traces ──────────────────────── #
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attrs", "error")
+
+    def __init__(self, name: str, parent_id: str | None, attrs: dict[str, Any] | None = None):
+        self.name = name
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end: float | None = None
+        self.attrs = attrs or {}
+        self.error: str | None = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+
+class Trace:
+    __slots__ = ("trace_id", "name", "spans", "root", "started_at", "error")
+
+    def __init__(self, name: str):
+        self.trace_id = _new_id(128)
+        self.name = name
+        self.started_at = time.time()
+        self.root = Span(name, None)
+        self.spans: list[Span] = [self.root]
+        self.error: str | None = None
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+    def children(self) -> list[Span]:
+        return self.spans[1:]
+
+
+_current_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+_slow_traces: deque[Trace] = deque(maxlen=BUFFER_SIZE)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span | None]:
+    """Record a child span of the current trace; a no‑op outside a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get() or trace.root
+    s = Span(name, parent.span_id, attrs)
+    trace.spans.append(s)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def traced(name: str):
+    """Decorator form of ``span`` for coroutine functions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return await fn(*args, **kwargs)
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def recent_slow_traces() -> list[Trace]:
+    """Slow traces, newest first."""
+    return list(reversed(_slow_traces))
+
+
+def _finish(trace: Trace) -> None:
+    trace.root.end = time.perf_counter()
+    COMMAND_LATENCY.observe(trace.duration, command=trace.name)
+    if trace.duration * 1000 >= SLOW_MS:
+        _slow_traces.append(trace)
+    if _exporter is not None:
+        _exporter.submit(trace)
+
+# ───────────────────────── OTLP export ─────────────────────────── #
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(trace: Trace, s: Span) -> dict[str, Any]:
+    base_ns = int(trace.started_at * 1e9)
+    start_ns = base_ns + int((s.start - trace.root.start) * 1e9)
+    end_ns = start_ns + int(s.duration * 1e9)
+    out: dict[str, Any] = {
+        "traceId": trace.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": 2 if s is trace.root else 1,  # SERVER for the command, INTERNAL below it
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attrs.items()],
+    }
+    if s.parent_id:
+        out["parentSpanId"] = s.parent_id
+    error = s.error or (trace.error if s is trace.root else None)
+    if error:
+        out["status"] = {"code": 2, "message": error}
+    return out
+
+
+class OTLPExporter:
+    """Batches finished traces and POSTs them as OTLP/JSON."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self._queue: deque[Trace] = deque(maxlen=OTLP_MAX_QUEUE)
+        self._task: asyncio.Task | None = None
+
+    def submit(self, trace: Trace) -> None:
+        self._queue.append(trace)  # oldest traces fall off when the collector is down
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self._flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(OTLP_FLUSH_SECONDS)
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._queue:
+            return
+        batch = list(self._queue)
+        self._queue.clear()
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "pixel"}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "pixel.tracing"},
+                    "spans": [_otlp_span(t, s) for t in batch for s in t.spans],
+                }],
+            }]
+        }
+        try:
+            async with http_client.request("POST", self.endpoint, op="otlp", json=payload,
+                                           timeout=aiohttp.ClientTimeout(total=5)) as resp:
+                if resp.status >= 400:
+                    logger.warning(f"OTLP export rejected with HTTP {resp.status}")
+        except Exception as e:
+            logger.warning(f"OTLP export failed: {e}")
+
+
+_exporter: OTLPExporter | None = OTLPExporter(OTLP_ENDPOINT) if OTLP_ENDPOINT else None
+
+
+def start_export() -> None:
+    if _exporter is not None:
+        _exporter.start()
+        logger.info(f"Exporting command traces to {OTLP_ENDPOINT}")
+
+
+async def stop_export() -> None:
+    if _exporter is not None:
+        await _exporter.stop()
+
+# ───────────────────────── setup function ──────────────────────── #
+
+def setup_tracing(bot: commands.Bot) -> None:
+    """Trace command processing, command bodies and Discord REST calls."""
+
+    async def process_commands(message: discord.Message) -> None:
+        # Same as commands.Bot.process_commands, but inside a trace
+        if message.author.bot:
+            return
+
+        ctx = await bot.get_context(message)
+        if ctx.command is None:
+            await bot.invoke(ctx)  # keeps discord.py's CommandNotFound behaviour
+            return
+
+        trace = Trace(f"!{ctx.command.qualified_name}")
+        trace.root.attrs["pixel.command"] = ctx.command.qualified_name
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(trace.root)
+        try:
+            await bot.invoke(ctx)
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            if ctx.command_failed and trace.error is None:
+                trace.error = "command failed"
+            _finish(trace)
+
+    bot.process_commands = process_commands
+
+    # ───── command body span ─────
+    @bot.before_invoke
+    async def _before_invoke(ctx: commands.Context):
+        set_activity(f"!{ctx.command.qualified_name}")
+        trace = _current_trace.get()
+        if trace is not None:
+            s = Span("invoke", trace.root.span_id)
+            trace.spans.append(s)
+            ctx._trace_span = s
+            ctx._trace_span_token = _current_span.set(s)
+
+    @bot.after_invoke
+    async def _after_invoke(ctx: commands.Context):
+        s = getattr(ctx, "_trace_span", None)
+        if s is not None:
+            s.end = time.perf_counter()
+            _current_span.reset(ctx._trace_span_token)
+
+    @bot.listen("on_command_error")
+    async def _trace_command_error(ctx: commands.Context, error: Exception):
+        # Runs in its own task but inherits the trace from the dispatching context
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.error = f"{type(error).__name__}: {error}"
+
+    # ───── Discord REST sub‑spans ─────
+    original_request = bot.http.request
+
+    async def request(route, **kwargs):
+        if _current_trace.get() is None:
+            return await original_request(route, **kwargs)
+        with span(f"discord {route.method} {route.path}", **{"http.method": route.method}):
+            return await original_request(route, **kwargs)
+
+    bot.http.request = request
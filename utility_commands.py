@@ -1,40 +1,24 @@
 import discord
 from discord.ext import commands
 from discord.ui import View, Button
-import json
 
-def setup_utility_commands(bot):
-    suggestion_channels = {}
-
-    def load_suggestion_channels():
-        nonlocal suggestion_channels
-        try:
-            with open("suggestion_channels.json", "r") as f:
-                suggestion_channels = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            suggestion_channels = {}
-
-    def save_suggestion_channels():
-        with open("suggestion_channels.json", "w") as f:
-            json.dump(suggestion_channels, f, indent=4)
-
-    load_suggestion_channels()
+import guild_settings
 
+def setup_utility_commands(bot):
     @bot.command(name="set_suggestion_channel")
     @commands.has_permissions(administrator=True)
     async def set_suggestion_channel(ctx, channel: discord.TextChannel):
-        guild_id = str(ctx.guild.id)
-
-        suggestion_channels[guild_id] = channel.id
-        save_suggestion_channels()
+        if not await guild_settings.set_suggestion_channel(ctx.guild.id, str(channel.id)):
+            await ctx.send("❌ Failed to save settings. Please try again.")
+            return
 
         await ctx.send(f"✅ Suggestions will now be sent to {channel.mention}.")
 
     @bot.command(name="suggest")
     async def suggest(ctx):
-        guild_id = str(ctx.guild.id)
+        channel_id = await guild_settings.get(ctx.guild.id if ctx.guild else None, "suggestion_channel")
 
-        if guild_id not in suggestion_channels:
+        if channel_id is None:
             await ctx.send("❌ The suggestion channel has not been set up yet. Please ask an admin to set it with `!set_suggestion_channel`.")
             return
 
@@ -53,7 +37,7 @@ def setup_utility_commands(bot):
                 check=lambda m: m.author == ctx.author and isinstance(m.channel, discord.DMChannel)
             )
 
-            suggestion_channel = bot.get_channel(suggestion_channels[guild_id])
+            suggestion_channel = bot.get_channel(int(channel_id))
 
             embed = discord.Embed(
                 title="📝 New Anonymous Suggestion",
@@ -149,11 +133,20 @@ def setup_utility_commands(bot):
                                      "`!create <name> <pronouns> <description>` - Create new alter with embed support\n"
                                      "`!edit <name>` - Edit alter details (name, displayname, pronouns, description, avatar, banner, proxy, color, role, age, birthday, privacy)\n"
                                      "`!show <name>` - Display alter profile with avatars, banners, and colors\n"
-                                     "`!list_profiles` - List all alters in current system\n"
+                                     "`!list_profiles [sort:created|newest|role] [role:<role>] [folder:<folder>]` - List alters in current system, optionally sorted or filtered\n"
+                                     "`!find <text>` - Search your alters by name, alias, display name or description\n"
                                      "`!delete <name>` - Delete an alter\n\n"
+                                     "**Bulk Changes:**\n"
+                                     "`!bulk_create [dry]` + CSV - Create many alters from a table (a `name` column plus field columns)\n"
+                                     "`!bulk_edit [dry]` + CSV - Edit many alters at once (e.g. `name,proxy,color`); nothing is saved unless every row is valid\n\n"
                                      "**Aliases:**\n"
                                      "`!alias <name> <alias>` - Add alias to alter\n"
-                                     "`!remove_alias <name> <alias>` - Remove alias from alter",
+                                     "`!remove_alias <name> <alias>` - Remove alias from alter\n\n"
+                                     "**Switches:**\n"
+                                     "`!switch <name> [name…]` - Log a switch (`!switch out` for nobody fronting)\n"
+                                     "`!front` - Show who is fronting and since when\n"
+                                     "`!fronthistory [number]` - Show recent switches\n"
+                                     "`!frontstats` - Show total front time per alter",
                         "color": 0x8A2BE2
                     },
                     # Page 3 - Folder Management
@@ -179,6 +172,10 @@ def setup_utility_commands(bot):
                                      "• Advanced format: `a:...;` (text between prefix/suffix)\n"
                                      "`!proxyavatar <n>` - Set separate avatar for proxying\n"
                                      "`!proxy <n> <message>` - Send proxied message manually\n\n"
+                                     "**Proxied Messages:**\n"
+                                     "React with ❌ on your proxied message to delete it\n"
+                                     "`!edit_last <text>` - Edit your last proxied message here (or reply to one)\n"
+                                     "`!whosent <link or ID>` - Show who sent a proxied message (or reply to it)\n\n"
                                      "**Autoproxy (Server-specific):**\n"
                                      "`!autoproxy latch` - Last proxied alter stays active in this server\n"
                                      "`!autoproxy front <n>` - Set alter as front in this server\n"
@@ -195,27 +192,34 @@ def setup_utility_commands(bot):
                     {
                         "title": "📂 Import & Export Commands",
                         "description": "**System Data Management:**\n\n"
-                                     "`!export_system` - Export entire system to JSON file (sent to DMs)\n"
-                                     "`!import_system` - Import previously exported system from JSON file\n\n"
-                                     "**PluralKit Integration:**\n"
-                                     "`!import_pluralkit` - Import PluralKit system data\n"
+                                     "`!export_system [gzip]` - Export entire system to JSON file (sent to DMs)\n"
+                                     "`!export_system since <YYYY-MM-DD|last>` - Export only changes since a date or your last export\n"
+                                     "`!import_system [dry]` - Import previously exported system from JSON file\n\n"
+                                     "**PluralKit & Tupperbox:**\n"
+                                     "`!import_pluralkit [dry]` - Import PluralKit system data\n"
+                                     "`!import_tupperbox [dry]` - Import a Tupperbox `tul!export` file\n"
                                      "• Imports profiles with proxy avatars and colors\n"
                                      "• Converts groups to folders automatically\n"
                                      "• Preserves system tags and member details\n\n"
-                                     "**Note:** Import commands will overwrite existing data. Export first as backup!",
+                                     "**Note:** Imports merge into your system – new alters are added and changed details updated. "
+                                     "Add `dry` to preview the changes first!",
                         "color": 0x8A2BE2
                     },
                     # Page 6 - Admin Commands
                     {
                         "title": "🔧 Admin Commands (Admin Only)",
                         "description": "**Bot Status & Information:**\n\n"
-                                     "`!pixel` - Show bot status dashboard with connection info and server stats\n\n"
+                                     "`!pixel` - Show bot status dashboard with connection info and server stats\n"
+                                     "`!slow_traces [number]` - Show recent slow commands with a timing breakdown\n\n"
                                      "**Channel & Category Management:**\n\n"
                                      "`!blacklist_channel <channel>` - Blacklist channel from proxy detection\n"
                                      "`!blacklist_category <category>` - Blacklist entire category from proxy detection\n"
                                      "`!unblacklist_channel <channel>` - Remove channel from blacklist\n"
                                      "`!unblacklist_category <category>` - Remove category from blacklist\n"
-                                     "`!list_blacklists` - List all blacklisted channels and categories\n\n"
+                                     "`!list_blacklists` - List all blacklisted channels and categories\n"
+                                     "`!set_log_channel <channel|off>` - Log proxied messages to a channel\n"
+                                     "`!server_proxy <on|off>` - Turn proxying on or off for this server\n"
+                                     "`!set_prefix <prefix|reset>` - Change the command prefix for this server\n\n"
                                      "**Utility:**\n\n"
                                      "`!admin_commands` - Display all admin commands\n"
                                      "`!set_suggestion_channel <channel>` - Set channel for anonymous suggestions\n\n"
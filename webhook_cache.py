@@ -0,0 +1,49 @@
+"""
+webhook_cache.py – one "Pixel Proxy" webhook per channel, looked up once
+========================================================================
+
+Listing a channel's webhooks is an API call (and rate limited per guild), so the
+proxy webhook is remembered per channel instead of being listed on every proxied
+message. A send that fails with ``NotFound`` means someone deleted the webhook:
+``forget`` the channel and the next ``get`` lists / creates it again.
+
+Entries are partitioned by the shard of the channel's guild (``sharding.ShardedLRU``),
+with ``WEBHOOK_CACHE_SIZE`` channels per shard.
+"""
+
+from __future__ import annotations
+
+import os
+
+import discord
+
+import metrics
+import sharding
+
+WEBHOOK_NAME = "Pixel Proxy"
+WEBHOOK_CACHE_SIZE = int(os.getenv("WEBHOOK_CACHE_SIZE", "4096"))
+
+_webhooks = sharding.ShardedLRU("webhook", WEBHOOK_CACHE_SIZE)
+
+
+async def get(channel) -> discord.Webhook:
+    """The channel's proxy webhook, created if it doesn't exist yet."""
+    guild = getattr(channel, "guild", None)
+    guild_id = guild.id if guild is not None else None
+    wh = _webhooks.get(channel.id, guild_id)
+    if wh is not None:
+        metrics.CACHE_HITS.inc(cache="webhook")
+        return wh
+
+    metrics.CACHE_MISSES.inc(cache="webhook")
+    metrics.WEBHOOK_CALLS.inc(op="list")
+    wh = next((w for w in await channel.webhooks() if w.name == WEBHOOK_NAME), None)
+    if not wh:
+        metrics.WEBHOOK_CALLS.inc(op="create")
+        wh = await channel.create_webhook(name=WEBHOOK_NAME)
+    _webhooks.put(channel.id, guild_id, wh)
+    return wh
+
+
+def forget(channel_id: int) -> None:
+    _webhooks.pop(channel_id, None)